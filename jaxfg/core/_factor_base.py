@@ -1,5 +1,5 @@
 import abc
-from typing import Generic, Tuple, Type, TypeVar, cast, get_type_hints
+from typing import Generic, Hashable, Tuple, Type, TypeVar, cast, get_type_hints
 
 import jax
 import jax_dataclasses as jdc
@@ -178,3 +178,20 @@ class FactorBase(_FactorBase, Generic[VariableValueTuple], abc.ABC, EnforceOverr
         return jdc.replace(
             self, variables=tuple(type(v).canonical_instance() for v in self.variables)
         )
+
+    @final
+    def get_group_key(self) -> Hashable:
+        """Returns a key for grouping factors for stacking. Factors with matching keys
+        can be stacked and linearized together."""
+        # Each factor is ultimately just a pytree node; in order for a set of factors
+        # to be batchable, they must share the same:
+        return (
+            # (1) Treedef. Note that variables can be different as long as their types
+            # are the same.
+            jax.tree_util.tree_structure(self.anonymize_variables()),
+            # (2) Leaf shapes: contained array shapes must match
+            tuple(
+                leaf.shape if hasattr(leaf, "shape") else ()
+                for leaf in jax.tree_util.tree_leaves(self)
+            ),
+        )
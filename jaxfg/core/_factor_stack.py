@@ -1,4 +1,4 @@
-from typing import Generic, List, Sequence, Tuple, Type, TypeVar
+from typing import Callable, Generic, List, Sequence, Tuple, Type, TypeVar
 
 import jax
 import jax_dataclasses as jdc
@@ -207,3 +207,50 @@ class FactorStack(Generic[FactorType]):
             self.factor.build_variable_value_tuple(values_stacked),
         )
         return jacobians
+
+    def linearize_residual_vector(
+        self,
+        assignments: VariableAssignments,
+    ) -> Tuple[jnp.ndarray, Callable[[Tuple[jnp.ndarray, ...]], jnp.ndarray]]:
+        """Linearize stacked residual vectors with respect to the local
+        parameterization of each factor input, via `jax.linearize()`.
+
+        Returns the stacked residual vectors, with shape `(N, residual dim)`, and a
+        linear function that maps a tuple of local deltas, one for each variable and
+        each with shape `(N, local parameter dim)`, to residual tangents. Note that this
+        always uses autodiff, even for factors with analytical Jacobians.
+        """
+
+        assert assignments.storage_layout == self.storage_layout
+
+        # Stack inputs to our factors.
+        values_stacked = tuple(
+            jax.vmap(variable.unflatten)(assignments.storage[indices])
+            for indices, variable in zip(self.value_indices, self.factor.variables)
+        )
+
+        def compute_residual_vector(
+            factor: FactorType,
+            values: Tuple[hints.VariableValue, ...],
+            local_deltas: Tuple[jnp.ndarray, ...],
+        ) -> jnp.ndarray:
+            return factor.compute_residual_vector(
+                factor.build_variable_value_tuple(
+                    tuple(
+                        type(variable).manifold_retract(value, local_delta)
+                        for variable, value, local_delta in zip(
+                            factor.variables, values, local_deltas
+                        )
+                    )
+                )
+            )
+
+        return jax.linearize(
+            lambda local_deltas: jax.vmap(compute_residual_vector)(
+                self.factor, values_stacked, local_deltas
+            ),
+            tuple(
+                jnp.zeros((self.num_factors, variable.get_local_parameter_dim()))
+                for variable in self.factor.variables
+            ),
+        )
@@ -1,5 +1,17 @@
 from collections import defaultdict
-from typing import Collection, DefaultDict, Dict, Hashable, Iterable, List, Tuple, cast
+from typing import (
+    Callable,
+    Collection,
+    DefaultDict,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
 
 import jax
 import jax_dataclasses as jdc
@@ -30,6 +42,28 @@ class StackedFactorGraph:
     local_storage_layout: StorageLayout = jdc.static_field()
     residual_dim: int = jdc.static_field()
 
+    hessian_coords: Optional[sparse.SparseCooCoordinates] = None
+    """Unique coordinates of non-zero entries in the Gauss-Newton Hessian. Only
+    populated if the graph is made with `compute_hessian_pattern=True`."""
+
+    hessian_scatter_indices: Optional[hints.Array] = None
+    """Maps each entry of each per-factor block product to an index in
+    `hessian_coords`."""
+
+    fixed_mask: Optional[hints.Array] = None
+    """Boolean mask over the local storage vector, for holding variables constant.
+    Typically set via `with_fixed_variables()`.
+
+    When set, the whitened residual vector is padded with `local_dim` zeros, and the
+    Jacobian columns of fixed entries are replaced with unit columns on these padded
+    rows. Fixed variables are therefore decoupled from the rest of the linear system,
+    and every linear solver returns zero steps for them. Because the mask is an array
+    and not a static field, changing which variables are fixed doesn't require
+    recompilation; setting a mask on a graph that didn't have one does."""
+
+    mesh: Optional[jax.sharding.Mesh] = jdc.static_field(default=None)
+    """Device mesh that factor stacks are split across. Set by `shard()`."""
+
     # Shape checks break under vmap
     # def __post_init__(self):
     #     """Check that inputs make sense!"""
@@ -48,28 +82,20 @@ class StackedFactorGraph:
     def make(
         factors: Iterable[FactorBase],
         use_onp: bool = True,
+        compute_hessian_pattern: bool = False,
     ) -> "StackedFactorGraph":
-        """Create a factor graph from a set of factors."""
+        """Create a factor graph from a set of factors.
+
+        If `compute_hessian_pattern` is set, we also precompute the sparsity pattern of
+        the Gauss-Newton Hessian. Nonlinear solvers will then pass an assembled normal
+        matrix to linear solvers."""
 
         # Start by grouping our factors and grabbing a list of (ordered!) variables
         factors_from_group: DefaultDict[GroupKey, List[FactorBase]] = defaultdict(list)
         variables_ordered_set: Dict[VariableBase, None] = {}
         for factor in factors:
-            # Each factor is ultimately just a pytree node; in order for a set of
-            # factors to be batchable, they must share the same:
-            group_key: GroupKey = (
-                # (1) Treedef. Note that variables can be different as long as their
-                # types are the same.
-                jax.tree_structure(factor.anonymize_variables()),
-                # (2) Leaf shapes: contained array shapes must match
-                tuple(
-                    leaf.shape if hasattr(leaf, "shape") else ()
-                    for leaf in jax.tree_leaves(factor)
-                ),
-            )
-
             # Record factor and variables
-            factors_from_group[group_key].append(factor)
+            factors_from_group[factor.get_group_key()].append(factor)
             for v in factor.variables:
                 variables_ordered_set[v] = None
         variables = list(variables_ordered_set.keys())
@@ -112,12 +138,155 @@ class StackedFactorGraph:
             lambda *arrays: onp.concatenate(arrays, axis=0), *jacobian_coords
         )
 
+        hessian_coords: Optional[sparse.SparseCooCoordinates] = None
+        hessian_scatter_indices: Optional[onp.ndarray] = None
+        if compute_hessian_pattern:
+            # Coordinates for each block product, in the order used by
+            # `compute_normal_matrix()`.
+            block_rows: List[onp.ndarray] = []
+            block_cols: List[onp.ndarray] = []
+            for local_indices in _get_local_indices(
+                stacked_factors, jacobian_coords_concat
+            ):
+                for indices_i in local_indices:
+                    for indices_j in local_indices:
+                        rows, cols = onp.broadcast_arrays(
+                            indices_i[:, :, None], indices_j[:, None, :]
+                        )
+                        block_rows.append(rows.flatten())
+                        block_cols.append(cols.flatten())
+
+            # Deduplicate.
+            local_dim = local_storage_layout.dim
+            unique_flat_indices, hessian_scatter_indices = onp.unique(
+                onp.concatenate(block_rows) * local_dim + onp.concatenate(block_cols),
+                return_inverse=True,
+            )
+            hessian_coords = sparse.SparseCooCoordinates(
+                rows=unique_flat_indices // local_dim,
+                cols=unique_flat_indices % local_dim,
+            )
+
         return StackedFactorGraph(
             factor_stacks=stacked_factors,
             jacobian_coords=jacobian_coords_concat,
             storage_layout=storage_layout,
             local_storage_layout=local_storage_layout,
             residual_dim=residual_offset,
+            hessian_coords=hessian_coords,
+            hessian_scatter_indices=hessian_scatter_indices,
+        )
+
+    def with_fixed_variables(
+        self, variables: Iterable[VariableBase]
+    ) -> "StackedFactorGraph":
+        """Returns a copy of this graph where a set of variables is held constant by
+        solvers. This replaces any previously fixed variables; pass an empty set to
+        free all of them.
+
+        Unlike adding stiff priors, this doesn't affect the conditioning of linear
+        subproblems. See `fixed_mask`."""
+        fixed_mask = onp.zeros(self.local_storage_layout.dim, dtype=bool)
+        for variable in variables:
+            index = self.local_storage_layout.index_from_variable[variable]
+            fixed_mask[index : index + variable.get_local_parameter_dim()] = True
+        return jdc.replace(self, fixed_mask=fixed_mask)
+
+    def shard(
+        self, devices: Optional[Sequence[jax.Device]] = None
+    ) -> "StackedFactorGraph":
+        """Distribute factors across devices, for parallel linearization. Defaults to
+        all available devices.
+
+        Each factor stack is split along its factor axis, and everything else is
+        replicated. Computations on the returned graph within `jax.jit`, including
+        solves, are then partitioned by XLA: residuals and Jacobian values are computed
+        on the devices that hold their factors, and reductions like sparse matrix-vector
+        products are combined across devices. Factors left over after dividing a stack
+        evenly between devices are moved to a separate, replicated stack.
+
+        For multiple CPU devices, set `XLA_FLAGS=--xla_force_host_platform_device_count=N`
+        before JAX is initialized."""
+        if devices is None:
+            devices = jax.devices()
+        num_devices = len(devices)
+        mesh = jax.sharding.Mesh(onp.array(devices), axis_names=("factors",))
+        replicated = jax.sharding.NamedSharding(mesh, jax.sharding.PartitionSpec())
+        split = jax.sharding.NamedSharding(mesh, jax.sharding.PartitionSpec("factors"))
+
+        factor_stacks: List[FactorStack] = []
+        jacobian_indices: List[onp.ndarray] = []
+        hessian_indices: List[onp.ndarray] = []
+        jacobian_offset = 0
+        hessian_offset = 0
+        for stacked_factor in self.factor_stacks:
+            num_factors = stacked_factor.num_factors
+            residual_dim = stacked_factor.factor.get_residual_dim()
+            variable_dims = [
+                variable.get_local_parameter_dim()
+                for variable in stacked_factor.factor.variables
+            ]
+
+            num_split = num_factors - num_factors % num_devices
+            for start, end in ((0, num_split), (num_split, num_factors)):
+                if start == end:
+                    continue
+                factor_stacks.append(
+                    jax.device_put(
+                        jdc.replace(
+                            jax.tree_map(lambda x: x[start:end], stacked_factor),
+                            num_factors=end - start,
+                        ),
+                        split if end == num_split else replicated,
+                    )
+                )
+
+                # Splitting a stack reorders Jacobian values, which are ordered by
+                # (stack, variable, factor, ...), and Hessian block products, which
+                # are ordered by (stack, variable pair, factor, ...).
+                jacobian_indices.extend(
+                    _get_split_indices(
+                        jacobian_offset,
+                        [residual_dim * dim for dim in variable_dims],
+                        num_factors,
+                        start,
+                        end,
+                    )
+                )
+                hessian_indices.extend(
+                    _get_split_indices(
+                        hessian_offset,
+                        [
+                            dim_i * dim_j
+                            for dim_i in variable_dims
+                            for dim_j in variable_dims
+                        ],
+                        num_factors,
+                        start,
+                        end,
+                    )
+                )
+            jacobian_offset += num_factors * residual_dim * sum(variable_dims)
+            hessian_offset += num_factors * sum(variable_dims) ** 2
+
+        jacobian_permutation = onp.concatenate(jacobian_indices)
+        hessian_permutation = onp.concatenate(hessian_indices)
+        return jdc.replace(
+            jax.device_put(
+                jdc.replace(
+                    self,
+                    factor_stacks=[],
+                    mesh=mesh,
+                    jacobian_coords=jax.tree_map(
+                        lambda x: x[jacobian_permutation], self.jacobian_coords
+                    ),
+                    hessian_scatter_indices=None
+                    if self.hessian_scatter_indices is None
+                    else self.hessian_scatter_indices[hessian_permutation],
+                ),
+                replicated,
+            ),
+            factor_stacks=factor_stacks,
         )
 
     @jax.jit
@@ -152,6 +321,20 @@ class StackedFactorGraph:
             axis=0,
         )
         assert residual_vector.shape == (self.residual_dim,)
+
+        # Zero-valued rows for fixed variables.
+        if self.fixed_mask is not None:
+            residual_vector = jnp.concatenate(
+                [residual_vector, jnp.zeros(self.local_storage_layout.dim)]
+            )
+
+        # Residual vectors are small and read by every device, so we gather them
+        # instead of leaving them split across devices.
+        if self.mesh is not None:
+            residual_vector = jax.lax.with_sharding_constraint(
+                residual_vector,
+                jax.sharding.NamedSharding(self.mesh, jax.sharding.PartitionSpec()),
+            )
         return residual_vector
 
     @jax.jit
@@ -231,7 +414,9 @@ class StackedFactorGraph:
         residual_vector: hints.Array,
     ) -> sparse.SparseCooMatrix:
         """Compute the Jacobian of a graph's residual vector with respect to the stacked
-        local delta vectors. Shape should be `(residual_dim, local_delta_storage_dim)`."""
+        local delta vectors. Shape should be `(residual_dim, local_delta_storage_dim)`,
+        or `(residual_dim + local_delta_storage_dim, local_delta_storage_dim)` if the
+        graph has a `fixed_mask`."""
 
         # Resolve storage layout mismatches. Factor stack computations will raise an
         # assertion error if the storage layout is incorrect.
@@ -264,12 +449,230 @@ class StackedFactorGraph:
         assert residual_end == self.residual_dim
 
         # Build Jacobian.
-        A = sparse.SparseCooMatrix(
-            values=jnp.concatenate([A.flatten() for A in A_values_list]),
-            coords=self.jacobian_coords,
-            shape=(self.residual_dim, self.local_storage_layout.dim),
+        local_dim = self.local_storage_layout.dim
+        A_values = jnp.concatenate([A.flatten() for A in A_values_list])
+        if self.fixed_mask is None:
+            return sparse.SparseCooMatrix(
+                values=A_values,
+                coords=self.jacobian_coords,
+                shape=(self.residual_dim, local_dim),
+            )
+
+        # Move columns of fixed variables to the zero-valued rows at the end.
+        return sparse.SparseCooMatrix(
+            values=jnp.concatenate(
+                [
+                    jnp.where(
+                        self.fixed_mask[self.jacobian_coords.cols], 0.0, A_values
+                    ),
+                    jnp.where(self.fixed_mask, 1.0, 0.0),
+                ]
+            ),
+            coords=sparse.SparseCooCoordinates(
+                rows=jnp.concatenate(
+                    [
+                        self.jacobian_coords.rows,
+                        self.residual_dim + jnp.arange(local_dim),
+                    ]
+                ),
+                cols=jnp.concatenate(
+                    [self.jacobian_coords.cols, jnp.arange(local_dim)]
+                ),
+            ),
+            shape=(self.residual_dim + local_dim, local_dim),
+        )
+
+    def compute_normal_matrix(
+        self, A: sparse.SparseCooMatrix
+    ) -> sparse.SparseCooMatrix:
+        """Assemble the Gauss-Newton Hessian `A^TA` from a whitened residual Jacobian.
+        Requires a graph created with `compute_hessian_pattern=True`.
+
+        Products are computed per factor, as dense `J_i^T J_j` blocks for each pair of
+        factor inputs, and then summed into the precomputed pattern. Both triangles
+        are stored."""
+        assert (
+            self.hessian_coords is not None and self.hessian_scatter_indices is not None
+        ), "Hessian pattern was not computed!"
+
+        # Unflatten Jacobian values into per-input blocks. Values are ordered by
+        # (stack, variable, factor, residual index, local parameter index).
+        block_products: List[jnp.ndarray] = []
+        values_start = 0
+        for stacked_factor in self.factor_stacks:
+            num_factors = stacked_factor.num_factors
+            factor_residual_dim = stacked_factor.factor.get_residual_dim()
+            jacobians = []
+            for variable in stacked_factor.factor.variables:
+                variable_dim = variable.get_local_parameter_dim()
+                values_end = (
+                    values_start + num_factors * factor_residual_dim * variable_dim
+                )
+                jacobians.append(
+                    A.values[values_start:values_end].reshape(
+                        (num_factors, factor_residual_dim, variable_dim)
+                    )
+                )
+                values_start = values_end
+
+            for jacobian_i in jacobians:
+                for jacobian_j in jacobians:
+                    block_products.append(
+                        jnp.einsum("nri,nrj->nij", jacobian_i, jacobian_j).flatten()
+                    )
+        assert values_start == self.jacobian_coords.rows.shape[0]
+
+        (nnz,) = self.hessian_coords.rows.shape
+        values = (
+            jnp.zeros(nnz)
+            .at[self.hessian_scatter_indices]
+            .add(jnp.concatenate(block_products))
+        )
+
+        # Unit columns of fixed variables only contribute to the diagonal.
+        if self.fixed_mask is not None:
+            values = jnp.where(
+                jnp.logical_and(
+                    self.hessian_coords.rows == self.hessian_coords.cols,
+                    self.fixed_mask[self.hessian_coords.rows],
+                ),
+                1.0,
+                values,
+            )
+
+        return sparse.SparseCooMatrix(
+            values=values,
+            coords=self.hessian_coords,
+            shape=(self.local_storage_layout.dim, self.local_storage_layout.dim),
+        )
+
+    def compute_whitened_residual_jacobian_operator(
+        self,
+        assignments: VariableAssignments,
+        residual_vector: hints.Array,
+    ) -> sparse.LinearOperator:
+        """Matrix-free alternative to `compute_whitened_residual_jacobian()`. Returns a
+        linear operator with the same shape, whose products are computed via
+        `jax.linearize()` and its transpose, without materializing the Jacobian.
+
+        Note that this always uses autodiff, even for factors with analytical Jacobians.
+        Because the returned operator contains Python callables, this should be called
+        from within the same traced function as the operator's consumers."""
+
+        # Resolve storage layout mismatches. Factor stack computations will raise an
+        # assertion error if the storage layout is incorrect.
+        assignments = assignments.update_storage_layout(self.storage_layout)
+        local_dim = self.local_storage_layout.dim
+
+        # Linearize factors by group.
+        jvp_functions: List[Callable[[Tuple[jnp.ndarray, ...]], jnp.ndarray]] = []
+        local_indices_list = _get_local_indices(
+            self.factor_stacks, self.jacobian_coords
+        )
+        stacked_residual_vectors: List[jnp.ndarray] = []
+        residual_start = 0
+        for stacked_factor in self.factor_stacks:
+            residual_end = residual_start + stacked_factor.get_residual_dim()
+            stacked_residual_vectors.append(
+                jnp.asarray(residual_vector[residual_start:residual_end]).reshape(
+                    (
+                        stacked_factor.num_factors,
+                        stacked_factor.factor.get_residual_dim(),
+                    )
+                )
+            )
+
+            _unused_residual, jvp_function = stacked_factor.linearize_residual_vector(
+                assignments
+            )
+            jvp_functions.append(jvp_function)
+            residual_start = residual_end
+        assert residual_end == self.residual_dim
+
+        def whiten(
+            stacked_factor: FactorStack,
+            tangents: jnp.ndarray,
+            stacked_residual_vector: jnp.ndarray,
+        ) -> jnp.ndarray:
+            # Tangents are whitened as single-column Jacobians.
+            return jax.vmap(type(stacked_factor.factor.noise_model).whiten_jacobian)(
+                stacked_factor.factor.noise_model,
+                tangents[:, :, None],
+                residual_vector=stacked_residual_vector,
+            )[:, :, 0]
+
+        def factor_matvec(x: hints.Array) -> jnp.ndarray:
+            return jnp.concatenate(
+                [
+                    whiten(
+                        stacked_factor,
+                        jvp_function(tuple(x[indices] for indices in local_indices)),
+                        stacked_residual_vector,
+                    ).flatten()
+                    for stacked_factor, jvp_function, local_indices, stacked_residual_vector in zip(
+                        self.factor_stacks,
+                        jvp_functions,
+                        local_indices_list,
+                        stacked_residual_vectors,
+                    )
+                ],
+                axis=0,
+            )
+
+        def matvec(x: hints.Array) -> jnp.ndarray:
+            if self.fixed_mask is None:
+                return factor_matvec(x)
+
+            # Move columns of fixed variables to the zero-valued rows at the end.
+            return jnp.concatenate(
+                [
+                    factor_matvec(jnp.where(self.fixed_mask, 0.0, x)),
+                    jnp.where(self.fixed_mask, x, 0.0),
+                ]
+            )
+
+        def rmatvec(x: hints.Array) -> jnp.ndarray:
+            (out,) = jax.linear_transpose(matvec, jnp.zeros(local_dim))(x)
+            return out
+
+        # Diagonal of A^TA: probe each local parameter of each factor input. This takes
+        # one product per local parameter dimension, rather than one per column.
+        ATA_diagonal = jnp.zeros(local_dim)
+        for stacked_factor, jvp_function, local_indices, stacked_residual_vector in zip(
+            self.factor_stacks,
+            jvp_functions,
+            local_indices_list,
+            stacked_residual_vectors,
+        ):
+            for i, indices in enumerate(local_indices):
+                for j in range(indices.shape[-1]):
+                    tangents = jvp_function(
+                        tuple(
+                            jnp.zeros(other_indices.shape)
+                            if k != i
+                            else jnp.zeros(other_indices.shape).at[:, j].set(1.0)
+                            for k, other_indices in enumerate(local_indices)
+                        )
+                    )
+                    ATA_diagonal = ATA_diagonal.at[indices[:, j]].add(
+                        jnp.sum(
+                            whiten(stacked_factor, tangents, stacked_residual_vector)
+                            ** 2,
+                            axis=-1,
+                        )
+                    )
+
+        residual_dim = self.residual_dim
+        if self.fixed_mask is not None:
+            ATA_diagonal = jnp.where(self.fixed_mask, 1.0, ATA_diagonal)
+            residual_dim += local_dim
+
+        return sparse.LinearOperator(
+            matvec=matvec,
+            rmatvec=rmatvec,
+            shape=(residual_dim, local_dim),
+            ATA_diagonal=ATA_diagonal,
         )
-        return A
 
     def solve(
         self,
@@ -279,3 +682,48 @@ class StackedFactorGraph:
         """Solve MAP inference problem."""
         # Note that the solver will handle storage layout mismatches.
         return solver.solve(graph=self, initial_assignments=initial_assignments)
+
+
+def _get_local_indices(
+    factor_stacks: List[FactorStack],
+    jacobian_coords: sparse.SparseCooCoordinates,
+) -> List[Tuple[hints.Array, ...]]:
+    """Get local parameter indices for each input of each stacked factor, with shapes
+    `(N, local parameter dim)`. These are read from the Jacobian coordinates, which are
+    ordered by (stack, variable, factor, residual index, local parameter index)."""
+    local_indices_list: List[Tuple[hints.Array, ...]] = []
+    coords_start = 0
+    for stacked_factor in factor_stacks:
+        num_factors = stacked_factor.num_factors
+        factor_residual_dim = stacked_factor.factor.get_residual_dim()
+
+        local_indices = []
+        for variable in stacked_factor.factor.variables:
+            variable_dim = variable.get_local_parameter_dim()
+            coords_end = coords_start + num_factors * factor_residual_dim * variable_dim
+            local_indices.append(
+                jacobian_coords.cols[coords_start:coords_end].reshape(
+                    (num_factors, factor_residual_dim, variable_dim)
+                )[:, 0, :]
+            )
+            coords_start = coords_end
+        local_indices_list.append(tuple(local_indices))
+    return local_indices_list
+
+
+def _get_split_indices(
+    offset: int,
+    block_sizes: List[int],
+    num_factors: int,
+    start: int,
+    end: int,
+) -> List[onp.ndarray]:
+    """Get indices of the values for factors `start:end` of a factor stack, when values
+    are arranged in blocks that each have `block_sizes[i]` values per factor."""
+    indices: List[onp.ndarray] = []
+    for block_size in block_sizes:
+        indices.append(
+            onp.arange(offset + start * block_size, offset + end * block_size)
+        )
+        offset += num_factors * block_size
+    return indices
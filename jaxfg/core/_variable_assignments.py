@@ -1,5 +1,5 @@
 import functools
-from typing import Collection, Dict, Iterable, Type, TypeVar
+from typing import Collection, Dict, Iterable, Optional, Type, TypeVar
 
 import jax
 import jax_dataclasses as jdc
@@ -180,9 +180,15 @@ class VariableAssignments:
 
     @jax.jit
     def manifold_retract(
-        self, local_delta_assignments: "VariableAssignments"
+        self,
+        local_delta_assignments: "VariableAssignments",
+        fixed_mask: Optional[hints.Array] = None,
     ) -> "VariableAssignments":
-        """Update variables on manifold."""
+        """Update variables on manifold.
+
+        If set, `fixed_mask` should be a boolean mask over the local delta storage.
+        Masked delta entries are ignored, and variables whose entries are all masked are
+        left unchanged."""
 
         # Check that inputs make sense
         assert not self.storage_layout.local_flag
@@ -211,17 +217,27 @@ class VariableAssignments:
             batched_deltas = local_delta_assignments.storage[
                 local_storage_index : local_storage_index + local_dim * count
             ].reshape((count, local_dim))
+            if fixed_mask is not None:
+                batched_fixed_mask = fixed_mask[
+                    local_storage_index : local_storage_index + local_dim * count
+                ].reshape((count, local_dim))
+                batched_deltas = jnp.where(batched_fixed_mask, 0.0, batched_deltas)
 
             # Batched variable update
+            batched_new_values_flat = jax.vmap(variable_type.flatten)(
+                jax.vmap(variable_type.manifold_retract)(
+                    jax.vmap(variable_type.unflatten)(batched_values_flat),
+                    batched_deltas,
+                )
+            )
+            if fixed_mask is not None:
+                batched_new_values_flat = jnp.where(
+                    jnp.all(batched_fixed_mask, axis=-1, keepdims=True),
+                    batched_values_flat,
+                    batched_new_values_flat,
+                )
             new_storage = new_storage.at[
                 storage_index : storage_index + dim * count
-            ].set(
-                jax.vmap(variable_type.flatten)(
-                    jax.vmap(variable_type.manifold_retract)(
-                        jax.vmap(variable_type.unflatten)(batched_values_flat),
-                        batched_deltas,
-                    )
-                ).flatten()
-            )
+            ].set(batched_new_values_flat.flatten())
 
         return jdc.replace(self, storage=new_storage)
@@ -49,6 +49,25 @@ class VariableBase(abc.ABC, Generic[VariableValueType], EnforceOverrides):
         """
         return cls.unflatten(cls.flatten(x) + local_delta)
 
+    @classmethod
+    def manifold_inverse_retract(
+        cls, x: VariableValueType, y: VariableValueType
+    ) -> hints.LocalVariableValue:
+        r"""Inverse of `manifold_retract()`: computes a local delta such that
+        `manifold_retract(x, local_delta) == y`. Should be overridden together with
+        `manifold_retract()`.
+
+        Typically written as `y $\ominus$ x` or `y $\boxminus$ x`.
+
+        Args:
+            x: Absolute parameter to compute delta from.
+            y: Absolute parameter to compute delta to.
+
+        Returns:
+            Delta value in local parameterization.
+        """
+        return cls.flatten(y) - cls.flatten(x)
+
     # (3) Optional
 
     @classmethod
@@ -1,3 +1,17 @@
+from ._decomposed_factor_graph import DecomposedFactorGraph, find_connected_components
+from ._fixed_lag_smoother import FixedLagSmoother, LinearPriorFactor
+from ._incremental_smoother import IncrementalSmoother, IncrementalUpdateInfo
+from ._partitioned_solver import PartitionedSolver, partition_variables
 from ._sparse_covariance import SparseCovariance
 
-__all__ = ["SparseCovariance"]
+__all__ = [
+    "DecomposedFactorGraph",
+    "FixedLagSmoother",
+    "IncrementalSmoother",
+    "IncrementalUpdateInfo",
+    "LinearPriorFactor",
+    "PartitionedSolver",
+    "SparseCovariance",
+    "find_connected_components",
+    "partition_variables",
+]
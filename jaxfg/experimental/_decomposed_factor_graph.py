@@ -0,0 +1,200 @@
+import concurrent.futures
+import dataclasses
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import jax
+import jax_dataclasses as jdc
+import numpy as onp
+from jax import numpy as jnp
+
+from .. import core, solvers
+
+
+def find_connected_components(
+    factors: Iterable[core.FactorBase],
+) -> List[List[core.FactorBase]]:
+    """Split a set of factors into connected components, where two factors are connected
+    if they share a variable. Components are ordered by their first factor, and factor
+    order is preserved within each component."""
+
+    # Union-find over variables.
+    parent: Dict[core.VariableBase, core.VariableBase] = {}
+
+    def find(variable: core.VariableBase) -> core.VariableBase:
+        root = variable
+        while parent[root] is not root:
+            root = parent[root]
+        while parent[variable] is not root:
+            parent[variable], variable = root, parent[variable]
+        return root
+
+    factors = list(factors)
+    for factor in factors:
+        assert len(factor.variables) > 0, "Factors must have at least one variable"
+        for variable in factor.variables:
+            parent.setdefault(variable, variable)
+        root = find(factor.variables[0])
+        for variable in factor.variables[1:]:
+            parent[find(variable)] = root
+
+    components: Dict[core.VariableBase, List[core.FactorBase]] = {}
+    for factor in factors:
+        components.setdefault(find(factor.variables[0]), []).append(factor)
+    return list(components.values())
+
+
+@dataclasses.dataclass(frozen=True)
+class _ComponentBatch:
+    """Connected components with identical structure, which are solved together."""
+
+    graph_batch: core.StackedFactorGraph
+    """Stacked graphs for each component. Variables in each component are relabeled to
+    the variables of the first one, so all graphs share the same storage layout."""
+
+    variables: Tuple[Tuple[core.VariableBase, ...], ...]
+    """Original variables of each component, ordered to match the shared storage
+    layout."""
+
+
+@dataclasses.dataclass(frozen=True)
+class DecomposedFactorGraph:
+    """Factor graph that is split into connected components, which are then solved
+    independently.
+
+    Components that share the same structure (variable types, factor types, and
+    connectivity) are stacked and solved together via `solver.solve_batch()`; for
+    example, multi-session maps where sessions have the same number of poses. Batches
+    are solved in parallel threads, and results are merged back into a single set of
+    assignments. Compared to `StackedFactorGraph`, which puts every component into one
+    linear system, this avoids coupling convergence and linear solves across unrelated
+    components."""
+
+    _batches: Tuple[_ComponentBatch, ...]
+
+    @staticmethod
+    def make(factors: Iterable[core.FactorBase]) -> "DecomposedFactorGraph":
+        """Create a decomposed factor graph from a set of factors."""
+
+        # Group components by structure. Variables are numbered by first appearance, so
+        # components with matching keys can be relabeled to each other.
+        components_from_key: Dict[
+            Hashable,
+            List[Tuple[List[core.FactorBase], List[core.VariableBase]]],
+        ] = {}
+        for component in find_connected_components(factors):
+            canonical_index: Dict[core.VariableBase, int] = {}
+            for factor in component:
+                for variable in factor.variables:
+                    canonical_index.setdefault(variable, len(canonical_index))
+            key = (
+                tuple(type(variable) for variable in canonical_index.keys()),
+                tuple(
+                    (
+                        factor.get_group_key(),
+                        tuple(
+                            canonical_index[variable] for variable in factor.variables
+                        ),
+                    )
+                    for factor in component
+                ),
+            )
+            components_from_key.setdefault(key, []).append(
+                (component, list(canonical_index.keys()))
+            )
+
+        batches: List[_ComponentBatch] = []
+        for group in components_from_key.values():
+            template_variables = group[0][1]
+            graphs: List[core.StackedFactorGraph] = []
+            variables: List[Tuple[core.VariableBase, ...]] = []
+            for component, canonical_variables in group:
+                template_from_variable = dict(
+                    zip(canonical_variables, template_variables)
+                )
+                graph = core.StackedFactorGraph.make(
+                    [
+                        jdc.replace(
+                            factor,
+                            variables=tuple(
+                                template_from_variable[variable]
+                                for variable in factor.variables
+                            ),
+                        )
+                        for factor in component
+                    ]
+                )
+                variable_from_template = dict(
+                    zip(template_variables, canonical_variables)
+                )
+                graphs.append(graph)
+                variables.append(
+                    tuple(
+                        variable_from_template[template_variable]
+                        for template_variable in graph.storage_layout.get_variables()
+                    )
+                )
+            batches.append(
+                _ComponentBatch(
+                    graph_batch=jax.tree_map(
+                        lambda *leaves: onp.stack(leaves), *graphs
+                    ),
+                    variables=tuple(variables),
+                )
+            )
+        return DecomposedFactorGraph(_batches=tuple(batches))
+
+    def get_components(self) -> List[Tuple[core.VariableBase, ...]]:
+        """Get the variables of each connected component. Components that are solved
+        together are adjacent."""
+        return [variables for batch in self._batches for variables in batch.variables]
+
+    def solve(
+        self,
+        initial_assignments: core.VariableAssignments,
+        solver: solvers.NonlinearSolverBase = solvers.GaussNewtonSolver(),
+        max_workers: Optional[int] = None,
+    ) -> core.VariableAssignments:
+        """Solve MAP inference problem. Assignments of variables that aren't connected
+        to any factors are passed through unchanged.
+
+        Args:
+            initial_assignments: Initial assignments. Can be in any storage layout.
+            solver: Solver to use for each batch of components.
+            max_workers: Maximum number of batches to solve in parallel. Defaults to
+                that of `concurrent.futures.ThreadPoolExecutor`.
+        """
+        storage_layout = initial_assignments.storage_layout
+        initial_storage = jnp.asarray(initial_assignments.storage)
+
+        def get_storage_indices(variables: Sequence[core.VariableBase]) -> onp.ndarray:
+            return onp.concatenate(
+                [
+                    storage_layout.index_from_variable[variable]
+                    + onp.arange(variable.get_parameter_dim())
+                    for variable in variables
+                ]
+            )
+
+        def solve_batch(
+            batch: _ComponentBatch,
+        ) -> Tuple[onp.ndarray, jnp.ndarray]:
+            indices = onp.stack(
+                [get_storage_indices(variables) for variables in batch.variables]
+            )
+            state_batch = solver.solve_batch(
+                batch.graph_batch,
+                core.VariableAssignments(
+                    storage=initial_storage[indices],
+                    storage_layout=batch.graph_batch.storage_layout,
+                ),
+            )
+            return indices, state_batch.assignments.storage.block_until_ready()
+
+        # Note that JAX releases the GIL during computations.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(solve_batch, self._batches))
+
+        storage = initial_storage
+        for indices, solved_storage in results:
+            storage = storage.at[indices].set(solved_storage)
+        return core.VariableAssignments(storage=storage, storage_layout=storage_layout)
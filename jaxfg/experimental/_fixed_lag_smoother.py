@@ -0,0 +1,271 @@
+import dataclasses
+from collections import defaultdict
+from typing import DefaultDict, Dict, List, Optional, Sequence, Tuple, Type
+
+import jax_dataclasses as jdc
+import numpy as onp
+import sksparse
+from jax import numpy as jnp
+from overrides import overrides
+
+from .. import core, hints, noises
+from ._incremental_smoother import (
+    _compute_normal_equations,
+    _linearize_factors,
+    _retract,
+)
+
+
+@jdc.pytree_dataclass
+class LinearPriorFactor(core.FactorBase[Tuple[object, ...]]):
+    """Dense linear Gaussian prior on a set of variables. Typically produced by
+    marginalization; see `FixedLagSmoother`.
+
+    Residuals are computed as `A @ delta + b`, where `delta` concatenates the local
+    deltas of each variable from its linearization point. `A` and `b` are already
+    whitened, so the noise model is an identity."""
+
+    linearization_points: Tuple[hints.VariableValue, ...]
+    A: hints.Array
+    b: hints.Array
+
+    @staticmethod
+    def make(
+        variables: Sequence[core.VariableBase],
+        linearization_points: Sequence[hints.VariableValue],
+        A: hints.Array,
+        b: hints.Array,
+    ) -> "LinearPriorFactor":
+        return LinearPriorFactor(
+            variables=tuple(variables),
+            noise_model=noises.DiagonalGaussian(
+                sqrt_precision_diagonal=onp.ones(A.shape[0])
+            ),
+            linearization_points=tuple(linearization_points),
+            A=A,
+            b=b,
+        )
+
+    @overrides
+    def compute_residual_vector(
+        self, variable_values: Tuple[object, ...]
+    ) -> jnp.ndarray:
+        delta = jnp.concatenate(
+            [
+                type(variable).manifold_inverse_retract(linearization_point, value)
+                for variable, linearization_point, value in zip(
+                    self.variables, self.linearization_points, variable_values
+                )
+            ]
+        )
+        return jnp.dot(self.A, delta) + self.b
+
+
+@dataclasses.dataclass
+class FixedLagSmoother:
+    """Sliding-window smoother, for online problems with bounded per-update cost.
+
+    Only the `window_size` most recently added variables are optimized. Older variables
+    are marginalized out: factors connected to them are linearized at the current
+    estimate and replaced with a single `LinearPriorFactor` on the remaining
+    (separator) variables, computed via a Schur complement. Memory use and solve times
+    are bounded by the window size and the size of separators.
+
+    Each update runs damped Gauss-Newton on the window. Linearization uses compiled
+    kernels that are shared across updates, so sliding the window doesn't trigger
+    recompilation; normal equations are factorized with CHOLMOD.
+
+    Note that factors can't be added to variables that have already been
+    marginalized."""
+
+    window_size: int
+    """Maximum number of variables to keep after each update."""
+
+    max_iterations: int = 10
+    """Maximum number of Gauss-Newton iterations per update."""
+
+    step_tolerance: float = 1e-5
+    """We stop iterating when no component of a Gauss-Newton step exceeds this."""
+
+    damping: float = 1e-5
+    """Constant added to the diagonal of the normal equations before factorization, as
+    in `CholmodSolver`. Keeps steps well-defined when variables in our window are
+    unconstrained, for example before a prior is added."""
+
+    _variables: List[core.VariableBase] = dataclasses.field(
+        default_factory=list, init=False, repr=False
+    )
+    """Variables in our window, ordered from oldest to newest."""
+
+    _values: Dict[core.VariableBase, onp.ndarray] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+    """Current (flattened) estimates of each variable in our window."""
+
+    _factors: List[core.FactorBase] = dataclasses.field(
+        default_factory=list, init=False, repr=False
+    )
+
+    def update(
+        self,
+        new_factors: Sequence[core.FactorBase] = (),
+        new_values: Optional[Dict[core.VariableBase, hints.VariableValue]] = None,
+    ) -> None:
+        """Add factors and variables, optimize our window, and then marginalize
+        variables that no longer fit in it.
+
+        Args:
+            new_factors: Factors to add. Variables must either be in our window, or be
+                included in `new_values`.
+            new_values: Initial values for new variables.
+        """
+        for variable, value in (new_values or {}).items():
+            assert variable not in self._values, "Variable was already added"
+            self._variables.append(variable)
+            self._values[variable] = onp.asarray(type(variable).flatten(value))
+        for factor in new_factors:
+            for variable in factor.variables:
+                assert (
+                    variable in self._values
+                ), "Factor is connected to a marginalized or unknown variable"
+            self._factors.append(factor)
+
+        self._optimize()
+        if len(self._variables) > self.window_size:
+            self._marginalize(self._variables[: -self.window_size])
+
+    def get_assignments(self) -> core.VariableAssignments:
+        """Get current estimates for all variables in our window."""
+        return core.VariableAssignments.make_from_dict(
+            {
+                variable: type(variable).unflatten(self._values[variable])
+                for variable in self._variables
+            }
+        )
+
+    def get_factors(self) -> List[core.FactorBase]:
+        """Get factors in our window, including priors from marginalization."""
+        return list(self._factors)
+
+    def _get_local_index_from_variable(
+        self,
+    ) -> Tuple[Dict[core.VariableBase, int], int]:
+        local_index_from_variable: Dict[core.VariableBase, int] = {}
+        dim = 0
+        for variable in self._variables:
+            local_index_from_variable[variable] = dim
+            dim += variable.get_local_parameter_dim()
+        return local_index_from_variable, dim
+
+    def _optimize(self) -> None:
+        """Run Gauss-Newton on all variables in our window."""
+        local_index_from_variable, dim = self._get_local_index_from_variable()
+        for _ in range(self.max_iterations):
+            ATA, ATb = _compute_normal_equations(
+                _linearize_factors(
+                    self._factors, self._values, local_index_from_variable
+                ),
+                start=0,
+                dim=dim,
+            )
+            try:
+                factor = sksparse.cholmod.cholesky(ATA, beta=self.damping)
+            except sksparse.cholmod.CholmodNotPositiveDefiniteError as e:
+                raise ValueError(
+                    "Normal equations are singular; some variables in the window are"
+                    " unconstrained. Add priors or increase `damping`."
+                ) from e
+            delta = factor.solve_A(-ATb)
+
+            # Retract each variable type at once.
+            variables_from_type: DefaultDict[
+                Type[core.VariableBase], List[core.VariableBase]
+            ] = defaultdict(list)
+            for variable in self._variables:
+                variables_from_type[type(variable)].append(variable)
+            for variable_type, variables in variables_from_type.items():
+                local_dim = variable_type.get_local_parameter_dim()
+                starts = onp.array([local_index_from_variable[v] for v in variables])
+                new_values = _retract(
+                    variable_type,
+                    onp.stack([self._values[v] for v in variables]),
+                    delta[starts[:, None] + onp.arange(local_dim)],
+                )
+                self._values.update(zip(variables, new_values))
+
+            if onp.max(onp.abs(delta)) < self.step_tolerance:
+                break
+
+    def _marginalize(self, variables: Sequence[core.VariableBase]) -> None:
+        """Remove variables from our window. Factors connected to them are replaced
+        with a linear prior on their other variables."""
+        marginalized = set(variables)
+        marginalized_factors: List[core.FactorBase] = []
+        kept_factors: List[core.FactorBase] = []
+        for factor in self._factors:
+            if any(variable in marginalized for variable in factor.variables):
+                marginalized_factors.append(factor)
+            else:
+                kept_factors.append(factor)
+
+        # Separator variables: connected to marginalized factors, but not marginalized.
+        separator = list(
+            dict.fromkeys(
+                variable
+                for factor in marginalized_factors
+                for variable in factor.variables
+                if variable not in marginalized
+            )
+        )
+
+        # Linearize, with marginalized variables ordered first.
+        local_index_from_variable: Dict[core.VariableBase, int] = {}
+        dim = 0
+        for variable in list(variables) + separator:
+            local_index_from_variable[variable] = dim
+            dim += variable.get_local_parameter_dim()
+        marginalized_dim = local_index_from_variable[separator[0]] if separator else dim
+        ATA_sparse, ATb = _compute_normal_equations(
+            _linearize_factors(
+                marginalized_factors, self._values, local_index_from_variable
+            ),
+            start=0,
+            dim=dim,
+        )
+        ATA = ATA_sparse.toarray()
+
+        # Schur complement onto separator variables.
+        m = marginalized_dim
+        H_mm_inv = onp.linalg.pinv(ATA[:m, :m])
+        information = ATA[m:, m:] - ATA[m:, :m] @ H_mm_inv @ ATA[:m, m:]
+        information_vector = ATb[m:] - ATA[m:, :m] @ H_mm_inv @ ATb[:m]
+
+        # Square root of the Schur complement, via an eigendecomposition: this is robust
+        # to separators that are only partially constrained.
+        self._factors = kept_factors
+        if len(separator) > 0:
+            eigenvalues, eigenvectors = onp.linalg.eigh(
+                0.5 * (information + information.T)
+            )
+            keep = eigenvalues > 1e-10 * max(eigenvalues.max(), 0.0)
+            sqrt_eigenvalues = onp.sqrt(onp.where(keep, eigenvalues, 0.0))
+            self._factors.append(
+                LinearPriorFactor.make(
+                    variables=separator,
+                    linearization_points=[
+                        type(variable).unflatten(self._values[variable])
+                        for variable in separator
+                    ],
+                    A=sqrt_eigenvalues[:, None] * eigenvectors.T,
+                    b=onp.where(
+                        keep,
+                        (eigenvectors.T @ information_vector)
+                        / onp.where(keep, sqrt_eigenvalues, 1.0),
+                        0.0,
+                    ),
+                )
+            )
+
+        self._variables = [v for v in self._variables if v not in marginalized]
+        for variable in variables:
+            self._values.pop(variable)
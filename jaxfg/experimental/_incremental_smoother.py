@@ -0,0 +1,469 @@
+import dataclasses
+import functools
+import itertools
+from collections import defaultdict
+from typing import (
+    DefaultDict,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    cast,
+)
+
+import jax
+import numpy as onp
+import scipy
+import scipy.sparse
+import sksparse
+from jax import numpy as jnp
+
+from .. import core, hints, sparse
+
+
+@dataclasses.dataclass(frozen=True)
+class IncrementalUpdateInfo:
+    """Statistics from a single `IncrementalSmoother.update()` call."""
+
+    relinearized_variable_count: int
+    """Number of variables that were moved to a new linearization point."""
+
+    linearized_factor_count: int
+    """Number of factors that were linearized: new factors, and existing factors
+    connected to relinearized variables."""
+
+    refactored_dim: int
+    """Size of the trailing block of the square-root information matrix that was
+    recomputed."""
+
+
+@dataclasses.dataclass(frozen=True)
+class _FactorLinearization:
+    """Whitened linearization of one factor, around the current linearization point."""
+
+    columns: onp.ndarray
+    """Local storage indices of the factor's variables, concatenated."""
+
+    A: onp.ndarray
+    """Whitened Jacobian, with shape `(residual dim, len(columns))`."""
+
+    b: onp.ndarray
+    """Whitened residual vector."""
+
+
+@dataclasses.dataclass
+class IncrementalSmoother:
+    """Incremental smoother for online problems, where factors and variables are added
+    over time. Loosely follows iSAM2 [1], with the square-root information matrix kept
+    in a fixed (insertion) ordering instead of a Bayes tree.
+
+    Each update:
+    - Relinearizes variables whose local deltas exceed `relinearize_threshold`, and
+      linearizes only new factors and factors connected to relinearized variables.
+    - Recomputes the trailing block of the square-root information matrix, starting
+      from the earliest variable touched by any (re)linearized factor. Earlier rows are
+      unaffected and reused as-is. The trailing block is factorized with CHOLMOD.
+
+    For odometry-style problems, where new factors touch recent variables, the amount
+    of numerical work per update is roughly constant. Loop closures to old variables
+    refactorize everything after the oldest variable they touch.
+
+    Problems must be well-constrained (eg with a prior factor) after each update.
+
+    [1] iSAM2: Incremental Smoothing and Mapping Using the Bayes Tree, Kaess et al 2012.
+    https://www.cs.cmu.edu/~kaess/pub/Kaess12ijrr.pdf
+    """
+
+    relinearize_threshold: float = 0.1
+    """Variables are relinearized when any component of their local delta from the
+    linearization point exceeds this threshold."""
+
+    _variables: List[core.VariableBase] = dataclasses.field(
+        default_factory=list, init=False, repr=False
+    )
+    _order_from_variable: Dict[core.VariableBase, int] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+    _local_index_from_variable: Dict[core.VariableBase, int] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+    _linearization_points: Dict[core.VariableBase, onp.ndarray] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+    _factors: List[core.FactorBase] = dataclasses.field(
+        default_factory=list, init=False, repr=False
+    )
+    _factor_indices_from_variable: Dict[
+        core.VariableBase, List[int]
+    ] = dataclasses.field(default_factory=dict, init=False, repr=False)
+    _linearizations: List[Optional[_FactorLinearization]] = dataclasses.field(
+        default_factory=list, init=False, repr=False
+    )
+    _dim: int = dataclasses.field(default=0, init=False, repr=False)
+
+    _R: scipy.sparse.csc_matrix = dataclasses.field(
+        default_factory=lambda: scipy.sparse.csc_matrix((0, 0)),
+        init=False,
+        repr=False,
+    )
+    """Upper-triangular square-root information matrix."""
+
+    _y: onp.ndarray = dataclasses.field(
+        default_factory=lambda: onp.zeros(0), init=False, repr=False
+    )
+    """Solution of `R^T y = -A^T b`."""
+
+    _delta: onp.ndarray = dataclasses.field(
+        default_factory=lambda: onp.zeros(0), init=False, repr=False
+    )
+    """Solution of `R delta = y`: local deltas from each linearization point."""
+
+    def update(
+        self,
+        new_factors: Sequence[core.FactorBase] = (),
+        new_values: Optional[Dict[core.VariableBase, hints.VariableValue]] = None,
+    ) -> IncrementalUpdateInfo:
+        """Add factors and variables, and update our estimate.
+
+        Args:
+            new_factors: Factors to add. Variables must either have been added in a
+                previous update, or be included in `new_values`.
+            new_values: Initial values for new variables.
+
+        Returns:
+            Statistics about the work done by this update.
+        """
+        old_dim = self._dim
+        old_variable_count = len(self._variables)
+
+        # Add new variables to the end of our ordering.
+        for variable, value in (new_values or {}).items():
+            assert (
+                variable not in self._order_from_variable
+            ), "Variable was already added"
+            self._order_from_variable[variable] = len(self._variables)
+            self._local_index_from_variable[variable] = self._dim
+            self._linearization_points[variable] = onp.asarray(
+                type(variable).flatten(value)
+            )
+            self._factor_indices_from_variable[variable] = []
+            self._variables.append(variable)
+            self._dim += variable.get_local_parameter_dim()
+
+        # Relinearize variables that have moved too far from their linearization points.
+        relinearized_variables: List[core.VariableBase] = []
+        if old_variable_count > 0:
+            max_deltas = onp.maximum.reduceat(
+                onp.abs(self._delta),
+                [
+                    self._local_index_from_variable[variable]
+                    for variable in self._variables[:old_variable_count]
+                ],
+            )
+            relinearized_variables = [
+                self._variables[i]
+                for i in onp.flatnonzero(max_deltas > self.relinearize_threshold)
+            ]
+            self._relinearize(relinearized_variables)
+
+        # Add new factors.
+        linearized_factor_indices: Set[int] = set()
+        for factor in new_factors:
+            for variable in factor.variables:
+                assert (
+                    variable in self._order_from_variable
+                ), "Factor is connected to an unknown variable"
+                self._factor_indices_from_variable[variable].append(len(self._factors))
+            linearized_factor_indices.add(len(self._factors))
+            self._factors.append(factor)
+            self._linearizations.append(None)
+        for variable in relinearized_variables:
+            linearized_factor_indices.update(
+                self._factor_indices_from_variable[variable]
+            )
+
+        if len(linearized_factor_indices) == 0:
+            assert self._dim == old_dim, "New variables must be connected to factors"
+            return IncrementalUpdateInfo(
+                relinearized_variable_count=0,
+                linearized_factor_count=0,
+                refactored_dim=0,
+            )
+        self._linearize(sorted(linearized_factor_indices))
+
+        # Recompute the trailing block of our square-root information matrix, starting
+        # at the first variable touched by any linearized factor.
+        first_order = min(
+            self._order_from_variable[variable]
+            for i in linearized_factor_indices
+            for variable in self._factors[i].variables
+        )
+        k = self._local_index_from_variable[self._variables[first_order]]
+        H22, ATb2 = self._compute_trailing_normal_equations(first_order, k)
+
+        R = self._R.copy()
+        R.resize((self._dim, self._dim))
+        R11 = R[:k, :k]
+        R12 = R[:k, k:]
+        R22 = (
+            sksparse.cholmod.cholesky(
+                (H22 - R12.T @ R12).tocsc(), ordering_method="natural"
+            )
+            .L()
+            .T.tocsc()
+        )
+        self._R = (
+            R22
+            if k == 0
+            else scipy.sparse.bmat([[R11, R12], [None, R22]], format="csc")
+        )
+
+        # Forward substitution only needs to be redone for the trailing block. Back
+        # substitution updates all deltas.
+        y1 = self._y[:k]
+        y2 = sparse.factorize_triangular(R22.T).solve(-ATb2 - R12.T @ y1)
+        self._y = onp.concatenate([y1, y2])
+        self._delta = sparse.factorize_triangular(self._R).solve(self._y)
+
+        return IncrementalUpdateInfo(
+            relinearized_variable_count=len(relinearized_variables),
+            linearized_factor_count=len(linearized_factor_indices),
+            refactored_dim=self._dim - k,
+        )
+
+    def get_assignments(self) -> core.VariableAssignments:
+        """Get the current estimate: each linearization point, retracted by its most
+        recently solved local delta."""
+        storage_layout = core.StorageLayout.make(self._variables, local=False)
+
+        variables_from_type: DefaultDict[
+            Type[core.VariableBase], List[core.VariableBase]
+        ] = defaultdict(list)
+        for variable in self._variables:
+            variables_from_type[type(variable)].append(variable)
+
+        storage = onp.concatenate(
+            [
+                _retract(
+                    variable_type,
+                    onp.stack([self._linearization_points[v] for v in variables]),
+                    onp.stack([self._get_delta(v) for v in variables]),
+                ).flatten()
+                for variable_type, variables in variables_from_type.items()
+            ]
+        )
+        assert storage.shape == (storage_layout.dim,)
+        return core.VariableAssignments(
+            storage=jnp.asarray(storage), storage_layout=storage_layout
+        )
+
+    def get_factors(self) -> List[core.FactorBase]:
+        """Get all factors that have been added so far."""
+        return list(self._factors)
+
+    def _get_delta(self, variable: core.VariableBase) -> onp.ndarray:
+        index = self._local_index_from_variable[variable]
+        return self._delta[index : index + variable.get_local_parameter_dim()]
+
+    def _relinearize(self, variables: Sequence[core.VariableBase]) -> None:
+        """Move linearization points by their current deltas."""
+        variables_from_type: DefaultDict[
+            Type[core.VariableBase], List[core.VariableBase]
+        ] = defaultdict(list)
+        for variable in variables:
+            variables_from_type[type(variable)].append(variable)
+
+        for variable_type, variables_of_type in variables_from_type.items():
+            new_values = _retract(
+                variable_type,
+                onp.stack([self._linearization_points[v] for v in variables_of_type]),
+                onp.stack([self._get_delta(v) for v in variables_of_type]),
+            )
+            for variable, value in zip(variables_of_type, new_values):
+                self._linearization_points[variable] = value
+
+    def _linearize(self, factor_indices: Sequence[int]) -> None:
+        """Linearize a set of factors around the current linearization points."""
+        for i, linearization in zip(
+            factor_indices,
+            _linearize_factors(
+                [self._factors[i] for i in factor_indices],
+                self._linearization_points,
+                self._local_index_from_variable,
+            ),
+        ):
+            self._linearizations[i] = linearization
+
+    def _compute_trailing_normal_equations(
+        self, first_order: int, k: int
+    ) -> Tuple[scipy.sparse.csc_matrix, onp.ndarray]:
+        """Compute the trailing blocks of `A^TA` and `A^Tb`, for all columns starting at
+        local index `k` (which belongs to the variable at position `first_order`)."""
+        linearizations: List[_FactorLinearization] = []
+        for i in sorted(
+            set(
+                itertools.chain.from_iterable(
+                    self._factor_indices_from_variable[variable]
+                    for variable in self._variables[first_order:]
+                )
+            )
+        ):
+            linearization = self._linearizations[i]
+            assert linearization is not None
+            linearizations.append(linearization)
+        return _compute_normal_equations(linearizations, start=k, dim=self._dim - k)
+
+
+def _compute_normal_equations(
+    linearizations: Sequence[_FactorLinearization], start: int, dim: int
+) -> Tuple[scipy.sparse.csc_matrix, onp.ndarray]:
+    """Compute `A^TA` and `A^Tb` from factor linearizations, restricted to local indices
+    in `[start, start + dim)`. Columns before `start` are dropped."""
+    rows: List[onp.ndarray] = [onp.zeros(0, dtype=onp.int64)]
+    cols: List[onp.ndarray] = [onp.zeros(0, dtype=onp.int64)]
+    values: List[onp.ndarray] = [onp.zeros(0)]
+    ATb = onp.zeros(dim)
+
+    for linearization in linearizations:
+        mask = linearization.columns >= start
+        columns = linearization.columns[mask] - start
+        A = linearization.A[:, mask]
+
+        block_rows, block_cols = onp.meshgrid(columns, columns, indexing="ij")
+        rows.append(block_rows.flatten())
+        cols.append(block_cols.flatten())
+        values.append((A.T @ A).flatten())
+        onp.add.at(ATb, columns, A.T @ linearization.b)
+
+    # Duplicate entries are summed.
+    ATA = scipy.sparse.coo_matrix(
+        (onp.concatenate(values), (onp.concatenate(rows), onp.concatenate(cols))),
+        shape=(dim, dim),
+    ).tocsc()
+    return ATA, ATb
+
+
+def _get_padded_count(count: int) -> int:
+    return 1 << (count - 1).bit_length()
+
+
+def _linearize_factors(
+    factors: Sequence[core.FactorBase],
+    linearization_points: Dict[core.VariableBase, onp.ndarray],
+    local_index_from_variable: Dict[core.VariableBase, int],
+) -> List[_FactorLinearization]:
+    """Linearize factors around a set of (flattened) linearization points. Factors are
+    grouped by structure, like in `StackedFactorGraph.make()`; compiled kernels depend
+    only on this structure and padded stack sizes, and not on specific variables."""
+    indices_from_group: DefaultDict[Hashable, List[int]] = defaultdict(list)
+    for i, factor in enumerate(factors):
+        indices_from_group[factor.get_group_key()].append(i)
+
+    linearizations: List[Optional[_FactorLinearization]] = [None] * len(factors)
+    for group in indices_from_group.values():
+        group_factors = [factors[i] for i in group]
+
+        # Pad stacks to a power of two, to bound the number of compiled shapes.
+        padded = group_factors + [group_factors[0]] * (
+            _get_padded_count(len(group_factors)) - len(group_factors)
+        )
+        residuals, jacobians = jax.tree_map(
+            onp.asarray,
+            _linearize_stacked(
+                jax.tree_map(
+                    lambda *leaves: onp.stack(leaves),
+                    *(factor.anonymize_variables() for factor in padded),
+                ),
+                tuple(
+                    onp.stack(
+                        [linearization_points[factor.variables[j]] for factor in padded]
+                    )
+                    for j in range(len(group_factors[0].variables))
+                ),
+            ),
+        )
+
+        for stack_index, (i, factor) in enumerate(zip(group, group_factors)):
+            linearizations[i] = _FactorLinearization(
+                columns=onp.concatenate(
+                    [
+                        onp.arange(
+                            local_index_from_variable[variable],
+                            local_index_from_variable[variable]
+                            + variable.get_local_parameter_dim(),
+                        )
+                        for variable in factor.variables
+                    ]
+                ),
+                A=onp.concatenate(
+                    [jacobian[stack_index] for jacobian in jacobians], axis=1
+                ),
+                b=residuals[stack_index],
+            )
+    return cast(List[_FactorLinearization], linearizations)
+
+
+@jax.jit
+def _linearize_stacked(
+    stacked_factor: core.FactorBase, flat_values: Tuple[jnp.ndarray, ...]
+) -> Tuple[jnp.ndarray, Tuple[jnp.ndarray, ...]]:
+    """Compute whitened residuals and Jacobians for a stack of factors."""
+
+    def linearize(
+        factor: core.FactorBase, flat_values: Tuple[jnp.ndarray, ...]
+    ) -> Tuple[jnp.ndarray, Tuple[jnp.ndarray, ...]]:
+        variable_values = factor.build_variable_value_tuple(
+            tuple(
+                type(variable).unflatten(value)
+                for variable, value in zip(factor.variables, flat_values)
+            )
+        )
+        residual_vector = jnp.asarray(
+            factor.noise_model.whiten_residual_vector(
+                factor.compute_residual_vector(variable_values)
+            )
+        )
+        return residual_vector, tuple(
+            jnp.asarray(
+                factor.noise_model.whiten_jacobian(
+                    jacobian, residual_vector=residual_vector
+                )
+            )
+            for jacobian in factor.compute_residual_jacobians(variable_values)
+        )
+
+    return jax.vmap(linearize)(stacked_factor, flat_values)
+
+
+def _retract(
+    variable_type: Type[core.VariableBase],
+    flat_values: onp.ndarray,
+    local_deltas: onp.ndarray,
+) -> onp.ndarray:
+    """Retract stacked, flattened values. Returns flattened values."""
+    count = flat_values.shape[0]
+    padding = ((0, _get_padded_count(count) - count), (0, 0))
+    return onp.asarray(
+        _retract_stacked(
+            variable_type,
+            onp.pad(flat_values, padding, mode="edge"),
+            onp.pad(local_deltas, padding),
+        )
+    )[:count]
+
+
+@functools.partial(jax.jit, static_argnums=0)
+def _retract_stacked(
+    variable_type: Type[core.VariableBase],
+    flat_values: jnp.ndarray,
+    local_deltas: jnp.ndarray,
+) -> jnp.ndarray:
+    return jax.vmap(
+        lambda value, local_delta: variable_type.flatten(
+            variable_type.manifold_retract(variable_type.unflatten(value), local_delta)
+        )
+    )(flat_values, local_deltas)
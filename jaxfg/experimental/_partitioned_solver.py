@@ -0,0 +1,529 @@
+"""Consensus ADMM domain decomposition. This is a non-performant prototype: results
+are approximate, and solves are much slower than solving the full graph with a
+standard nonlinear solver. Prefer `StackedFactorGraph.solve()` unless each part can
+only access its own factors."""
+
+import collections
+import dataclasses
+import functools
+import multiprocessing
+import multiprocessing.connection
+from typing import Any, DefaultDict, Dict, List, Sequence, Tuple, Type
+
+import jax
+import jax_dataclasses as jdc
+import numpy as onp
+from jax import numpy as jnp
+from overrides import overrides
+
+from .. import core, hints, noises, solvers
+
+
+@jdc.pytree_dataclass
+class _ConsensusFactor(core.FactorBase[Tuple[object]]):
+    """ADMM consensus term for one copy of a shared variable. Residuals are computed as
+    `(value - target) + dual`, where subtraction is done on the manifold."""
+
+    target: hints.VariableValue
+    """Current consensus value of the shared variable."""
+
+    dual: hints.Array
+    """Scaled dual variable for this copy, in the local parameterization."""
+
+    @overrides
+    def compute_residual_vector(self, variable_values: Tuple[object]) -> jnp.ndarray:
+        (value,) = variable_values
+        return jnp.asarray(
+            type(self.variables[0]).manifold_inverse_retract(self.target, value)
+            + self.dual
+        )
+
+
+def partition_variables(
+    factors: Sequence[core.FactorBase], num_parts: int
+) -> Dict[core.VariableBase, int]:
+    """Partition the variables of a factor graph into `num_parts` parts of roughly equal
+    size, for use with `PartitionedSolver`.
+
+    Variables are ordered by a breadth-first traversal of the factor adjacency graph,
+    and then split into contiguous chunks. This keeps neighboring variables together,
+    which tends to produce small separators for graphs with local structure, like pose
+    graphs. For better partitions, a dedicated graph partitioner (eg METIS) can be used
+    to produce the same mapping."""
+
+    # Build variable adjacency.
+    neighbors: Dict[core.VariableBase, Dict[core.VariableBase, None]] = {}
+    for factor in factors:
+        for variable in factor.variables:
+            neighbors.setdefault(variable, {}).update(
+                (other, None) for other in factor.variables if other is not variable
+            )
+
+    # Breadth-first traversal. Disconnected components are visited one at a time.
+    ordered: Dict[core.VariableBase, None] = {}
+    for root in neighbors.keys():
+        if root in ordered:
+            continue
+        ordered[root] = None
+        queue = collections.deque([root])
+        while len(queue) > 0:
+            for neighbor in neighbors[queue.popleft()]:
+                if neighbor not in ordered:
+                    ordered[neighbor] = None
+                    queue.append(neighbor)
+
+    variables = list(ordered.keys())
+    return {
+        variable: i * num_parts // len(variables)
+        for i, variable in enumerate(variables)
+    }
+
+
+class _PartProblem:
+    """Local subproblem for one part of a partitioned graph. Holds local copies of all
+    variables connected to the part's factors, with consensus factors attached to copies
+    of shared variables."""
+
+    def __init__(
+        self,
+        factors: Sequence[core.FactorBase],
+        shared_variables: Sequence[core.VariableBase],
+        initial_values: Dict[core.VariableBase, hints.VariableValue],
+        solver: solvers.NonlinearSolverBase,
+        penalty: float,
+    ):
+        self.solver = solver
+        self.shared_variables = list(shared_variables)
+        self.factors = list(factors) + [
+            _ConsensusFactor(
+                variables=(variable,),
+                noise_model=noises.DiagonalGaussian(
+                    sqrt_precision_diagonal=onp.full(
+                        variable.get_local_parameter_dim(), onp.sqrt(penalty)
+                    )
+                ),
+                target=initial_values[variable],
+                dual=onp.zeros(variable.get_local_parameter_dim()),
+            )
+            for variable in self.shared_variables
+        ]
+        self.variables = list(initial_values.keys())
+        self.graph = core.StackedFactorGraph.make(self.factors)
+        self.assignments = core.VariableAssignments.make_from_dict(initial_values)
+
+        # Consensus factors are stacked by variable type. We find the variable of each
+        # stacked consensus factor from its storage indices.
+        variable_from_index = {
+            index: variable
+            for variable, index in self.graph.storage_layout.index_from_variable.items()
+        }
+        self.consensus_stack_variables: Dict[int, List[core.VariableBase]] = {
+            stack_index: [
+                variable_from_index[int(index)]
+                for index in stacked_factor.value_indices[0][:, 0]
+            ]
+            for stack_index, stacked_factor in enumerate(self.graph.factor_stacks)
+            if isinstance(stacked_factor.factor, _ConsensusFactor)
+        }
+
+    def solve(
+        self,
+        targets: Sequence[hints.VariableValue],
+        duals: Sequence[hints.Array],
+        penalty: float,
+    ) -> List[hints.VariableValue]:
+        """Update consensus terms and solve. Inputs and outputs are ordered like
+        `shared_variables`."""
+        target_from_variable = dict(zip(self.shared_variables, targets))
+        dual_from_variable = dict(zip(self.shared_variables, duals))
+
+        factor_stacks = list(self.graph.factor_stacks)
+        for stack_index, variables in self.consensus_stack_variables.items():
+            stacked_factor = factor_stacks[stack_index]
+            factor_stacks[stack_index] = jdc.replace(
+                stacked_factor,
+                factor=jdc.replace(
+                    stacked_factor.factor,
+                    target=_stack([target_from_variable[v] for v in variables]),
+                    dual=onp.stack([dual_from_variable[v] for v in variables]),
+                    noise_model=noises.DiagonalGaussian(
+                        sqrt_precision_diagonal=onp.full(
+                            stacked_factor.factor.noise_model.sqrt_precision_diagonal.shape,
+                            onp.sqrt(penalty),
+                        )
+                    ),
+                ),
+            )
+        self.graph = jdc.replace(self.graph, factor_stacks=factor_stacks)
+        self.assignments = self.solver.solve(self.graph, self.assignments)
+        return [
+            self.assignments.get_value(variable) for variable in self.shared_variables
+        ]
+
+    def get_values(self) -> List[hints.VariableValue]:
+        """Get current values of all local variables, ordered like the initial values
+        passed to the constructor."""
+        return [self.assignments.get_value(variable) for variable in self.variables]
+
+
+def _part_worker(connection: multiprocessing.connection.Connection) -> None:
+    """Entry point for worker processes. Each worker holds one part.
+
+    Variables can't be compared across processes, so messages are ordered lists."""
+    part_problem = _PartProblem(*connection.recv())
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        connection.send(part_problem.solve(*message))
+    connection.send(part_problem.get_values())
+
+
+@dataclasses.dataclass
+class PartitionedSolver:
+    """Domain-decomposition solver, based on consensus ADMM [1].
+
+    Factors are divided into parts by their first variable. Each part is solved
+    independently with a standard nonlinear solver, with local copies of variables that
+    are shared with other parts. Between solves, copies of shared variables are averaged
+    on the manifold, and consensus terms pull the copies toward the average. Parts can
+    be solved in parallel, with one worker process each.
+
+    This is a non-performant prototype. ADMM converges slowly to high-accuracy solutions, and there
+    is no acceleration (over-relaxation, Nesterov-type momentum, etc.), so results are
+    approximate at practical iteration counts; in our pose graph benchmarks it is also
+    an order of magnitude slower than solving the full graph on a single host. It's
+    mainly useful when each part can only access its own factors.
+
+    We terminate when both the primal residual (deviation of copies from consensus) and
+    the dual residual (change in consensus values) fall below `tolerance`, and adapt
+    the penalty parameter to balance the two residuals ([1], Section 3.4.1).
+
+    [1] Distributed Optimization and Statistical Learning via the Alternating Direction
+    Method of Multipliers, Boyd et al 2011.
+    https://stanford.edu/~boyd/papers/pdf/admm_distr_stats.pdf
+    """
+
+    solver: solvers.NonlinearSolverBase = dataclasses.field(
+        default_factory=lambda: solvers.LevenbergMarquardtSolver(verbose=False)
+    )
+    """Solver for local subproblems."""
+
+    penalty: float = 1.0
+    """Initial ADMM penalty parameter, which weights consensus terms. Larger values
+    enforce agreement faster, but can slow convergence of each part toward the
+    optimum."""
+
+    adaptive_penalty: bool = True
+    """Set to `True` to adapt the penalty parameter via residual balancing: the penalty
+    is scaled up by `penalty_scale` when the primal residual is more than
+    `residual_balance` times the dual residual, and scaled down in the opposite case."""
+
+    residual_balance: float = 10.0
+    """Residual ratio that triggers a penalty update."""
+
+    penalty_scale: float = 2.0
+    """Factor that the penalty is scaled by in each update."""
+
+    max_iterations: int = 50
+    """Maximum number of ADMM iterations."""
+
+    tolerance: float = 1e-4
+    """We terminate when the RMS primal and dual residuals both fall below this
+    threshold."""
+
+    use_processes: bool = True
+    """Set to `True` to solve each part in its own process. Factors, variables, and
+    values must then be picklable. Otherwise, parts are solved sequentially."""
+
+    verbose: bool = True
+    """Set to `True` to print ADMM progress."""
+
+    def solve(
+        self,
+        factors: Sequence[core.FactorBase],
+        initial_assignments: core.VariableAssignments,
+        partition: Dict[core.VariableBase, int],
+    ) -> core.VariableAssignments:
+        """Run MAP inference on the factor graph defined by `factors`.
+
+        `partition` maps each variable to a part index; see `partition_variables()`."""
+
+        # Assign factors to parts.
+        num_parts = max(partition.values()) + 1
+        part_factors: List[List[core.FactorBase]] = [[] for _ in range(num_parts)]
+        for factor in factors:
+            part_factors[partition[factor.variables[0]]].append(factor)
+
+        # Find copies of each variable.
+        parts_from_variable: DefaultDict[
+            core.VariableBase, Dict[int, None]
+        ] = collections.defaultdict(dict)
+        for part, factors_in_part in enumerate(part_factors):
+            for factor in factors_in_part:
+                for variable in factor.variables:
+                    parts_from_variable[variable][part] = None
+        shared_variables = [
+            variable
+            for variable, parts in parts_from_variable.items()
+            if len(parts) > 1
+        ]
+        part_shared_variables: List[List[core.VariableBase]] = [
+            [] for _ in range(num_parts)
+        ]
+        for variable in shared_variables:
+            for part in parts_from_variable[variable]:
+                part_shared_variables[part].append(variable)
+
+        # Set up parts.
+        initial_values = initial_assignments.as_dict()
+        parts = [part for part in range(num_parts) if len(part_factors[part]) > 0]
+        part_variables = {
+            part: [
+                variable
+                for variable, parts_with_copies in parts_from_variable.items()
+                if part in parts_with_copies
+            ]
+            for part in parts
+        }
+        setup_args = [
+            (
+                part_factors[part],
+                part_shared_variables[part],
+                {
+                    variable: initial_values[variable]
+                    for variable in part_variables[part]
+                },
+                self.solver,
+                self.penalty,
+            )
+            for part in parts
+        ]
+        connections: List[multiprocessing.connection.Connection] = []
+        processes: List[Any] = []
+        part_problems: List[_PartProblem] = []
+        if self.use_processes:
+            context = multiprocessing.get_context("spawn")
+            for args in setup_args:
+                connection, worker_connection = context.Pipe()
+                process = context.Process(
+                    target=_part_worker, args=(worker_connection,), daemon=True
+                )
+                process.start()
+                connection.send(args)
+                connections.append(connection)
+                processes.append(process)
+        else:
+            part_problems = [_PartProblem(*args) for args in setup_args]
+
+        def solve_parts(
+            messages: List[Tuple[List[hints.VariableValue], List[onp.ndarray], float]]
+        ) -> List[List[hints.VariableValue]]:
+            if self.use_processes:
+                for connection, message in zip(connections, messages):
+                    connection.send(message)
+                return [connection.recv() for connection in connections]
+            else:
+                return [
+                    part_problem.solve(*message)
+                    for part_problem, message in zip(part_problems, messages)
+                ]
+
+        # ADMM iterations.
+        consensus = _ConsensusState.make(
+            shared_variables,
+            {
+                variable: list(parts_from_variable[variable])
+                for variable in shared_variables
+            },
+            initial_values,
+            self.penalty,
+        )
+        try:
+            for iteration in range(self.max_iterations):
+                local_values = solve_parts(
+                    [
+                        consensus.get_part_inputs(part, part_shared_variables[part])
+                        for part in parts
+                    ]
+                )
+                primal_residual, dual_residual = consensus.update(
+                    {
+                        part: dict(zip(part_shared_variables[part], values))
+                        for part, values in zip(parts, local_values)
+                    }
+                )
+                if self.verbose:
+                    print(
+                        f"[{type(self).__name__}] Iteration #{iteration}:"
+                        f" primal residual={primal_residual},"
+                        f" dual residual={dual_residual}, penalty={consensus.penalty}"
+                    )
+                if primal_residual < self.tolerance and dual_residual < self.tolerance:
+                    break
+
+                if not self.adaptive_penalty:
+                    continue
+                if primal_residual > self.residual_balance * dual_residual:
+                    consensus.scale_penalty(self.penalty_scale)
+                elif dual_residual > self.residual_balance * primal_residual:
+                    consensus.scale_penalty(1.0 / self.penalty_scale)
+
+            # Collect local solutions.
+            part_solutions: List[List[hints.VariableValue]]
+            if self.use_processes:
+                for connection in connections:
+                    connection.send(None)
+                part_solutions = [connection.recv() for connection in connections]
+            else:
+                part_solutions = [
+                    part_problem.get_values() for part_problem in part_problems
+                ]
+        finally:
+            # Closing connections also stops workers that are waiting for messages.
+            for connection in connections:
+                connection.close()
+            for process in processes:
+                process.join(timeout=10.0)
+                if process.is_alive():
+                    process.terminate()
+
+        # Unshared variables are read from their part; shared ones from consensus.
+        solution = dict(initial_values)
+        for part, values in zip(parts, part_solutions):
+            solution.update(zip(part_variables[part], values))
+        solution.update(consensus.values)
+        return core.VariableAssignments.make_from_dict(solution)
+
+
+@dataclasses.dataclass
+class _ConsensusState:
+    """Consensus values and scaled dual variables for shared variables."""
+
+    values: Dict[core.VariableBase, hints.VariableValue]
+    duals: Dict[Tuple[int, core.VariableBase], onp.ndarray]
+    parts_from_variable: Dict[core.VariableBase, List[int]]
+    penalty: float
+
+    @staticmethod
+    def make(
+        shared_variables: Sequence[core.VariableBase],
+        parts_from_variable: Dict[core.VariableBase, List[int]],
+        initial_values: Dict[core.VariableBase, hints.VariableValue],
+        penalty: float,
+    ) -> "_ConsensusState":
+        return _ConsensusState(
+            values={
+                variable: initial_values[variable] for variable in shared_variables
+            },
+            duals={
+                (part, variable): onp.zeros(variable.get_local_parameter_dim())
+                for variable in shared_variables
+                for part in parts_from_variable[variable]
+            },
+            parts_from_variable=parts_from_variable,
+            penalty=penalty,
+        )
+
+    def get_part_inputs(
+        self, part: int, shared_variables: Sequence[core.VariableBase]
+    ) -> Tuple[List[hints.VariableValue], List[onp.ndarray], float]:
+        """Get consensus values, duals, and the penalty parameter for a part's shared
+        variables."""
+        return (
+            [self.values[variable] for variable in shared_variables],
+            [self.duals[(part, variable)] for variable in shared_variables],
+            self.penalty,
+        )
+
+    def scale_penalty(self, scale: float) -> None:
+        """Scale the penalty parameter. Duals are stored scaled by the inverse of the
+        penalty, so we rescale them to leave the unscaled duals unchanged."""
+        self.penalty *= scale
+        for copy in self.duals.keys():
+            self.duals[copy] = self.duals[copy] / scale
+
+    def update(
+        self, local_values: Dict[int, Dict[core.VariableBase, hints.VariableValue]]
+    ) -> Tuple[float, float]:
+        """Update consensus values and duals from local solutions. Returns RMS primal
+        and dual residuals: the deviation of local copies from the updated consensus
+        values, and the penalty-weighted change in consensus values for each copy."""
+
+        # Group copies by variable type, so updates can be vectorized.
+        copies_from_type: DefaultDict[
+            Type[core.VariableBase], List[Tuple[int, core.VariableBase]]
+        ] = collections.defaultdict(list)
+        for variable, parts in self.parts_from_variable.items():
+            for part in parts:
+                copies_from_type[type(variable)].append((part, variable))
+
+        squared_deviation = 0.0
+        squared_change = 0.0
+        num_copies = 0
+        for variable_type, copies in copies_from_type.items():
+            variables = list(dict.fromkeys(variable for _, variable in copies))
+            variable_indices = {variable: i for i, variable in enumerate(variables)}
+            copy_indices = onp.array(
+                [variable_indices[variable] for _, variable in copies]
+            )
+
+            values = _stack([self.values[variable] for variable in variables])
+            copy_values = _stack(
+                [local_values[part][variable] for part, variable in copies]
+            )
+            duals = onp.stack([self.duals[copy] for copy in copies])
+
+            new_values, new_duals, deviations, changes = _consensus_update(
+                variable_type, values, copy_values, duals, copy_indices, len(variables)
+            )
+            for i, variable in enumerate(variables):
+                self.values[variable] = jax.tree_map(lambda x: x[i], new_values)
+            for copy, dual in zip(copies, onp.asarray(new_duals)):
+                self.duals[copy] = dual
+            squared_deviation += float(jnp.sum(deviations**2))
+            squared_change += float(jnp.sum(changes**2))
+            num_copies += len(copies)
+
+        return (
+            (squared_deviation / max(num_copies, 1)) ** 0.5,
+            self.penalty * (squared_change / max(num_copies, 1)) ** 0.5,
+        )
+
+
+def _stack(values: Sequence[hints.VariableValue]) -> hints.VariableValue:
+    return jax.tree_map(lambda *leaves: jnp.stack(leaves), *values)
+
+
+@functools.partial(jax.jit, static_argnums=(0, 5))
+def _consensus_update(
+    variable_type: Type[core.VariableBase],
+    values: hints.VariableValue,
+    copy_values: hints.VariableValue,
+    duals: jnp.ndarray,
+    copy_indices: jnp.ndarray,
+    num_variables: int,
+) -> Tuple[hints.VariableValue, jnp.ndarray, jnp.ndarray, jnp.ndarray]:
+    # Consensus values: average of copies plus duals, in the tangent space of the
+    # current consensus values.
+    deltas = (
+        jax.vmap(variable_type.manifold_inverse_retract)(
+            jax.tree_map(lambda x: x[copy_indices], values), copy_values
+        )
+        + duals
+    )
+    mean_deltas = (
+        jax.ops.segment_sum(deltas, copy_indices, num_segments=num_variables)
+        / jax.ops.segment_sum(
+            jnp.ones(copy_indices.shape), copy_indices, num_segments=num_variables
+        )[:, None]
+    )
+    new_values = jax.vmap(variable_type.manifold_retract)(values, mean_deltas)
+
+    # Dual update.
+    deviations = jnp.asarray(
+        jax.vmap(variable_type.manifold_inverse_retract)(
+            jax.tree_map(lambda x: x[copy_indices], new_values), copy_values
+        )
+    )
+    return new_values, duals + deviations, deviations, mean_deltas[copy_indices]
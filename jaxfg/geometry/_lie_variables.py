@@ -44,6 +44,12 @@ class LieVariableBase(Generic[T], VariableBase[T]):
     def manifold_retract(cls, x: T, local_delta: hints.LocalVariableValue) -> T:
         return jaxlie.manifold.rplus(x, local_delta)
 
+    @classmethod
+    @final
+    @overrides
+    def manifold_inverse_retract(cls, x: T, y: T) -> jnp.ndarray:
+        return jaxlie.manifold.rminus(x, y)
+
     # (3) Optional: analytical Jacobian for manifold retraction. If not defined, this
     # will be handled via autodiff.
 
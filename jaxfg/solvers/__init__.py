@@ -1,14 +1,21 @@
 from ._dogleg_solver import DoglegSolver
 from ._fixed_iteration_gauss_newton_solver import FixedIterationGaussNewtonSolver
 from ._gauss_newton_solver import GaussNewtonSolver
+from ._lbfgs_solver import LbfgsSolver
 from ._levenberg_marquardt_solver import LevenbergMarquardtSolver
-from ._nonlinear_solver_base import NonlinearSolverBase, NonlinearSolverState
+from ._nonlinear_solver_base import (
+    NonlinearSolverBase,
+    NonlinearSolverState,
+    SolverTrace,
+)
 
 __all__ = [
     "DoglegSolver",
     "FixedIterationGaussNewtonSolver",
     "GaussNewtonSolver",
+    "LbfgsSolver",
     "LevenbergMarquardtSolver",
     "NonlinearSolverBase",
     "NonlinearSolverState",
+    "SolverTrace",
 ]
@@ -1,5 +1,6 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional, Tuple, Union, cast
 
+import jax
 import jax_dataclasses as jdc
 from jax import numpy as jnp
 from overrides import overrides
@@ -7,7 +8,11 @@ from overrides import overrides
 from .. import hints, sparse
 from ..core._variable_assignments import VariableAssignments
 from ._mixins import _TerminationCriteriaMixin, _TrustRegionMixin
-from ._nonlinear_solver_base import NonlinearSolverBase, NonlinearSolverState
+from ._nonlinear_solver_base import (
+    NonlinearSolverBase,
+    NonlinearSolverState,
+    SolverTrace,
+)
 
 if TYPE_CHECKING:
     from ..core._stacked_factor_graph import StackedFactorGraph
@@ -19,6 +24,20 @@ class _DoglegState(NonlinearSolverState):
 
     radius: hints.Scalar
 
+    A: Optional[sparse.SparseCooMatrix]
+    """Whitened residual Jacobian at the current assignments. Reused until a step is
+    accepted. `None` for matrix-free solves."""
+
+    ATb: hints.Array
+    """Negative gradient at the current assignments, which is also the steepest
+    descent direction."""
+
+    step_vector_gn: hints.Array
+    """Gauss-Newton step from the current assignments."""
+
+    step_vector_cauchy: hints.Array
+    """Cauchy point: the minimizer of the linearized cost along `ATb`."""
+
 
 @jdc.pytree_dataclass
 class DoglegSolver(
@@ -38,13 +57,34 @@ class DoglegSolver(
     ) -> _DoglegState:
         # Initialize
         cost, residual_vector = graph.compute_cost(initial_assignments)
+        (
+            A,
+            ATb,
+            step_vector_gn,
+            step_vector_cauchy,
+            linear_solver_state,
+        ) = self._compute_steps(
+            graph,
+            initial_assignments,
+            residual_vector,
+            iteration=0,
+            linear_solver_state=self.linear_solver.initialize_state(
+                graph.local_storage_layout.dim
+            ),
+        )
         return _DoglegState(
             iterations=0,
             assignments=initial_assignments,
             cost=cost,
             residual_vector=residual_vector,
             done=False,
+            linear_solver_state=linear_solver_state,
             radius=self.radius_initial,
+            trace=SolverTrace.make(self.trace_length),
+            A=A,
+            ATb=ATb,
+            step_vector_gn=step_vector_gn,
+            step_vector_cauchy=step_vector_cauchy,
         )
 
     @overrides
@@ -53,8 +93,6 @@ class DoglegSolver(
         graph: "StackedFactorGraph",
         state_prev: _DoglegState,
     ) -> _DoglegState:
-        # There's currently some redundancy here: we only need to re-linearize and
-        # compute new GN/SD update steps when updates are actually accepted
         self._hcb_print(
             lambda i, max_i, cost, radius: f"Iteration #{i}/{max_i}: cost={str(cost).ljust(15)} radius={str(radius)}",
             i=state_prev.iterations,
@@ -63,63 +101,55 @@ class DoglegSolver(
             radius=state_prev.radius,
         )
 
-        # Linearize graph
-        A: sparse.SparseCooMatrix = graph.compute_whitened_residual_jacobian(
-            assignments=state_prev.assignments,
-            residual_vector=state_prev.residual_vector,
-        )
-        ATb = A.T @ -state_prev.residual_vector
-
-        def compute_dogleg_step() -> jnp.ndarray:
-            # Gauss-Newton step
-            step_vector_gn: jnp.ndarray = self.linear_solver.solve_subproblem(
-                A=A,
-                ATb=ATb,
-                lambd=0.0,
-                iteration=state_prev.iterations,
+        # Gauss-Newton and steepest descent steps are cached in the state. Only the trust
+        # region radius changes after rejected steps.
+        A: Union[sparse.SparseCooMatrix, sparse.LinearOperator]
+        if self.matrix_free:
+            # Linear operators can't be stored in the state, but are needed for
+            # computing step quality.
+            A, _unused_ATb, _unused_ATA = self._linearize(
+                graph, state_prev.assignments, state_prev.residual_vector
             )
+        else:
+            assert state_prev.A is not None
+            A = state_prev.A
+        ATb = state_prev.ATb
+        step_vector_gn = state_prev.step_vector_gn
+        a = state_prev.step_vector_cauchy
 
-            # Steepest descent step
-            step_vector_sd: jnp.ndarray = ATb
-
-            # Blending parameters
-            # Reference:
-            # > METHODS FOR NON-LINEAR LEAST SQUARES PROBLEM, Madsen et al 2004.
-            # > pg. 30~32
-            alpha = jnp.sum(step_vector_sd**2) / jnp.sum((A @ step_vector_sd) ** 2)
-            a = alpha * step_vector_sd
-            b = step_vector_gn
-
-            c = jnp.sum(a * (b - a))
-            a_norm_sq = jnp.sum(a**2)
-            b_minus_a_norm_sq = jnp.sum((b - a) ** 2)
-            radius_sq = state_prev.radius**2
-            radius_sq_minus_a_norm_sq = radius_sq - a_norm_sq
-            sqrt_c_sq_plus = jnp.sqrt(
-                c**2 + b_minus_a_norm_sq * radius_sq_minus_a_norm_sq
-            )
-            beta = jnp.where(
-                c <= 0,
-                (-c + sqrt_c_sq_plus) / b_minus_a_norm_sq,
-                radius_sq_minus_a_norm_sq / (c + sqrt_c_sq_plus),
-            )
-
-            # Compute update step
-            norm_gn = jnp.linalg.norm(step_vector_gn)
-            norm_sd = jnp.linalg.norm(a)
-            return jnp.where(
-                # Use GN if it's within trust region
-                norm_gn <= state_prev.radius,
-                step_vector_gn,
-                jnp.where(
-                    # Use normed SD if neither are within trust region
-                    norm_sd >= state_prev.radius,
-                    state_prev.radius / norm_sd * a,
-                    a + beta * (step_vector_gn - a),
-                ),
-            )
+        # Blending parameters
+        # Reference:
+        # > METHODS FOR NON-LINEAR LEAST SQUARES PROBLEM, Madsen et al 2004.
+        # > pg. 30~32
+        b = step_vector_gn
+        c = jnp.sum(a * (b - a))
+        a_norm_sq = jnp.sum(a**2)
+        b_minus_a_norm_sq = jnp.sum((b - a) ** 2)
+        radius_sq = state_prev.radius**2
+        radius_sq_minus_a_norm_sq = radius_sq - a_norm_sq
+        sqrt_c_sq_plus = jnp.sqrt(
+            c**2 + b_minus_a_norm_sq * radius_sq_minus_a_norm_sq
+        )
+        beta = jnp.where(
+            c <= 0,
+            (-c + sqrt_c_sq_plus) / b_minus_a_norm_sq,
+            radius_sq_minus_a_norm_sq / (c + sqrt_c_sq_plus),
+        )
 
-        step_vector = compute_dogleg_step()
+        # Compute update step
+        norm_gn = jnp.linalg.norm(step_vector_gn)
+        norm_sd = jnp.linalg.norm(a)
+        step_vector = jnp.where(
+            # Use GN if it's within trust region
+            norm_gn <= state_prev.radius,
+            step_vector_gn,
+            jnp.where(
+                # Use normed SD if neither are within trust region
+                norm_sd >= state_prev.radius,
+                state_prev.radius / norm_sd * a,
+                a + beta * (step_vector_gn - a),
+            ),
+        )
 
         local_delta_assignments = VariableAssignments(
             storage=step_vector,
@@ -128,7 +158,8 @@ class DoglegSolver(
 
         # On-manifold retraction + solution check
         assignments_proposed = state_prev.assignments.manifold_retract(
-            local_delta_assignments=local_delta_assignments
+            local_delta_assignments=local_delta_assignments,
+            fixed_mask=graph.fixed_mask,
         )
         proposed_cost, residual_vector = graph.compute_cost(assignments_proposed)
         step_quality = self.compute_step_quality(
@@ -161,6 +192,9 @@ class DoglegSolver(
                 state_prev.assignments.storage,
             ),
         )
+        residual_vector = jnp.where(
+            accept_flag, residual_vector, state_prev.residual_vector
+        )
 
         # Check for convergence
         done = jnp.logical_or(
@@ -176,13 +210,97 @@ class DoglegSolver(
             ),
         )
 
+        # Re-linearize and compute new steps, but only if the step was accepted
+        (
+            A_next,
+            ATb_next,
+            step_vector_gn_next,
+            step_vector_cauchy_next,
+            linear_solver_state,
+        ) = jax.lax.cond(
+            accept_flag,
+            lambda: self._compute_steps(
+                graph,
+                assignments,
+                residual_vector,
+                iteration=state_prev.iterations + 1,
+                linear_solver_state=state_prev.linear_solver_state,
+            ),
+            lambda: (
+                state_prev.A,
+                state_prev.ATb,
+                state_prev.step_vector_gn,
+                state_prev.step_vector_cauchy,
+                state_prev.linear_solver_state,
+            ),
+        )
+
+        # Use old cost if update is rejected
+        cost = jnp.where(accept_flag, proposed_cost, state_prev.cost)
         return _DoglegState(
             iterations=state_prev.iterations + 1,
             assignments=assignments,
             radius=radius,
-            cost=jnp.where(
-                accept_flag, proposed_cost, state_prev.cost
-            ),  # Use old cost if update is rejected
+            cost=cost,
             residual_vector=residual_vector,
             done=done,
+            linear_solver_state=linear_solver_state,
+            trace=state_prev.trace.record(
+                state_prev.iterations,
+                cost=cost,
+                step_norm=jnp.linalg.norm(step_vector),
+                accepted=accept_flag,
+                # Charge the linear solve that produced the cached Gauss-Newton step,
+                # which this iteration's step is built from.
+                linear_solver_iterations=state_prev.linear_solver_state.iterations,
+                radius=state_prev.radius,
+            ),
+            A=A_next,
+            ATb=ATb_next,
+            step_vector_gn=step_vector_gn_next,
+            step_vector_cauchy=step_vector_cauchy_next,
+        )
+
+    def _compute_steps(
+        self,
+        graph: "StackedFactorGraph",
+        assignments: VariableAssignments,
+        residual_vector: hints.Array,
+        iteration: hints.Scalar,
+        linear_solver_state: sparse.LinearSolverState,
+    ) -> Tuple[
+        Optional[sparse.SparseCooMatrix],
+        jnp.ndarray,
+        jnp.ndarray,
+        jnp.ndarray,
+        sparse.LinearSolverState,
+    ]:
+        """Linearize and compute the Gauss-Newton step and Cauchy point. Returns values
+        to cache in the solver state."""
+        A, ATb, ATA = self._linearize(graph, assignments, residual_vector)
+
+        # Gauss-Newton step
+        (
+            step_vector_gn,
+            linear_solver_state,
+        ) = self.linear_solver.solve_subproblem_stateful(
+            A=A,
+            ATb=ATb,
+            lambd=0.0,
+            iteration=iteration,
+            state=linear_solver_state,
+            ATA=ATA,
+        )
+
+        # Steepest descent step, scaled to the Cauchy point
+        step_vector_sd: jnp.ndarray = ATb
+        alpha = jnp.sum(step_vector_sd**2) / jnp.sum((A @ step_vector_sd) ** 2)
+
+        return (
+            # Linear operators can't be stored in the state.
+            None if self.matrix_free else cast(sparse.SparseCooMatrix, A),
+            ATb,
+            step_vector_gn,
+            alpha * step_vector_sd,
+            linear_solver_state,
         )
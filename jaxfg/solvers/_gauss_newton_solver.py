@@ -4,10 +4,13 @@ import jax_dataclasses as jdc
 from jax import numpy as jnp
 from overrides import overrides
 
-from .. import sparse
 from ..core._variable_assignments import VariableAssignments
 from ._mixins import _TerminationCriteriaMixin
-from ._nonlinear_solver_base import NonlinearSolverBase, NonlinearSolverState
+from ._nonlinear_solver_base import (
+    NonlinearSolverBase,
+    NonlinearSolverState,
+    SolverTrace,
+)
 
 if TYPE_CHECKING:
     from ..core._stacked_factor_graph import StackedFactorGraph
@@ -32,6 +35,10 @@ class GaussNewtonSolver(
             cost=cost,
             residual_vector=residual_vector,
             done=False,
+            linear_solver_state=self.linear_solver.initialize_state(
+                graph.local_storage_layout.dim
+            ),
+            trace=SolverTrace.make(self.trace_length),
         )
 
     @overrides
@@ -50,26 +57,28 @@ class GaussNewtonSolver(
         )
 
         # Linearize graph
-        A: sparse.SparseCooMatrix = graph.compute_whitened_residual_jacobian(
-            assignments=state_prev.assignments,
-            residual_vector=state_prev.residual_vector,
+        A, ATb, ATA = self._linearize(
+            graph, state_prev.assignments, state_prev.residual_vector
         )
-        ATb = -(A.T @ state_prev.residual_vector)
 
         # Solve linear subproblem
+        step_vector, linear_solver_state = self.linear_solver.solve_subproblem_stateful(
+            A=A,
+            ATb=ATb,
+            lambd=0.0,
+            iteration=state_prev.iterations,
+            state=state_prev.linear_solver_state,
+            ATA=ATA,
+        )
         local_delta_assignments = VariableAssignments(
-            storage=self.linear_solver.solve_subproblem(
-                A=A,
-                ATb=ATb,
-                lambd=0.0,
-                iteration=state_prev.iterations,
-            ),
+            storage=step_vector,
             storage_layout=graph.local_storage_layout,
         )
 
         # On-manifold retraction
         assignments = state_prev.assignments.manifold_retract(
             local_delta_assignments=local_delta_assignments,
+            fixed_mask=graph.fixed_mask,
         )
 
         # Check for convergence
@@ -90,4 +99,12 @@ class GaussNewtonSolver(
             cost=cost,
             residual_vector=residual_vector,
             done=done,
+            linear_solver_state=linear_solver_state,
+            trace=state_prev.trace.record(
+                state_prev.iterations,
+                cost=cost,
+                step_norm=jnp.linalg.norm(step_vector),
+                accepted=True,
+                linear_solver_iterations=linear_solver_state.iterations,
+            ),
         )
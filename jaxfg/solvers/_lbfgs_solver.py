@@ -0,0 +1,316 @@
+from typing import TYPE_CHECKING, Tuple
+
+import jax
+import jax_dataclasses as jdc
+from jax import numpy as jnp
+from overrides import overrides
+
+from .. import hints
+from ..core._variable_assignments import VariableAssignments
+from ._mixins import _TerminationCriteriaMixin
+from ._nonlinear_solver_base import (
+    NonlinearSolverBase,
+    NonlinearSolverState,
+    SolverTrace,
+)
+
+if TYPE_CHECKING:
+    from ..core._stacked_factor_graph import StackedFactorGraph
+
+
+@jdc.pytree_dataclass
+class _LbfgsState(NonlinearSolverState):
+    """State passed between L-BFGS iterations."""
+
+    s_history: hints.Array
+    """Recent steps in the local parameterization, with shape `(history_length, dim)`.
+    Ordered from oldest to newest; unused rows are zero."""
+
+    y_history: hints.Array
+    """Gradient differences corresponding to each step in `s_history`."""
+
+    rho_history: hints.Array
+    """Reciprocals of `s^Ty` for each history entry. Zero for unused rows, which makes
+    them no-ops in the two-loop recursion."""
+
+    history_count: hints.Array
+    """Number of valid history entries."""
+
+    previous_step: hints.Array
+    """Step taken by the previous iteration. Zero if it was rejected."""
+
+    previous_gradient: hints.Array
+    """Gradient at the previous iteration's assignments."""
+
+
+@jdc.pytree_dataclass
+class LbfgsSolver(
+    NonlinearSolverBase[_LbfgsState],
+    _TerminationCriteriaMixin,
+):
+    """Limited-memory BFGS, for problems where even iterative linear solves are too
+    expensive.
+
+    Only residuals and gradients are evaluated: gradients come from a vector-Jacobian
+    product, so the Jacobian is never materialized, and the configured linear solver is
+    not used. Steps are chosen by a backtracking line search along the manifold.
+    Memory use is `O(history_length * dim)`. Convergence is typically much slower than
+    second-order solvers in terms of iterations, but each iteration is cheap."""
+
+    history_length: int = jdc.static_field(default=10)
+    """Number of step and gradient difference pairs used to approximate the inverse
+    Hessian."""
+
+    armijo_constant: hints.Scalar = 1e-4
+    """Sufficient decrease constant for the line search."""
+
+    line_search_decrease_factor: hints.Scalar = 0.5
+    """Factor to shrink step sizes by for each line search trial."""
+
+    max_line_search_steps: int = 20
+    """Maximum number of cost evaluations per line search."""
+
+    @overrides
+    def _initialize_state(
+        self,
+        graph: "StackedFactorGraph",
+        initial_assignments: VariableAssignments,
+    ) -> _LbfgsState:
+        # Initialize
+        cost, residual_vector = graph.compute_cost(initial_assignments)
+        dim = graph.local_storage_layout.dim
+        return _LbfgsState(
+            iterations=0,
+            assignments=initial_assignments,
+            cost=cost,
+            residual_vector=residual_vector,
+            done=False,
+            linear_solver_state=self.linear_solver.initialize_state(dim),
+            trace=SolverTrace.make(self.trace_length),
+            s_history=jnp.zeros((self.history_length, dim)),
+            y_history=jnp.zeros((self.history_length, dim)),
+            rho_history=jnp.zeros(self.history_length),
+            history_count=jnp.zeros((), dtype=jnp.int32),
+            previous_step=jnp.zeros(dim),
+            previous_gradient=jnp.zeros(dim),
+        )
+
+    @overrides
+    def _step(
+        self,
+        graph: "StackedFactorGraph",
+        state_prev: _LbfgsState,
+    ) -> _LbfgsState:
+        """Compute gradient, update curvature history, and line search on manifold."""
+
+        self._hcb_print(
+            lambda i, max_i, cost: f"Iteration #{i}/{max_i}: cost={str(cost)}",
+            i=state_prev.iterations,
+            max_i=self.max_iterations,
+            cost=state_prev.cost,
+        )
+
+        # Gradient of (cost / 2), via a vector-Jacobian product.
+        def compute_residual_vector(local_delta: jnp.ndarray) -> jnp.ndarray:
+            return graph.compute_whitened_residual_vector(
+                state_prev.assignments.manifold_retract(
+                    VariableAssignments(
+                        storage=local_delta,
+                        storage_layout=graph.local_storage_layout,
+                    ),
+                    fixed_mask=graph.fixed_mask,
+                )
+            )
+
+        zero_delta = jnp.zeros(graph.local_storage_layout.dim)
+        _unused_residual_vector, residual_vjp = jax.vjp(
+            compute_residual_vector, zero_delta
+        )
+        (gradient,) = residual_vjp(state_prev.residual_vector)
+
+        # Add the previous step to our history. Pairs that violate the curvature
+        # condition, including rejected (zero) steps, are skipped.
+        s = state_prev.previous_step
+        y = gradient - state_prev.previous_gradient
+        s_dot_y = jnp.dot(s, y)
+        update_history = s_dot_y > 1e-10 * jnp.dot(y, y)
+        s_history, y_history, rho_history, history_count = jax.lax.cond(
+            update_history,
+            lambda: (
+                jnp.roll(state_prev.s_history, -1, axis=0).at[-1].set(s),
+                jnp.roll(state_prev.y_history, -1, axis=0).at[-1].set(y),
+                jnp.roll(state_prev.rho_history, -1).at[-1].set(1.0 / s_dot_y),
+                jnp.minimum(state_prev.history_count + 1, self.history_length),
+            ),
+            lambda: (
+                state_prev.s_history,
+                state_prev.y_history,
+                state_prev.rho_history,
+                state_prev.history_count,
+            ),
+        )
+
+        # Initial inverse Hessian scaling. Without history, we scale by the exact step
+        # size along the gradient for the linearized problem.
+        gamma = jax.lax.cond(
+            history_count > 0,
+            lambda: jnp.dot(s_history[-1], y_history[-1])
+            / jnp.dot(y_history[-1], y_history[-1]),
+            lambda: jnp.dot(gradient, gradient)
+            / jnp.maximum(
+                jnp.sum(
+                    jax.jvp(compute_residual_vector, (zero_delta,), (gradient,))[1] ** 2
+                ),
+                1e-30,
+            ),
+        )
+        step_direction = _two_loop_recursion(
+            s_history, y_history, rho_history, gradient, gamma
+        )
+
+        # Fall back to steepest descent if we don't have a descent direction.
+        is_descent_direction = jnp.dot(gradient, step_direction) < 0.0
+        step_direction = jnp.where(
+            is_descent_direction, step_direction, -gamma * gradient
+        )
+
+        # Backtracking line search. Cost is twice the objective our gradient is for.
+        cost_slope = 2.0 * jnp.dot(gradient, step_direction)
+
+        def evaluate(step_size: hints.Scalar) -> Tuple[jnp.ndarray, jnp.ndarray]:
+            return graph.compute_cost(
+                state_prev.assignments.manifold_retract(
+                    VariableAssignments(
+                        storage=step_size * step_direction,
+                        storage_layout=graph.local_storage_layout,
+                    ),
+                    fixed_mask=graph.fixed_mask,
+                )
+            )
+
+        def sufficient_decrease(
+            step_size: hints.Scalar, cost: hints.Scalar
+        ) -> jnp.ndarray:
+            return jnp.less_equal(
+                cost, state_prev.cost + self.armijo_constant * step_size * cost_slope
+            )
+
+        def line_search_body(
+            carry: Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray, jnp.ndarray]
+        ) -> Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray, jnp.ndarray]:
+            step_size, trials, _unused_cost, _unused_residual_vector = carry
+            step_size = step_size * self.line_search_decrease_factor
+            return (step_size, trials + 1, *evaluate(step_size))
+
+        step_size, _unused_trials, proposed_cost, residual_vector = jax.lax.while_loop(
+            cond_fun=lambda carry: jnp.logical_and(
+                carry[1] < self.max_line_search_steps,
+                jnp.logical_not(sufficient_decrease(carry[0], carry[2])),
+            ),
+            body_fun=line_search_body,
+            init_val=(jnp.array(1.0), jnp.array(1), *evaluate(jnp.array(1.0))),
+        )
+        accept_flag = sufficient_decrease(step_size, proposed_cost)
+
+        step_vector = jnp.where(accept_flag, step_size * step_direction, 0.0)
+        local_delta_assignments = VariableAssignments(
+            storage=step_vector,
+            storage_layout=graph.local_storage_layout,
+        )
+
+        # Get output assignments
+        assignments = state_prev.assignments.manifold_retract(
+            local_delta_assignments=local_delta_assignments,
+            fixed_mask=graph.fixed_mask,
+        )
+        residual_vector = jnp.where(
+            accept_flag, residual_vector, state_prev.residual_vector
+        )
+
+        # If even a steepest descent step fails, we're done. Otherwise, failed steps
+        # clear the history.
+        done = jnp.logical_or(
+            self.check_exceeded_max_iterations(state_prev=state_prev),
+            jnp.where(
+                accept_flag,
+                self.check_convergence(
+                    state_prev=state_prev,
+                    cost_updated=proposed_cost,
+                    local_delta_assignments=local_delta_assignments,
+                    negative_gradient=-gradient,
+                ),
+                history_count == 0,
+            ),
+        )
+
+        # Use old cost if update is rejected
+        cost = jnp.where(accept_flag, proposed_cost, state_prev.cost)
+        return _LbfgsState(
+            iterations=state_prev.iterations + 1,
+            assignments=assignments,
+            cost=cost,
+            residual_vector=residual_vector,
+            done=done,
+            linear_solver_state=state_prev.linear_solver_state,
+            trace=state_prev.trace.record(
+                jnp.asarray(state_prev.iterations),
+                cost=cost,
+                step_norm=jnp.linalg.norm(step_size * step_direction),
+                accepted=accept_flag,
+                linear_solver_iterations=jnp.array(0),
+            ),
+            s_history=jnp.where(accept_flag, s_history, 0.0),
+            y_history=jnp.where(accept_flag, y_history, 0.0),
+            rho_history=jnp.where(accept_flag, rho_history, 0.0),
+            history_count=jnp.where(accept_flag, history_count, 0),
+            previous_step=step_vector,
+            previous_gradient=gradient,
+        )
+
+
+def _two_loop_recursion(
+    s_history: hints.Array,
+    y_history: hints.Array,
+    rho_history: hints.Array,
+    gradient: hints.Array,
+    gamma: hints.Scalar,
+) -> jnp.ndarray:
+    """Compute the L-BFGS step direction `-H @ gradient`, where `H` is the inverse Hessian
+    approximation defined by a step history and an initial scaling `gamma * I`.
+
+    Reference:
+    > Numerical Optimization, Nocedal & Wright 2006.
+    > pg. 178, Algorithm 7.4
+    """
+
+    def first_loop(
+        q: jnp.ndarray, s_y_rho: Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray]
+    ) -> Tuple[jnp.ndarray, jnp.ndarray]:
+        s, y, rho = s_y_rho
+        alpha = rho * jnp.dot(s, q)
+        return q - alpha * y, alpha
+
+    def second_loop(
+        r: jnp.ndarray,
+        s_y_rho_alpha: Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray, jnp.ndarray],
+    ) -> Tuple[jnp.ndarray, None]:
+        s, y, rho, alpha = s_y_rho_alpha
+        beta = rho * jnp.dot(y, r)
+        return r + s * (alpha - beta), None
+
+    s_history = jnp.asarray(s_history)
+    y_history = jnp.asarray(y_history)
+    rho_history = jnp.asarray(rho_history)
+
+    # Newest to oldest, then oldest to newest.
+    q, alphas = jax.lax.scan(
+        first_loop,
+        jnp.asarray(gradient),
+        (s_history, y_history, rho_history),
+        reverse=True,
+    )
+    r: jnp.ndarray
+    r, _ = jax.lax.scan(
+        second_loop, jnp.asarray(gamma * q), (s_history, y_history, rho_history, alphas)
+    )
+    return -r
@@ -1,5 +1,6 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional, Tuple, Union
 
+import jax
 import jax_dataclasses as jdc
 from jax import numpy as jnp
 from overrides import overrides
@@ -7,7 +8,11 @@ from overrides import overrides
 from .. import hints, sparse
 from ..core._variable_assignments import VariableAssignments
 from ._mixins import _TerminationCriteriaMixin, _TrustRegionMixin
-from ._nonlinear_solver_base import NonlinearSolverBase, NonlinearSolverState
+from ._nonlinear_solver_base import (
+    NonlinearSolverBase,
+    NonlinearSolverState,
+    SolverTrace,
+)
 
 if TYPE_CHECKING:
     from ..core._stacked_factor_graph import StackedFactorGraph
@@ -19,6 +24,16 @@ class _LevenbergMarquardtState(NonlinearSolverState):
 
     lambd: hints.Scalar
 
+    A: Optional[sparse.SparseCooMatrix]
+    """Whitened residual Jacobian at the current assignments. Reused until a step is
+    accepted. `None` for matrix-free solves, which re-linearize on every step."""
+
+    ATb: jnp.ndarray
+    """Negative gradient at the current assignments."""
+
+    ATA: Optional[sparse.SparseCooMatrix]
+    """Normal matrix at the current assignments, if the graph has a Hessian pattern."""
+
 
 @jdc.pytree_dataclass
 class LevenbergMarquardtSolver(
@@ -41,13 +56,23 @@ class LevenbergMarquardtSolver(
     ) -> _LevenbergMarquardtState:
         # Initialize
         cost, residual_vector = graph.compute_cost(initial_assignments)
+        A, ATb, ATA = self._linearize_cached(
+            graph, initial_assignments, residual_vector
+        )
         return _LevenbergMarquardtState(
             iterations=0,
             assignments=initial_assignments,
             cost=cost,
             residual_vector=residual_vector,
             done=False,
+            linear_solver_state=self.linear_solver.initialize_state(
+                graph.local_storage_layout.dim
+            ),
+            trace=SolverTrace.make(self.trace_length),
             lambd=self.lambda_initial,
+            A=A,
+            ATb=ATb,
+            ATA=ATA,
         )
 
     @overrides
@@ -56,9 +81,6 @@ class LevenbergMarquardtSolver(
         graph: "StackedFactorGraph",
         state_prev: _LevenbergMarquardtState,
     ) -> _LevenbergMarquardtState:
-        # There's currently some redundancy here: we only need to re-linearize when
-        # updates are accepted
-
         self._hcb_print(
             lambda i, max_i, cost, lambd: f"Iteration #{i}/{max_i}: cost={str(cost).ljust(15)} lambda={str(lambd)}",
             i=state_prev.iterations,
@@ -67,19 +89,25 @@ class LevenbergMarquardtSolver(
             lambd=state_prev.lambd,
         )
 
-        # Linearize graph
-        A: sparse.SparseCooMatrix = graph.compute_whitened_residual_jacobian(
-            assignments=state_prev.assignments,
-            residual_vector=state_prev.residual_vector,
-        )
-        ATb = A.T @ -state_prev.residual_vector
+        # Linearize graph. Linearizations are cached in the state, since rejected steps
+        # leave assignments unchanged.
+        A: Union[sparse.SparseCooMatrix, sparse.LinearOperator]
+        if self.matrix_free:
+            A, ATb, ATA = self._linearize(
+                graph, state_prev.assignments, state_prev.residual_vector
+            )
+        else:
+            assert state_prev.A is not None
+            A, ATb, ATA = state_prev.A, state_prev.ATb, state_prev.ATA
 
         # Solve linear subproblem
-        step_vector: jnp.ndarray = self.linear_solver.solve_subproblem(
+        step_vector, linear_solver_state = self.linear_solver.solve_subproblem_stateful(
             A=A,
             ATb=ATb,
             lambd=state_prev.lambd,
             iteration=state_prev.iterations,
+            state=state_prev.linear_solver_state,
+            ATA=ATA,
         )
         local_delta_assignments = VariableAssignments(
             storage=step_vector,
@@ -88,7 +116,8 @@ class LevenbergMarquardtSolver(
 
         # On-manifold retraction + solution check
         assignments_proposed = state_prev.assignments.manifold_retract(
-            local_delta_assignments=local_delta_assignments
+            local_delta_assignments=local_delta_assignments,
+            fixed_mask=graph.fixed_mask,
         )
         proposed_cost, residual_vector = graph.compute_cost(assignments_proposed)
         accept_flag = (
@@ -125,6 +154,16 @@ class LevenbergMarquardtSolver(
                 state_prev.assignments.storage,
             ),
         )
+        residual_vector = jnp.where(
+            accept_flag, residual_vector, state_prev.residual_vector
+        )
+
+        # Re-linearize, but only if the step was accepted
+        A_next, ATb_next, ATA_next = jax.lax.cond(
+            accept_flag,
+            lambda: self._linearize_cached(graph, assignments, residual_vector),
+            lambda: (state_prev.A, state_prev.ATb, state_prev.ATA),
+        )
 
         # Check for convergence
         done = jnp.logical_or(
@@ -140,13 +179,44 @@ class LevenbergMarquardtSolver(
             ),
         )
 
+        # Use old cost if update is rejected
+        cost = jnp.where(accept_flag, proposed_cost, state_prev.cost)
         return _LevenbergMarquardtState(
             iterations=state_prev.iterations + 1,
             assignments=assignments,
             lambd=lambd,
-            cost=jnp.where(
-                accept_flag, proposed_cost, state_prev.cost
-            ),  # Use old cost if update is rejected
+            cost=cost,
             residual_vector=residual_vector,
             done=done,
+            linear_solver_state=linear_solver_state,
+            trace=state_prev.trace.record(
+                state_prev.iterations,
+                cost=cost,
+                step_norm=jnp.linalg.norm(step_vector),
+                accepted=accept_flag,
+                linear_solver_iterations=linear_solver_state.iterations,
+                lambd=state_prev.lambd,
+            ),
+            A=A_next,
+            ATb=ATb_next,
+            ATA=ATA_next,
         )
+
+    def _linearize_cached(
+        self,
+        graph: "StackedFactorGraph",
+        assignments: VariableAssignments,
+        residual_vector: hints.Array,
+    ) -> Tuple[
+        Optional[sparse.SparseCooMatrix],
+        jnp.ndarray,
+        Optional[sparse.SparseCooMatrix],
+    ]:
+        """Compute the linearization that we cache in the solver state."""
+        if self.matrix_free:
+            # Linear operators can't be stored in the state.
+            return None, jnp.zeros(graph.local_storage_layout.dim), None
+
+        A, ATb, ATA = self._linearize(graph, assignments, residual_vector)
+        assert isinstance(A, sparse.SparseCooMatrix)
+        return A, ATb, ATA
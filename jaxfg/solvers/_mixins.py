@@ -1,3 +1,5 @@
+from typing import Union
+
 import jax
 import jax_dataclasses as jdc
 from jax import numpy as jnp
@@ -15,7 +17,7 @@ class _TrustRegionMixin:
 
     def compute_step_quality(
         self,
-        A: sparse.SparseCooMatrix,
+        A: Union[sparse.SparseCooMatrix, sparse.LinearOperator],
         proposed_cost: hints.Scalar,
         state_prev: NonlinearSolverState,
         step_vector: jnp.ndarray,
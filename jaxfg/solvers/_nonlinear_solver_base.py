@@ -1,9 +1,20 @@
 import abc
 import functools
-from typing import TYPE_CHECKING, Callable, Generic, TypeVar, Union
+import time
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import jax
 import jax_dataclasses as jdc
+import numpy as onp
 from jax import numpy as jnp
 from jax.experimental import host_callback as hcb
 from overrides import EnforceOverrides
@@ -13,11 +24,76 @@ from ..core._variable_assignments import VariableAssignments
 
 if TYPE_CHECKING:
     from ..core._stacked_factor_graph import StackedFactorGraph
+    from ..core._storage_layout import StorageLayout
 
 Int = Union[hints.Array, int]
 Boolean = Union[hints.Array, bool]
 
 
+@jdc.pytree_dataclass
+class SolverTrace:
+    """Per-iteration solver telemetry, recorded into preallocated arrays. Each field has
+    shape `(trace_length,)`; entry `i` describes iteration `i`, and entries past the
+    final iteration count are left as zeros."""
+
+    cost: jnp.ndarray
+    """Cost after each iteration. Rejected steps leave the cost unchanged."""
+
+    lambd: jnp.ndarray
+    """Damping parameter used for each iteration. Zero for undamped solvers."""
+
+    radius: jnp.ndarray
+    """Trust region radius used for each iteration. Zero for solvers without a trust
+    region."""
+
+    step_norm: jnp.ndarray
+    """Norm of each proposed step."""
+
+    accepted: jnp.ndarray
+    """Whether each proposed step was accepted."""
+
+    linear_solver_iterations: jnp.ndarray
+    """Iterations used by the linear solver in each iteration. Always zero for direct
+    solvers."""
+
+    @staticmethod
+    def make(trace_length: int) -> "SolverTrace":
+        return SolverTrace(
+            cost=jnp.zeros(trace_length),
+            lambd=jnp.zeros(trace_length),
+            radius=jnp.zeros(trace_length),
+            step_norm=jnp.zeros(trace_length),
+            accepted=jnp.zeros(trace_length, dtype=bool),
+            linear_solver_iterations=jnp.zeros(trace_length, dtype=jnp.int32),
+        )
+
+    def record(
+        self,
+        iteration: Int,
+        cost: hints.Scalar,
+        step_norm: hints.Scalar,
+        accepted: Boolean,
+        linear_solver_iterations: Int,
+        lambd: hints.Scalar = 0.0,
+        radius: hints.Scalar = 0.0,
+    ) -> "SolverTrace":
+        """Record values for an iteration. No-op if `iteration` is out of bounds."""
+        if self.cost.shape[-1] == 0:
+            # Tracing is disabled.
+            return self
+
+        return SolverTrace(
+            cost=self.cost.at[iteration].set(cost, mode="drop"),
+            lambd=self.lambd.at[iteration].set(lambd, mode="drop"),
+            radius=self.radius.at[iteration].set(radius, mode="drop"),
+            step_norm=self.step_norm.at[iteration].set(step_norm, mode="drop"),
+            accepted=self.accepted.at[iteration].set(accepted, mode="drop"),
+            linear_solver_iterations=self.linear_solver_iterations.at[iteration].set(
+                linear_solver_iterations, mode="drop"
+            ),
+        )
+
+
 @jdc.pytree_dataclass
 class NonlinearSolverState:
     """Standard state passed between nonlinear solve iterations."""
@@ -27,11 +103,15 @@ class NonlinearSolverState:
     cost: hints.Scalar
     residual_vector: hints.Array
     done: Boolean
+    linear_solver_state: sparse.LinearSolverState
+    trace: SolverTrace
 
 
 NonlinearSolverStateType = TypeVar(
     "NonlinearSolverStateType", bound=NonlinearSolverState
 )
+PytreeType = TypeVar("PytreeType")
+OutputType = TypeVar("OutputType")
 
 
 @jdc.pytree_dataclass
@@ -49,6 +129,21 @@ class _NonlinearSolverBase:
     )
     """Solver to use for linear subproblems."""
 
+    trace_length: int = jdc.static_field(default=0)
+    """Number of iterations to record in `state.trace`. Recording happens on-device, so
+    combined with `verbose=False` this gives convergence telemetry without any host
+    callbacks. Typically set to the maximum iteration count."""
+
+    matrix_free: bool = jdc.static_field(default=False)
+    """Set to `True` to skip materializing the Jacobian. Linear subproblems are then
+    defined by Jacobian-vector products, and require an iterative linear solver."""
+
+    implicit_differentiation: bool = jdc.static_field(default=False)
+    """Set to `True` to differentiate `solve()` via the implicit function theorem, rather
+    than through solver iterations. Reverse-mode gradients then cost one extra linear
+    solve at the solution, and memory use is independent of the iteration count. Note
+    that this disables forward-mode differentiation of `solve()`."""
+
 
 class NonlinearSolverBase(
     _NonlinearSolverBase, Generic[NonlinearSolverStateType], abc.ABC, EnforceOverrides
@@ -80,6 +175,337 @@ class NonlinearSolverBase(
         initial_assignments: VariableAssignments,
     ) -> VariableAssignments:
         """Run MAP inference on a factor graph."""
+        if self.implicit_differentiation:
+            solution = _solve_implicit(self, graph, initial_assignments)
+        else:
+            solution = self._solve_and_print(graph, initial_assignments).assignments
+
+        # Return, but with the storage layout reverted.
+        return solution.update_storage_layout(initial_assignments.storage_layout)
+
+    @jax.jit
+    def solve_with_trace(
+        self,
+        graph: "StackedFactorGraph",
+        initial_assignments: VariableAssignments,
+    ) -> Tuple[VariableAssignments, SolverTrace]:
+        """Run MAP inference on a factor graph. Also returns a trace of the first
+        `trace_length` iterations."""
+        state = self._solve(graph, initial_assignments)
+        return (
+            state.assignments.update_storage_layout(initial_assignments.storage_layout),
+            state.trace,
+        )
+
+    @jax.jit
+    def init(
+        self,
+        graph: "StackedFactorGraph",
+        initial_assignments: VariableAssignments,
+    ) -> NonlinearSolverStateType:
+        """Initialize a solver state, for stepping via `step_n()`.
+
+        Together, `init()` and `step_n()` run the same optimization as `solve()`, but
+        from the host. This makes it possible to pause, inspect, or checkpoint solves,
+        and to interleave them with other work. States are pytrees, and store
+        assignments in the graph's storage layout; solutions can be read with
+        `state.assignments.update_storage_layout(initial_assignments.storage_layout)`."""
+        return self._initialize_state(
+            graph, initial_assignments.update_storage_layout(graph.storage_layout)
+        )
+
+    @functools.partial(jax.jit, static_argnums=3)
+    def step_n(
+        self,
+        graph: "StackedFactorGraph",
+        state: NonlinearSolverStateType,
+        n: int,
+    ) -> NonlinearSolverStateType:
+        """Run up to `n` optimization steps from a state, stopping early if the solver
+        terminates. Check `state.done` to see if more steps are needed.
+
+        `n` is static: we compile once for each value used."""
+        return self._optimize_n(graph, state, n)
+
+    def solve_with_time_budget(
+        self,
+        graph: "StackedFactorGraph",
+        initial_assignments: VariableAssignments,
+        time_budget: float,
+        steps_per_check: int = 1,
+    ) -> VariableAssignments:
+        """Run MAP inference with a wall-clock deadline. Returns the lowest-cost
+        assignments found before either termination or `time_budget` seconds have
+        elapsed, whichever comes first.
+
+        Steps run in jitted chunks of `steps_per_check` iterations, and the clock is
+        checked on the host between chunks. Larger chunks have less overhead, but the
+        deadline can be overrun by up to one chunk. Compilation counts against the
+        budget, so for real-time use the solver should first be warmed up on a graph
+        with the same structure. Not compatible with `jax.jit`."""
+        start_time = time.perf_counter()
+
+        state = self.init(graph, initial_assignments)
+        best_assignments = state.assignments
+        best_cost = state.cost
+        while not bool(state.done) and time.perf_counter() - start_time < time_budget:
+            state, best_assignments, best_cost = self._step_n_keep_best(
+                graph, state, best_assignments, best_cost, steps_per_check
+            )
+
+        self._hcb_print(
+            lambda i, cost: f"Stopped @ iteration #{i}: best cost={str(cost).ljust(15)}",
+            i=state.iterations,
+            cost=best_cost,
+        )
+
+        # Return, but with the storage layout reverted.
+        return best_assignments.update_storage_layout(
+            initial_assignments.storage_layout
+        )
+
+    def solve_batch(
+        self,
+        graph_batch: "StackedFactorGraph",
+        initial_assignments_batch: VariableAssignments,
+        compaction_interval: Optional[int] = 5,
+    ) -> NonlinearSolverStateType:
+        """Run MAP inference on a batch of factor graphs, which should share the same
+        structure. Every array in `graph_batch` and `initial_assignments_batch` should
+        have a leading batch axis; for example, graphs can be stacked with
+        `jax.tree_map(lambda *leaves: jnp.stack(leaves), *graphs)`.
+
+        Returns final solver states, which also have a leading batch axis. Solutions can
+        be read from `state.assignments`, and per-problem iteration counts from
+        `state.iterations`.
+
+        By default, the loop is driven from the host, and terminated problems are dropped
+        from the batch every `compaction_interval` iterations. Finished problems stop
+        doing work, but this is not compatible with `jax.jit`; to bound recompilation,
+        sub-batch sizes are rounded up to powers of two. If `compaction_interval` is
+        `None`, the batch is instead optimized in a single vmapped loop, where problems
+        that terminate early are masked and occupy a batch lane until every problem is
+        done. This can be traced, but is slow when iteration counts vary.
+
+        Batching trades per-solve overhead for wider operations, which pays off on
+        accelerators. On CPU, calling `solve()` in a Python loop is usually faster: for
+        the pose graphs in `scripts/benchmark_solve_batch.py`, a loop was ~4x faster than
+        compacted batches and ~10x faster than masked ones."""
+
+        state_batch: NonlinearSolverStateType
+        if compaction_interval is None:
+            state_batch = self._solve_batch(graph_batch, initial_assignments_batch)
+        else:
+            state_batch = self._initialize_state_batch(
+                graph_batch, initial_assignments_batch
+            )
+            state_batch = _optimize_with_compaction(
+                lambda state_batch, indices: self._optimize_batch_subset_n(
+                    graph_batch, state_batch, indices, compaction_interval
+                ),
+                state_batch,
+            )
+
+        self._hcb_print(
+            lambda i, cost: f"Terminated @ iterations {i}: costs={cost}",
+            i=state_batch.iterations,
+            cost=state_batch.cost,
+        )
+
+        # Return, but with the storage layout reverted.
+        return jdc.replace(
+            state_batch,
+            assignments=jax.vmap(
+                lambda assignments: assignments.update_storage_layout(
+                    initial_assignments_batch.storage_layout
+                )
+            )(state_batch.assignments),
+        )
+
+    def solve_multistart(
+        self,
+        graph: "StackedFactorGraph",
+        initial_assignments_batch: VariableAssignments,
+        compaction_interval: Optional[int] = 5,
+    ) -> Tuple[VariableAssignments, jnp.ndarray]:
+        """Run MAP inference on a single factor graph from a batch of initializations,
+        and keep the best result. Useful for escaping poor local minima.
+
+        `initial_assignments_batch.storage` should have shape `(K, storage dim)`. Starts
+        are optimized together, with terminated starts dropped every
+        `compaction_interval` iterations as in `solve_batch()`. If `compaction_interval`
+        is `None`, all starts instead run in one vmapped loop until the slowest start
+        terminates; this is compatible with `jax.jit`, but each new value of `K`
+        triggers a retrace and recompile.
+
+        Like `solve_batch()`, this is meant for accelerators. On CPU, solving each start
+        in a Python loop is usually faster.
+
+        Returns the lowest-cost solution, and the final cost of each start with shape
+        `(K,)`. Starts that diverge to non-finite costs are never selected, unless all
+        of them do."""
+        state_batch: NonlinearSolverStateType
+        if compaction_interval is None:
+            state_batch = self._solve_multistart(graph, initial_assignments_batch)
+        else:
+            state_batch = self._initialize_state_multistart(
+                graph, initial_assignments_batch
+            )
+            state_batch = _optimize_with_compaction(
+                lambda state_batch, indices: self._optimize_multistart_subset_n(
+                    graph, state_batch, indices, compaction_interval
+                ),
+                state_batch,
+            )
+
+        self._hcb_print(
+            lambda i, cost: f"Terminated @ iterations {i}: costs={cost}",
+            i=state_batch.iterations,
+            cost=state_batch.cost,
+        )
+        return _select_best_start(state_batch, initial_assignments_batch.storage_layout)
+
+    @jax.jit
+    def _solve_batch(
+        self,
+        graph_batch: "StackedFactorGraph",
+        initial_assignments_batch: VariableAssignments,
+    ) -> NonlinearSolverStateType:
+        return _vmap_graph_batch(self._solve, graph_batch, initial_assignments_batch)
+
+    @jax.jit
+    def _initialize_state_batch(
+        self,
+        graph_batch: "StackedFactorGraph",
+        initial_assignments_batch: VariableAssignments,
+    ) -> NonlinearSolverStateType:
+        return _vmap_graph_batch(
+            lambda graph, assignments: self._initialize_state(
+                graph, assignments.update_storage_layout(graph.storage_layout)
+            ),
+            graph_batch,
+            initial_assignments_batch,
+        )
+
+    @functools.partial(jax.jit, static_argnums=4)
+    def _optimize_batch_subset_n(
+        self,
+        graph_batch: "StackedFactorGraph",
+        state_batch: NonlinearSolverStateType,
+        indices: hints.Array,
+        n: int,
+    ) -> NonlinearSolverStateType:
+        """Run up to `n` steps for the problems at `indices` in a batch, and write the
+        results back. Gathers and scatters are fused into the same jitted call, so each
+        compaction round costs a single dispatch."""
+        sub_state_batch = _vmap_graph_batch(
+            lambda graph, state: self._optimize_n(graph, state, n),
+            jax.tree_map(lambda x: x[indices], graph_batch),
+            jax.tree_map(lambda x: x[indices], state_batch),
+        )
+        return jax.tree_map(
+            lambda x, sub_x: x.at[indices].set(sub_x), state_batch, sub_state_batch
+        )
+
+    @jax.jit
+    def _solve_multistart(
+        self,
+        graph: "StackedFactorGraph",
+        initial_assignments_batch: VariableAssignments,
+    ) -> NonlinearSolverStateType:
+        return jax.vmap(lambda assignments: self._solve(graph, assignments))(
+            initial_assignments_batch
+        )
+
+    @jax.jit
+    def _initialize_state_multistart(
+        self,
+        graph: "StackedFactorGraph",
+        initial_assignments_batch: VariableAssignments,
+    ) -> NonlinearSolverStateType:
+        return jax.vmap(
+            lambda assignments: self._initialize_state(
+                graph, assignments.update_storage_layout(graph.storage_layout)
+            )
+        )(initial_assignments_batch)
+
+    @functools.partial(jax.jit, static_argnums=4)
+    def _optimize_multistart_subset_n(
+        self,
+        graph: "StackedFactorGraph",
+        state_batch: NonlinearSolverStateType,
+        indices: hints.Array,
+        n: int,
+    ) -> NonlinearSolverStateType:
+        """Run up to `n` steps for the starts at `indices`, and write the results
+        back."""
+        sub_state_batch = jax.vmap(lambda state: self._optimize_n(graph, state, n))(
+            jax.tree_map(lambda x: x[indices], state_batch)
+        )
+        return jax.tree_map(
+            lambda x, sub_x: x.at[indices].set(sub_x), state_batch, sub_state_batch
+        )
+
+    @functools.partial(jax.jit, static_argnums=5)
+    def _step_n_keep_best(
+        self,
+        graph: "StackedFactorGraph",
+        state: NonlinearSolverStateType,
+        best_assignments: VariableAssignments,
+        best_cost: hints.Scalar,
+        n: int,
+    ) -> Tuple[NonlinearSolverStateType, VariableAssignments, hints.Scalar]:
+        """Run up to `n` steps, while tracking the lowest-cost assignments seen. Solvers
+        that can accept cost increases, like Gauss-Newton, won't necessarily end at the
+        best iterate."""
+
+        def body_fun(
+            carry: Tuple[
+                NonlinearSolverStateType, VariableAssignments, hints.Scalar, jnp.ndarray
+            ]
+        ) -> Tuple[
+            NonlinearSolverStateType, VariableAssignments, hints.Scalar, jnp.ndarray
+        ]:
+            state, best_assignments, best_cost, steps = carry
+            state = self._step(graph, state)
+            improved = state.cost < best_cost
+            best_assignments = jdc.replace(
+                best_assignments,
+                storage=jnp.where(
+                    improved, state.assignments.storage, best_assignments.storage
+                ),
+            )
+            best_cost = jnp.where(improved, state.cost, best_cost)
+            return state, best_assignments, best_cost, steps + 1
+
+        state, best_assignments, best_cost, _unused_steps = jax.lax.while_loop(
+            cond_fun=lambda carry: jnp.logical_and(
+                jnp.logical_not(carry[0].done), carry[3] < n
+            ),
+            body_fun=body_fun,
+            init_val=(state, best_assignments, best_cost, jnp.array(0)),
+        )
+        return state, best_assignments, best_cost
+
+    def _solve_and_print(
+        self,
+        graph: "StackedFactorGraph",
+        initial_assignments: VariableAssignments,
+    ) -> NonlinearSolverStateType:
+        state = self._solve(graph, initial_assignments)
+        self._hcb_print(
+            lambda i, cost: f"Terminated @ iteration #{i}: cost={str(cost).ljust(15)}",
+            i=state.iterations,
+            cost=state.cost,
+        )
+        return state
+
+    def _solve(
+        self,
+        graph: "StackedFactorGraph",
+        initial_assignments: VariableAssignments,
+    ) -> NonlinearSolverStateType:
+        """Initialize and optimize. Returns the final solver state."""
 
         # Initialize. Note that the storage layout of the initial assignments may not
         # match what the graph expects.
@@ -87,22 +513,66 @@ class NonlinearSolverBase(
         state = self._initialize_state(graph, assignments)
 
         # Optimization.
-        state = jax.lax.while_loop(
+        return self._optimize(graph, state)
+
+    def _optimize(
+        self,
+        graph: "StackedFactorGraph",
+        state: NonlinearSolverStateType,
+    ) -> NonlinearSolverStateType:
+        """Run nonlinear optimization steps until termination."""
+        return jax.lax.while_loop(
             cond_fun=lambda state: jnp.logical_not(state.done),
             body_fun=functools.partial(self._step, graph),
             init_val=state,
         )
 
-        self._hcb_print(
-            lambda i, cost: f"Terminated @ iteration #{i}: cost={str(cost).ljust(15)}",
-            i=state.iterations,
-            cost=state.cost,
+    def _optimize_n(
+        self,
+        graph: "StackedFactorGraph",
+        state: NonlinearSolverStateType,
+        n: int,
+    ) -> NonlinearSolverStateType:
+        """Run up to `n` nonlinear optimization steps, stopping early on termination."""
+        state, _unused_steps = jax.lax.while_loop(
+            cond_fun=lambda carry: jnp.logical_and(
+                jnp.logical_not(carry[0].done), carry[1] < n
+            ),
+            body_fun=lambda carry: (self._step(graph, carry[0]), carry[1] + 1),
+            init_val=(state, 0),
         )
+        return state
 
-        # Return, but with the storage layout reverted.
-        return state.assignments.update_storage_layout(
-            initial_assignments.storage_layout
-        )
+    def _linearize(
+        self,
+        graph: "StackedFactorGraph",
+        assignments: VariableAssignments,
+        residual_vector: hints.Array,
+    ) -> Tuple[
+        Union[sparse.SparseCooMatrix, sparse.LinearOperator],
+        jnp.ndarray,
+        Optional[sparse.SparseCooMatrix],
+    ]:
+        """Linearize a graph around a set of assignments. Returns the whitened
+        residual Jacobian, the negative gradient `-A^T b`, and the normal matrix `A^TA`
+        if the graph has a precomputed Hessian pattern."""
+        A: Union[sparse.SparseCooMatrix, sparse.LinearOperator]
+        ATA: Optional[sparse.SparseCooMatrix] = None
+        if self.matrix_free:
+            A = graph.compute_whitened_residual_jacobian_operator(
+                assignments=assignments,
+                residual_vector=residual_vector,
+            )
+        else:
+            A_sparse = graph.compute_whitened_residual_jacobian(
+                assignments=assignments,
+                residual_vector=residual_vector,
+            )
+            if graph.hessian_coords is not None:
+                ATA = graph.compute_normal_matrix(A_sparse)
+            A = A_sparse
+        ATb = -(A.T @ residual_vector)
+        return A, ATb, ATA
 
     def _hcb_print(
         self,
@@ -123,3 +593,171 @@ class NonlinearSolverBase(
             ),
             (args, kwargs),
         )
+
+
+def _optimize_with_compaction(
+    optimize_subset: Callable[
+        [NonlinearSolverStateType, onp.ndarray], NonlinearSolverStateType
+    ],
+    state_batch: NonlinearSolverStateType,
+) -> NonlinearSolverStateType:
+    """Host-side loop for batched solves, which repeatedly optimizes only the problems
+    that haven't terminated. To bound recompilation, sub-batch sizes are rounded up to
+    powers of two by repeating active indices."""
+    batch_size = state_batch.assignments.storage.shape[0]
+    while True:
+        active_indices = onp.flatnonzero(~onp.asarray(state_batch.done))
+        if active_indices.shape[0] == 0:
+            return state_batch
+
+        sub_batch_size = min(
+            1 << (active_indices.shape[0] - 1).bit_length(), batch_size
+        )
+        state_batch = optimize_subset(
+            state_batch, onp.resize(active_indices, sub_batch_size)
+        )
+
+
+@functools.partial(jax.jit, static_argnums=1)
+def _select_best_start(
+    state_batch: NonlinearSolverStateType,
+    storage_layout: "StorageLayout",
+) -> Tuple[VariableAssignments, jnp.ndarray]:
+    """Select the lowest-cost solution from a multi-start batch, ignoring starts with
+    non-finite costs unless all of them have one."""
+    cost = jnp.asarray(state_batch.cost)
+    best_index = jnp.argmin(jnp.where(jnp.isfinite(cost), cost, jnp.inf))
+    solution = jax.tree_map(lambda x: x[best_index], state_batch.assignments)
+
+    # Return, but with the storage layout reverted.
+    return solution.update_storage_layout(storage_layout), cost
+
+
+def _vmap_graph_batch(
+    fn: Callable[["StackedFactorGraph", PytreeType], OutputType],
+    graph_batch: "StackedFactorGraph",
+    batch: PytreeType,
+) -> OutputType:
+    """Map a function over a batch of graphs and a second batched input.
+
+    Graphs in a batch share the same structure, so structural arrays (variable indices
+    and sparsity patterns) are identical across the batch. We take these from the first
+    graph, which avoids batched gathers and scatters. Everything else, including integer
+    fields of factors, is mapped over."""
+
+    structural_leaf_ids = set(
+        id(leaf)
+        for leaf in jax.tree_util.tree_leaves(
+            (
+                [stack.value_indices for stack in graph_batch.factor_stacks],
+                graph_batch.jacobian_coords,
+                graph_batch.hessian_coords,
+                graph_batch.hessian_scatter_indices,
+            )
+        )
+    )
+    leaves, treedef = jax.tree_util.tree_flatten(graph_batch)
+    is_batched = [id(leaf) not in structural_leaf_ids for leaf in leaves]
+
+    def fn_unbatched(
+        batched_leaves: List[hints.Array], unbatched_input: PytreeType
+    ) -> OutputType:
+        batched_leaves_iter = iter(batched_leaves)
+        graph = jax.tree_util.tree_unflatten(
+            treedef,
+            [
+                next(batched_leaves_iter) if batched else leaf[0]
+                for leaf, batched in zip(leaves, is_batched)
+            ],
+        )
+        return fn(graph, unbatched_input)
+
+    return jax.vmap(fn_unbatched)(
+        [leaf for leaf, batched in zip(leaves, is_batched) if batched], batch
+    )
+
+
+@jax.custom_vjp
+def _solve_implicit(
+    solver: NonlinearSolverBase,
+    graph: "StackedFactorGraph",
+    initial_assignments: VariableAssignments,
+) -> VariableAssignments:
+    """Solve, with gradients computed via the implicit function theorem. Returned
+    assignments use the graph's storage layout."""
+    return solver._solve_and_print(graph, initial_assignments).assignments
+
+
+def _solve_implicit_fwd(
+    solver: NonlinearSolverBase,
+    graph: "StackedFactorGraph",
+    initial_assignments: VariableAssignments,
+) -> Tuple[
+    VariableAssignments,
+    Tuple[NonlinearSolverBase, "StackedFactorGraph", VariableAssignments],
+]:
+    state = solver._solve_and_print(graph, initial_assignments)
+    return state.assignments, (solver, graph, state.assignments)
+
+
+def _solve_implicit_bwd(
+    residuals: Tuple[NonlinearSolverBase, "StackedFactorGraph", VariableAssignments],
+    solution_cotangent: VariableAssignments,
+) -> Tuple[None, "StackedFactorGraph", None]:
+    """Backward pass for `_solve_implicit()`.
+
+    At a solution `x*`, the gradient `J^T r` is zero. Differentiating this condition
+    with respect to graph parameters `p` gives `dx*/dp = -H^-1 d(J^T r)/dp`, where we
+    approximate the Hessian `H` with `J^TJ`, as in Gauss-Newton. The vector-Jacobian
+    product therefore needs one linear solve for `w = (J^TJ)^-1 v`, followed by the
+    gradient of `-(Jw)^T r` with respect to `p`. This is exact for linear problems.
+
+    The solution does not depend on initial assignments, so their cotangents are zero.
+    """
+    solver, graph, solution = residuals
+
+    # Map the cotangent from storage to the local parameterization at the solution.
+    local_dim = graph.local_storage_layout.dim
+    _unused_storage, retract_vjp = jax.vjp(
+        lambda local_delta: solution.manifold_retract(
+            VariableAssignments(
+                storage=local_delta, storage_layout=graph.local_storage_layout
+            ),
+            fixed_mask=graph.fixed_mask,
+        ).storage,
+        jnp.zeros(local_dim),
+    )
+    (local_cotangent,) = retract_vjp(solution_cotangent.storage)
+
+    # Adjoint solve. `J^TJ` is singular for problems with gauge freedom, so we apply
+    # a small amount of damping. Iteration-dependent linear solver settings (CG
+    # budgets and tolerances) are taken from the first iteration.
+    _unused_cost, residual_vector = graph.compute_cost(solution)
+    A, _unused_ATb, ATA = solver._linearize(graph, solution, residual_vector)
+    adjoint = solver.linear_solver.solve_subproblem(
+        A=A, ATb=local_cotangent, lambd=1e-5, iteration=0, ATA=ATA
+    )
+
+    # Pull back through the optimality condition. Parameters can affect both residuals
+    # and their Jacobians, for example via noise models.
+    def negative_directional_objective(graph: "StackedFactorGraph") -> jnp.ndarray:
+        residual_vector, jacobian_adjoint_product = jax.jvp(
+            lambda local_delta: graph.compute_whitened_residual_vector(
+                solution.manifold_retract(
+                    VariableAssignments(
+                        storage=local_delta,
+                        storage_layout=graph.local_storage_layout,
+                    ),
+                    fixed_mask=graph.fixed_mask,
+                )
+            ),
+            (jnp.zeros(local_dim),),
+            (adjoint,),
+        )
+        return -jnp.sum(jacobian_adjoint_product * residual_vector)
+
+    graph_cotangent = jax.grad(negative_directional_objective, allow_int=True)(graph)
+    return None, graph_cotangent, None
+
+
+_solve_implicit.defvjp(_solve_implicit_fwd, _solve_implicit_bwd)
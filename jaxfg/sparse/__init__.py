@@ -1,16 +1,29 @@
 from ._linear_solve import (
+    AutoLinearSolver,
     CholmodSolver,
     ConjugateGradientSolver,
+    DenseCholeskySolver,
     InexactStepConjugateGradientSolver,
+    LinearSolverState,
     LinearSubproblemSolverBase,
+    SchurComplementSolver,
+    SparseQrSolver,
 )
-from ._sparse_matrix import SparseCooCoordinates, SparseCooMatrix
+from ._sparse_matrix import LinearOperator, SparseCooCoordinates, SparseCooMatrix
+from ._triangular import factorize_triangular
 
 __all__ = [
+    "AutoLinearSolver",
     "CholmodSolver",
     "ConjugateGradientSolver",
+    "DenseCholeskySolver",
     "InexactStepConjugateGradientSolver",
+    "LinearOperator",
+    "LinearSolverState",
     "LinearSubproblemSolverBase",
+    "SchurComplementSolver",
     "SparseCooCoordinates",
     "SparseCooMatrix",
+    "SparseQrSolver",
+    "factorize_triangular",
 ]
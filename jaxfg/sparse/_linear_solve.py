@@ -1,16 +1,56 @@
 import abc
-from typing import Dict, Hashable, NamedTuple
+import collections
+import concurrent.futures
+import functools
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 
 import jax
-import jax.experimental.host_callback as hcb
 import jax_dataclasses as jdc
 import numpy as onp
+import scipy
+import scipy.sparse
 import sksparse
 from jax import numpy as jnp
 from overrides import EnforceOverrides, overrides
 
 from .. import hints
-from ._sparse_matrix import SparseCooMatrix
+from ._sparse_matrix import LinearOperator, SparseCooMatrix
+from ._triangular import factorize_triangular
+
+if TYPE_CHECKING:
+    from ..core._stacked_factor_graph import StackedFactorGraph
+    from ..core._variables import VariableBase
+
+
+@jdc.pytree_dataclass
+class LinearSolverState:
+    """State carried between the linear subproblems of a nonlinear solve."""
+
+    previous_solution: jnp.ndarray
+    """Solution from the last subproblem. Zeros before the first solve."""
+
+    iterations: hints.Array
+    """Number of iterations used by the last solve. Always zero for direct solvers."""
+
+    residual_norm: hints.Array
+    """Norm of the normal equation residual after the last solve. Always zero for
+    direct solvers."""
+
+    converged: hints.Array
+    """Whether the last solve reached its tolerance. Always `True` for direct
+    solvers."""
 
 
 class LinearSubproblemSolverBase(abc.ABC, EnforceOverrides):
@@ -19,35 +59,89 @@ class LinearSubproblemSolverBase(abc.ABC, EnforceOverrides):
     @abc.abstractmethod
     def solve_subproblem(
         self,
-        A: SparseCooMatrix,
+        A: Union[SparseCooMatrix, LinearOperator],
         ATb: hints.Array,
         lambd: hints.Scalar,
         iteration: hints.Scalar,
+        ATA: Optional[SparseCooMatrix] = None,
     ) -> jnp.ndarray:
-        """Solve a linear subproblem."""
+        """Solve a linear subproblem.
 
+        `ATA` is an optional assembled normal matrix, with both triangles stored. If
+        provided, solvers that support it will use it in place of `A^TA`."""
 
-class _LinearSolverArgs(NamedTuple):
-    A: SparseCooMatrix
-    ATb: hints.Array
-    lambd: hints.Scalar
+    def initialize_state(self, dim: int) -> LinearSolverState:
+        """Initialize state for `solve_subproblem_stateful()`, for subproblems with a
+        local parameter dimension of `dim`."""
+        return LinearSolverState(
+            previous_solution=jnp.zeros(dim),
+            iterations=jnp.zeros((), dtype=jnp.int32),
+            residual_norm=jnp.zeros(()),
+            converged=jnp.ones((), dtype=bool),
+        )
+
+    def solve_subproblem_stateful(
+        self,
+        A: Union[SparseCooMatrix, LinearOperator],
+        ATb: hints.Array,
+        lambd: hints.Scalar,
+        iteration: hints.Scalar,
+        state: LinearSolverState,
+        ATA: Optional[SparseCooMatrix] = None,
+    ) -> Tuple[jnp.ndarray, LinearSolverState]:
+        """Solve a linear subproblem, with access to state from previous solves. By
+        default, the state is only used to record the solution."""
+        x = self.solve_subproblem(
+            A=A, ATb=ATb, lambd=lambd, iteration=iteration, ATA=ATA
+        )
+        return x, jdc.replace(
+            state,
+            previous_solution=x,
+            iterations=jnp.zeros_like(state.iterations),
+            residual_norm=jnp.zeros_like(state.residual_norm),
+            converged=jnp.ones_like(state.converged),
+        )
 
 
 _cholmod_analyze_cache: Dict[Hashable, sksparse.cholmod.Factor] = {}
 
+_cholmod_factor_cache: "collections.OrderedDict[int, sksparse.cholmod.Factor]" = (
+    collections.OrderedDict()
+)
+"""Numerical factorizations from forward solves, which are reused for adjoint solves.
+Keyed by integer tokens; bounded to `_CHOLMOD_FACTOR_CACHE_SIZE` entries."""
+
+_CHOLMOD_FACTOR_CACHE_SIZE = 64
+
+_cholmod_factor_cache_lock = threading.Lock()
+
+_CHOLMOD_THREAD_NAME_PREFIX = "jaxfg_cholmod"
+
+_cholmod_thread_local = threading.local()
+"""Per-thread copies of cached symbolic analyses, for concurrent factorization."""
+
+
+@functools.lru_cache(maxsize=None)
+def _get_thread_pool(num_threads: int) -> concurrent.futures.ThreadPoolExecutor:
+    """Get a (shared) thread pool for host-side factorizations."""
+    return concurrent.futures.ThreadPoolExecutor(
+        max_workers=num_threads, thread_name_prefix=_CHOLMOD_THREAD_NAME_PREFIX
+    )
+
 
 @jdc.pytree_dataclass
 class CholmodSolver(LinearSubproblemSolverBase):
-    r"""CHOLMOD-based sparse linear solver. This is the default solver for performance
-    reasons, but also less stable than `ConjugateGradientSolver`.
+    r"""CHOLMOD-based sparse linear solver. Typically the fastest option for large
+    problems, but also less stable than `ConjugateGradientSolver`.
 
-    Runs via an XLA host callback, and has some usage caveats:
+    Runs via an XLA host callback (`jax.pure_callback`), and has some usage caveats:
     - Caching is a little bit sketchy. Assumes that a given solver is not reused for
       systems with different sparsity patterns.
-    - Does not support function transforms (`vmap`, `pmap`, etc), due to current
-      limitations of `hcb.call()`.
-    - Does not support autodiff. A custom JVP or VJP definition should be easy to
-      implement, but not super useful without batch axis support.
+    - Batch axes (`vmap`) are supported, but all systems in a batch must share a
+      sparsity pattern. The symbolic analysis is computed once and shared across
+      the batch.
+    - Reverse-mode autodiff is supported via a custom VJP, which reuses the forward
+      factorization for the adjoint solve. Forward-mode autodiff is not supported.
     - Regularization consistency. We use a vanilla $$\lambda I$$ regularization term
       here, but the conjugate gradient solver uses a scale invariant $$\lambda
       diag(A^TA)$$ term.
@@ -56,39 +150,492 @@ class CholmodSolver(LinearSubproblemSolverBase):
     is written in vanilla JAX should be less caveat-y.
     """
 
+    num_threads: int = jdc.static_field(default=1)
+    """Number of host threads used to factorize and solve batched systems. Each thread
+    factorizes using its own copy of the shared symbolic analysis.
+
+    Note that scikit-sparse holds the GIL while CHOLMOD factorizes and solves (checked
+    for versions 0.4.12 and 0.5.0), so extra threads only overlap the sparse matrix
+    conversions around each factorization. Expect sub-linear scaling; see
+    `scripts/benchmark_batched_cholmod.py`."""
+
     @overrides
     def solve_subproblem(
         self,
-        A: SparseCooMatrix,
+        A: Union[SparseCooMatrix, LinearOperator],
         ATb: hints.Array,
         lambd: hints.Scalar,
         iteration: hints.Scalar,  # Unused
+        ATA: Optional[SparseCooMatrix] = None,
     ) -> jnp.ndarray:
-        # JAX-compatible sparse Cholesky factorization with a host callback. Similar to:
-        #     self._solve(_LinearSolverArgs(A, ATb, lambd))
-        return hcb.call(self._solve, _LinearSolverArgs(A, ATb, lambd), result_shape=ATb)
+        assert isinstance(A, SparseCooMatrix), "CHOLMOD requires an explicit Jacobian"
+        return _cholmod_solve(self, A, jnp.asarray(ATb), jnp.asarray(lambd))
+
+    def _solve(
+        self,
+        values: onp.ndarray,
+        rows: onp.ndarray,
+        cols: onp.ndarray,
+        ATb: onp.ndarray,
+        lambd: onp.ndarray,
+        shape: Tuple[int, int],
+        store_factors: bool,
+    ) -> Tuple[onp.ndarray, onp.ndarray]:
+        """Host-side solve. Inputs may have any number of leading batch axes; under
+        `vmap`, only mapped inputs have them, so we broadcast everything to a shared
+        batch shape.
+
+        Returns solutions, and (if `store_factors` is set) integer tokens for
+        retrieving factorizations from `_cholmod_factor_cache`."""
+        batch_shape = onp.broadcast_shapes(
+            values.shape[:-1], ATb.shape[:-1], lambd.shape
+        )
+        (nnz,) = values.shape[-1:]
+        (dim,) = ATb.shape[-1:]
+        values = onp.broadcast_to(values, batch_shape + (nnz,)).reshape((-1, nnz))
+        ATb_flat = onp.broadcast_to(ATb, batch_shape + (dim,)).reshape((-1, dim))
+        lambd = onp.broadcast_to(lambd, batch_shape).reshape((-1,))
+
+        # Systems in a batch are assumed to share a sparsity pattern.
+        rows = rows.reshape((-1, nnz))[0]
+        cols = cols.reshape((-1, nnz))[0]
 
-    def _solve(self, args: _LinearSolverArgs) -> jnp.ndarray:
-        # Convert our custom sparse matrix format to a scipy CSC matrix
-        # This could likely be optimized!
-        A_T = args.A.T
-        A_T_scipy = A_T.as_scipy_coo_matrix().tocsc(copy=False)
+        solutions = onp.zeros(ATb_flat.shape, dtype=ATb.dtype)
+        tokens = onp.zeros(ATb_flat.shape[:1], dtype=onp.int32)
+
+        def solve_single(i: int) -> None:
+            factor = self._factorize(values[i], rows, cols, lambd[i], shape)
+            solutions[i] = factor.solve_A(ATb_flat[i])
+            if store_factors:
+                tokens[i] = _store_cholmod_factor(factor)
+
+        self._map(solve_single, ATb_flat.shape[0])
+        return solutions.reshape(batch_shape + (dim,)), tokens.reshape(batch_shape)
+
+    def _map(self, fn: Callable[[int], None], batch_size: int) -> None:
+        """Run a function for each index in a batch, in parallel if configured."""
+        if self.num_threads <= 1 or batch_size <= 1:
+            for i in range(batch_size):
+                fn(i)
+        else:
+            # The first system is solved from the calling thread, which makes sure the
+            # shared symbolic analysis exists before pool threads copy it.
+            fn(0)
+            for future in [
+                _get_thread_pool(self.num_threads).submit(fn, i)
+                for i in range(1, batch_size)
+            ]:
+                future.result()
+
+    def _factorize(
+        self,
+        values: onp.ndarray,
+        rows: onp.ndarray,
+        cols: onp.ndarray,
+        lambd: onp.ndarray,
+        shape: Tuple[int, int],
+    ) -> sksparse.cholmod.Factor:
+        """Compute a numerical factorization of `A^TA + lambd I`."""
+        # Convert to a scipy CSC matrix. Note that we factorize via A^T.
+        A_T_scipy = scipy.sparse.coo_matrix(
+            (values, (cols, rows)), shape=shape[::-1]
+        ).tocsc(copy=False)
 
         # Cache sparsity pattern analysis
-        self_hash = object.__hash__(self)
-        if self_hash not in _cholmod_analyze_cache:
-            _cholmod_analyze_cache[self_hash] = sksparse.cholmod.analyze_AAt(A_T_scipy)
+        cache_key = (object.__hash__(self), shape, values.shape)
+        if cache_key not in _cholmod_analyze_cache:
+            _cholmod_analyze_cache[cache_key] = sksparse.cholmod.analyze_AAt(A_T_scipy)
+        analysis = _cholmod_analyze_cache[cache_key]
 
-        # Factorize and solve
-        _cholmod_analyze_cache[self_hash].cholesky_AAt_inplace(
+        # CHOLMOD factors aren't safe to share between threads: pool threads use their
+        # own copy of the analysis.
+        if threading.current_thread().name.startswith(_CHOLMOD_THREAD_NAME_PREFIX):
+            if not hasattr(_cholmod_thread_local, "analyze_cache"):
+                _cholmod_thread_local.analyze_cache = {}
+            if cache_key not in _cholmod_thread_local.analyze_cache:
+                with _cholmod_factor_cache_lock:
+                    _cholmod_thread_local.analyze_cache[cache_key] = analysis.copy()
+            analysis = _cholmod_thread_local.analyze_cache[cache_key]
+
+        # Factorize. This returns a new factor that shares the cached analysis.
+        return analysis.cholesky_AAt(
             A_T_scipy,
-            beta=args.lambd
+            beta=lambd
             + 1e-5,  # Some simple linear problems blow up without this 1e-5 term
         )
-        return _cholmod_analyze_cache[self_hash].solve_A(args.ATb)
+
+    def _solve_adjoint(
+        self,
+        values: onp.ndarray,
+        rows: onp.ndarray,
+        cols: onp.ndarray,
+        tokens: onp.ndarray,
+        lambd: onp.ndarray,
+        x_bar: onp.ndarray,
+        shape: Tuple[int, int],
+    ) -> onp.ndarray:
+        """Host-side adjoint solve. Reuses factorizations from the forward pass when
+        they're still cached, and otherwise refactorizes. Batch axes are handled like
+        in `_solve()`."""
+        batch_shape = onp.broadcast_shapes(
+            values.shape[:-1], tokens.shape, lambd.shape, x_bar.shape[:-1]
+        )
+        (nnz,) = values.shape[-1:]
+        (dim,) = x_bar.shape[-1:]
+        values = onp.broadcast_to(values, batch_shape + (nnz,)).reshape((-1, nnz))
+        x_bar_flat = onp.broadcast_to(x_bar, batch_shape + (dim,)).reshape((-1, dim))
+        tokens = onp.broadcast_to(tokens, batch_shape).reshape((-1,))
+        lambd = onp.broadcast_to(lambd, batch_shape).reshape((-1,))
+        rows = rows.reshape((-1, nnz))[0]
+        cols = cols.reshape((-1, nnz))[0]
+
+        out = onp.zeros(x_bar_flat.shape, dtype=x_bar.dtype)
+
+        def solve_single(i: int) -> None:
+            with _cholmod_factor_cache_lock:
+                factor = _cholmod_factor_cache.get(int(tokens[i]))
+            if factor is None:
+                factor = self._factorize(values[i], rows, cols, lambd[i], shape)
+            out[i] = factor.solve_A(x_bar_flat[i])
+
+        self._map(solve_single, x_bar_flat.shape[0])
+        return out.reshape(batch_shape + (dim,))
+
+
+def _store_cholmod_factor(factor: sksparse.cholmod.Factor) -> int:
+    """Store a numerical factorization for reuse in an adjoint solve."""
+    with _cholmod_factor_cache_lock:
+        token = (
+            (next(reversed(_cholmod_factor_cache)) + 1) if _cholmod_factor_cache else 0
+        )
+        token %= onp.iinfo(onp.int32).max
+        _cholmod_factor_cache[token] = factor
+        while len(_cholmod_factor_cache) > _CHOLMOD_FACTOR_CACHE_SIZE:
+            _cholmod_factor_cache.popitem(last=False)
+    return token
+
+
+def _cholmod_callback(
+    solver: CholmodSolver,
+    A: SparseCooMatrix,
+    ATb: jnp.ndarray,
+    lambd: jnp.ndarray,
+    store_factors: bool,
+) -> Tuple[jnp.ndarray, jnp.ndarray]:
+    """JAX-compatible sparse Cholesky factorization with a host callback. Similar to:
+    `solver._solve(A.values, A.coords.rows, A.coords.cols, ATb, lambd, ...)`"""
+    return jax.pure_callback(
+        functools.partial(solver._solve, shape=A.shape, store_factors=store_factors),
+        (
+            jax.ShapeDtypeStruct(ATb.shape, ATb.dtype),
+            jax.ShapeDtypeStruct(ATb.shape[:-1], jnp.int32),
+        ),
+        A.values,
+        A.coords.rows,
+        A.coords.cols,
+        ATb,
+        lambd,
+        vectorized=True,
+    )
+
+
+@functools.partial(jax.custom_vjp, nondiff_argnums=(0,))
+def _cholmod_solve(
+    solver: CholmodSolver,
+    A: SparseCooMatrix,
+    ATb: jnp.ndarray,
+    lambd: jnp.ndarray,
+) -> jnp.ndarray:
+    return _cholmod_callback(solver, A, ATb, lambd, store_factors=False)[0]
+
+
+def _cholmod_solve_fwd(
+    solver: CholmodSolver,
+    A: SparseCooMatrix,
+    ATb: jnp.ndarray,
+    lambd: jnp.ndarray,
+):
+    x, tokens = _cholmod_callback(solver, A, ATb, lambd, store_factors=True)
+    return x, (A, lambd, x, tokens)
+
+
+def _cholmod_solve_bwd(solver: CholmodSolver, residuals, x_bar: jnp.ndarray):
+    # For `x = H^-1 ATb` with `H = A^TA + lambd I`, all gradients can be written in
+    # terms of a single adjoint solve `u = H^-1 x_bar`.
+    A, lambd, x, tokens = residuals
+    u = jax.pure_callback(
+        functools.partial(solver._solve_adjoint, shape=A.shape),
+        jax.ShapeDtypeStruct(x_bar.shape, x_bar.dtype),
+        A.values,
+        A.coords.rows,
+        A.coords.cols,
+        tokens,
+        lambd,
+        x_bar,
+        vectorized=True,
+    )
+
+    # dH = dA^T A + A^T dA + dlambd I
+    rows = A.coords.rows
+    cols = A.coords.cols
+    A_bar = SparseCooMatrix(
+        values=-((A @ u)[rows] * x[cols] + (A @ x)[rows] * u[cols]),
+        coords=jax.tree_map(
+            lambda a: onp.zeros(a.shape, dtype=jax.dtypes.float0), A.coords
+        ),
+        shape=A.shape,
+    )
+    lambd_bar = -jnp.sum(u * x)
+    return A_bar, u, lambd_bar
+
+
+_cholmod_solve.defvjp(_cholmod_solve_fwd, _cholmod_solve_bwd)
+
+
+_sparse_qr_pattern_cache: Dict[
+    Hashable, Tuple[onp.ndarray, onp.ndarray, onp.ndarray]
+] = {}
+
+
+@jdc.pytree_dataclass
+class SparseQrSolver(LinearSubproblemSolverBase):
+    r"""QR-based sparse linear solver, via SuiteSparseQR. Requires the optional
+    `sparseqr` package.
+
+    `CholmodSolver` factorizes $$A^TA$$, which squares the condition number of the
+    Jacobian. Here, we instead compute a Q-less QR factorization of the Jacobian
+    augmented with $$\sqrt{\lambda} I$$ rows, whose R factor satisfies
+    $$R^TR = A^TA + \lambda I$$ without ever forming $$A^TA$$. The linear subproblem is
+    then solved from the corrected semi-normal equations: a pair of triangular solves
+    followed by iterative refinement steps. No additional regularization is applied.
+
+    Runs via an XLA host callback. Like `CholmodSolver`, the sparsity pattern
+    preprocessing (COO to CSC conversion of the augmented Jacobian) is cached, and
+    assumes that a given solver is not reused for systems with different sparsity
+    patterns. `vmap` is supported, with each system in the batch solved sequentially;
+    autodiff is not.
+    """
+
+    refinement_steps: int = jdc.static_field(default=1)
+    """Number of iterative refinement steps. One step is typically enough to recover
+    the accuracy of a full QR-based least squares solve."""
+
+    @overrides
+    def solve_subproblem(
+        self,
+        A: Union[SparseCooMatrix, LinearOperator],
+        ATb: hints.Array,
+        lambd: hints.Scalar,
+        iteration: hints.Scalar,  # Unused
+        ATA: Optional[SparseCooMatrix] = None,
+    ) -> jnp.ndarray:
+        assert isinstance(A, SparseCooMatrix), "QR requires an explicit Jacobian"
+        ATb = jnp.asarray(ATb)
+        return jax.pure_callback(
+            functools.partial(self._solve, shape=A.shape),
+            jax.ShapeDtypeStruct(ATb.shape, ATb.dtype),
+            A.values,
+            A.coords.rows,
+            A.coords.cols,
+            ATb,
+            jnp.asarray(lambd),
+        )
+
+    def _solve(
+        self,
+        values: onp.ndarray,
+        rows: onp.ndarray,
+        cols: onp.ndarray,
+        ATb: onp.ndarray,
+        lambd: onp.ndarray,
+        shape: Tuple[int, int],
+    ) -> onp.ndarray:
+        try:
+            import sparseqr
+        except ImportError as e:
+            raise ImportError(
+                "SparseQrSolver requires the `sparseqr` package: `pip install sparseqr`"
+            ) from e
+
+        residual_dim, local_dim = shape
+
+        # Cache the CSC structure of the augmented Jacobian, [A; sqrt(lambd) I].
+        cache_key = (object.__hash__(self), shape, values.shape)
+        if cache_key not in _sparse_qr_pattern_cache:
+            augmented_rows = onp.concatenate(
+                [rows, residual_dim + onp.arange(local_dim)]
+            )
+            augmented_cols = onp.concatenate([cols, onp.arange(local_dim)])
+            order = onp.lexsort((augmented_rows, augmented_cols))
+            indptr = onp.concatenate(
+                [[0], onp.cumsum(onp.bincount(augmented_cols, minlength=local_dim))]
+            )
+            _sparse_qr_pattern_cache[cache_key] = (
+                order,
+                augmented_rows[order],
+                indptr,
+            )
+        order, indices, indptr = _sparse_qr_pattern_cache[cache_key]
+
+        augmented_values = onp.concatenate(
+            [values, onp.full(local_dim, onp.sqrt(lambd), dtype=values.dtype)]
+        ).astype(onp.float64)
+        A_augmented = scipy.sparse.csc_matrix(
+            (augmented_values[order], indices, indptr),
+            shape=(residual_dim + local_dim, local_dim),
+        )
+        A_augmented.sum_duplicates()
+
+        # Q-less factorization, with a fill-reducing column permutation. Satisfies
+        # A_augmented[:, E] = QR.
+        _unused_Z, R, E, rank = sparseqr.rz(
+            A_augmented, onp.zeros((A_augmented.shape[0], 1))
+        )
+        if rank < local_dim:
+            raise ValueError(
+                f"SparseQrSolver: Jacobian is rank deficient (rank {rank} with"
+                f" {local_dim} columns). Use a damped solver with `lambd > 0`, or add"
+                " factors that constrain every variable."
+            )
+        R = scipy.sparse.csr_matrix(R)[:local_dim].tocsc()
+        E = onp.arange(local_dim) if E is None else onp.asarray(E)
+        R_lu = factorize_triangular(R)
+
+        def solve_semi_normal(rhs: onp.ndarray) -> onp.ndarray:
+            """Solve `R^T R x = rhs`, accounting for the column permutation."""
+            x = onp.zeros(local_dim)
+            x[E] = R_lu.solve(R_lu.solve(rhs[E], trans="T"))
+            return x
+
+        ATb = ATb.astype(onp.float64)
+        x = solve_semi_normal(ATb)
+        for _ in range(self.refinement_steps):
+            x = x + solve_semi_normal(ATb - A_augmented.T @ (A_augmented @ x))
+        return x.astype(values.dtype)
+
+
+@jdc.pytree_dataclass
+class DenseCholeskySolver(LinearSubproblemSolverBase):
+    r"""Dense Cholesky-based linear solver. Scatters the Jacobian into a dense matrix,
+    forms $$A^TA$$ on-device, and solves with a dense Cholesky factorization.
+
+    Avoids the host callback overhead of `CholmodSolver`, which tends to dominate for
+    small and medium-sized problems (up to a few thousand local parameters), and
+    supports all function transforms (`jit`, `vmap`, etc). Memory scales quadratically
+    with the local parameter dimension, so this is not suitable for large graphs.
+
+    Damping convention: by default, we solve
+    $$(A^TA + \lambda diag(A^TA) + \epsilon I) x = A^Tb$$. The $$\lambda$$ term is
+    scale invariant, which matches the conjugate gradient solvers. With
+    `scale_invariant_damping=False`, we instead solve
+    $$(A^TA + (\lambda + \epsilon) I) x = A^Tb$$, which matches `CholmodSolver`. The
+    $$\epsilon$$ term keeps the factorization well-defined when $$A^TA$$ is singular;
+    for example, for problems with gauge freedom.
+    """
+
+    diag_epsilon: float = jdc.static_field(default=1e-5)
+    """Constant added to the diagonal of $$A^TA$$ before factorization."""
+
+    scale_invariant_damping: bool = jdc.static_field(default=True)
+    r"""Set to `False` to damp with $$\lambda I$$ instead of $$\lambda diag(A^TA)$$."""
+
+    @overrides
+    def solve_subproblem(
+        self,
+        A: Union[SparseCooMatrix, LinearOperator],
+        ATb: hints.Array,
+        lambd: hints.Scalar,
+        iteration: hints.Scalar,  # Unused
+        ATA: Optional[SparseCooMatrix] = None,
+    ) -> jnp.ndarray:
+        assert isinstance(
+            A, SparseCooMatrix
+        ), "Dense Cholesky requires an explicit Jacobian"
+        assert len(A.values.shape) == 1, "A.values should be 1D"
+        assert len(ATb.shape) == 1, "ATb should be 1D!"
+
+        # Form regularized normal equation
+        ATA_dense: jnp.ndarray
+        if ATA is not None:
+            ATA_dense = ATA.as_dense()
+        else:
+            A_dense = A.as_dense()
+            ATA_dense = A_dense.T @ A_dense
+        identity = jnp.eye(ATA_dense.shape[0], dtype=ATA_dense.dtype)
+        ATA_dense = (
+            ATA_dense
+            + lambd
+            * (
+                jnp.diag(jnp.diag(ATA_dense))
+                if self.scale_invariant_damping
+                else identity
+            )
+            + self.diag_epsilon * identity
+        )
+
+        # Factorize and solve
+        return jax.scipy.linalg.cho_solve(jax.scipy.linalg.cho_factor(ATA_dense), ATb)
+
+
+def _conjugate_gradient(
+    A_function: Callable[[jnp.ndarray], jnp.ndarray],
+    b: jnp.ndarray,
+    x0: jnp.ndarray,
+    M_function: Callable[[jnp.ndarray], jnp.ndarray],
+    tol: hints.Scalar,
+    maxiter: Union[hints.Array, int],
+) -> Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray]:
+    """Preconditioned conjugate gradient. Matches `jax.scipy.sparse.linalg.cg()`, but
+    supports traced iteration limits and also returns the number of iterations used
+    and the final residual norm."""
+
+    threshold_sq = tol**2 * jnp.sum(b**2)
+
+    def cond_fun(carry) -> jnp.ndarray:
+        _unused_x, r, _unused_gamma, _unused_p, k = carry
+        return jnp.logical_and(jnp.sum(r**2) > threshold_sq, k < maxiter)
+
+    def body_fun(carry):
+        x, r, gamma, p, k = carry
+        Ap = A_function(p)
+        alpha = gamma / jnp.sum(p * Ap)
+        x = x + alpha * p
+        r = r - alpha * Ap
+        z = M_function(r)
+        gamma_new = jnp.sum(r * z)
+        p = z + (gamma_new / gamma) * p
+        return x, r, gamma_new, p, k + 1
+
+    r0 = b - A_function(x0)
+    z0 = M_function(r0)
+    x, r, _unused_gamma, _unused_p, k = jax.lax.while_loop(
+        cond_fun,
+        body_fun,
+        (x0, r0, jnp.sum(r0 * z0), z0, jnp.zeros((), dtype=jnp.int32)),
+    )
+    return x, k, jnp.linalg.norm(r)
 
 
+@jdc.pytree_dataclass
 class _ConjugateGradientSolver(LinearSubproblemSolverBase, abc.ABC):
+    warm_start: bool = jdc.static_field(default=False)
+    """Set to `True` to initialize CG from the previous solution, rescaled to minimize
+    the error of the new system in the energy norm. Only used by
+    `solve_subproblem_stateful()`."""
+
+    scale_invariant_damping: bool = jdc.static_field(default=True)
+    r"""Damping convention. If `True`, we solve $$(A^TA + \lambda diag(A^TA)) x = A^Tb$$.
+    If `False`, we solve $$(A^TA + \lambda I) x = A^Tb$$, which matches
+    `CholmodSolver`."""
+
+    max_cg_iterations: Optional[int] = jdc.static_field(default=None)
+    """Iteration budget for the first nonlinear iteration. If `None`, the budget is the
+    local parameter dimension, where exact arithmetic CG is guaranteed to converge."""
+
+    max_cg_iterations_growth: int = jdc.static_field(default=0)
+    """Increase in the iteration budget per nonlinear iteration. Budgets are never
+    larger than the local parameter dimension."""
+
     @abc.abstractmethod
     def _get_cg_tolerance(self, iteration: hints.Scalar):
         ...
@@ -96,45 +643,106 @@ class _ConjugateGradientSolver(LinearSubproblemSolverBase, abc.ABC):
     @overrides
     def solve_subproblem(
         self,
-        A: SparseCooMatrix,
+        A: Union[SparseCooMatrix, LinearOperator],
         ATb: hints.Array,
         lambd: hints.Scalar,
         iteration: hints.Scalar,
+        ATA: Optional[SparseCooMatrix] = None,
     ) -> jnp.ndarray:
-        assert len(A.values.shape) == 1, "A.values should be 1D"
-        assert len(ATb.shape) == 1, "ATb should be 1D!"
+        x, _unused_state = self.solve_subproblem_stateful(
+            A=A,
+            ATb=ATb,
+            lambd=lambd,
+            iteration=iteration,
+            state=self.initialize_state(ATb.shape[0]),
+            ATA=ATA,
+        )
+        return x
 
-        initial_x = onp.zeros(ATb.shape)
+    @overrides
+    def solve_subproblem_stateful(
+        self,
+        A: Union[SparseCooMatrix, LinearOperator],
+        ATb: hints.Array,
+        lambd: hints.Scalar,
+        iteration: hints.Scalar,
+        state: LinearSolverState,
+        ATA: Optional[SparseCooMatrix] = None,
+    ) -> Tuple[jnp.ndarray, LinearSolverState]:
+        assert len(ATb.shape) == 1, "ATb should be 1D!"
 
         # Get diagonals of ATA, for regularization + Jacobi preconditioning
-        ATA_diagonals = jnp.zeros_like(initial_x).at[A.coords.cols].add(A.values**2)
+        ATA_diagonals: jnp.ndarray
+        if ATA is not None:
+            ATA_diagonals = (
+                jnp.zeros(ATb.shape)
+                .at[ATA.coords.rows]
+                .add(jnp.where(ATA.coords.rows == ATA.coords.cols, ATA.values, 0.0))
+            )
+        elif isinstance(A, LinearOperator):
+            assert A.ATA_diagonal is not None, "Linear operator is missing diagonal"
+            ATA_diagonals = A.ATA_diagonal
+        else:
+            assert len(A.values.shape) == 1, "A.values should be 1D"
+            ATA_diagonals = jnp.zeros(ATb.shape).at[A.coords.cols].add(A.values**2)
 
-        # Form normal equation
-        def ATA_function(x: hints.Array):
-            # Compute ATAx
-            ATAx = A.T @ (A @ x)
-
-            # Return regularized (scale-invariant)
-            return ATAx + lambd * ATA_diagonals * x
+        # Form regularized normal equation
+        damping = (
+            lambd * ATA_diagonals
+            if self.scale_invariant_damping
+            else lambd * jnp.ones_like(ATA_diagonals)
+        )
 
-            # Vanilla regularization
-            # return ATAx + lambd * x
+        def ATA_function(x: hints.Array):
+            ATAx = ATA @ x if ATA is not None else A.T @ (A @ x)
+            return ATAx + damping * x
 
         def jacobi_preconditioner(x):
-            return x / ATA_diagonals
+            return x / (ATA_diagonals + damping)
 
         # Solve with conjugate gradient
-        solution_values, _unused_info = jax.scipy.sparse.linalg.cg(
-            A=ATA_function,
-            b=ATb,
-            x0=initial_x,
-            maxiter=len(
-                initial_x
-            ),  # https://en.wikipedia.org/wiki/Conjugate_gradient_method#Convergence_properties
-            tol=self._get_cg_tolerance(iteration),
-            M=jacobi_preconditioner,
+        tolerance = self._get_cg_tolerance(iteration)
+        solution_values, cg_iterations, residual_norm = _conjugate_gradient(
+            A_function=ATA_function,
+            b=jnp.asarray(ATb),
+            x0=self._compute_initial_x(ATA_function, ATb, state),
+            M_function=jacobi_preconditioner,
+            tol=tolerance,
+            maxiter=self._get_cg_max_iterations(iteration, dim=ATb.shape[0]),
+        )
+        return solution_values, LinearSolverState(
+            previous_solution=solution_values,
+            iterations=cg_iterations,
+            residual_norm=residual_norm,
+            converged=residual_norm <= tolerance * jnp.linalg.norm(ATb),
+        )
+
+    def _get_cg_max_iterations(self, iteration: hints.Scalar, dim: int) -> hints.Array:
+        # https://en.wikipedia.org/wiki/Conjugate_gradient_method#Convergence_properties
+        if self.max_cg_iterations is None:
+            return jnp.array(dim)
+        return jnp.minimum(
+            self.max_cg_iterations + self.max_cg_iterations_growth * iteration, dim
+        )
+
+    def _compute_initial_x(
+        self,
+        ATA_function: Callable[[hints.Array], jnp.ndarray],
+        ATb: hints.Array,
+        state: LinearSolverState,
+    ) -> jnp.ndarray:
+        """Compute an initial guess for CG from the previous solution."""
+        if not self.warm_start:
+            return jnp.zeros(ATb.shape)
+
+        # Rescale the previous solution to minimize the error in the energy norm. Before
+        # the first solve, the previous solution is zero and so is the initial guess.
+        x_prev = state.previous_solution
+        x_prev_ATA_x_prev = jnp.sum(x_prev * ATA_function(x_prev))
+        scale = jnp.sum(x_prev * ATb) / jnp.where(
+            x_prev_ATA_x_prev > 0.0, x_prev_ATA_x_prev, 1.0
         )
-        return solution_values
+        return scale * x_prev
 
 
 @jdc.pytree_dataclass
@@ -159,3 +767,516 @@ class InexactStepConjugateGradientSolver(_ConjugateGradientSolver):
     @overrides
     def _get_cg_tolerance(self, iteration: hints.Scalar):
         return self.inexact_step_eta / (iteration + 1)
+
+
+def _same_row_pairs(
+    rows: onp.ndarray, entries_a: onp.ndarray, entries_b: onp.ndarray
+) -> Tuple[onp.ndarray, onp.ndarray]:
+    """Find all pairs `(a, b)` of sparse matrix entries, one from each of two sets,
+    that lie in the same row."""
+    num_rows = int(rows.max()) + 1 if rows.shape[0] > 0 else 0
+    indicator_a = scipy.sparse.csr_matrix(
+        (
+            onp.ones(entries_a.shape[0]),
+            (rows[entries_a], onp.arange(entries_a.shape[0])),
+        ),
+        shape=(num_rows, entries_a.shape[0]),
+    )
+    indicator_b = scipy.sparse.csr_matrix(
+        (
+            onp.ones(entries_b.shape[0]),
+            (rows[entries_b], onp.arange(entries_b.shape[0])),
+        ),
+        shape=(num_rows, entries_b.shape[0]),
+    )
+    pairs = (indicator_a.T @ indicator_b).tocoo()
+    return entries_a[pairs.row], entries_b[pairs.col]
+
+
+@jdc.pytree_dataclass
+class _SchurBlockStructure:
+    """Index arrays for assembling an explicit Schur complement directly from the
+    values of a Jacobian with a fixed sparsity pattern. Positions refer to rows and
+    columns of the reduced system."""
+
+    num_entries: int = jdc.static_field()
+    """Number of non-zero Jacobian entries."""
+
+    kept_pairs: hints.Array
+    """Pairs of kept Jacobian entries that share a row, as `(entry, entry, position,
+    position)` rows. These sum to the kept block of $$A^TA$$."""
+
+    eliminated_pairs: Tuple[hints.Array, ...]
+    """For each eliminated block: pairs of eliminated and kept Jacobian entries that
+    share a row, as `(eliminated entry, kept entry, variable, local index, slot)` rows.
+    These sum to the coupling blocks between each eliminated variable and the kept
+    columns it is connected to, which are assigned slots."""
+
+    eliminated_slot_positions: Tuple[hints.Array, ...]
+    """For each eliminated block: reduced system position of each slot, with shape
+    `(variable count, max slots)`. Padding slots are out of bounds."""
+
+    @staticmethod
+    def make(
+        rows: onp.ndarray,
+        cols: onp.ndarray,
+        eliminated_blocks: Tuple[Tuple[int, int, int], ...],
+        dim: int,
+    ) -> "_SchurBlockStructure":
+        eliminate_mask = _get_eliminate_mask(eliminated_blocks, dim)
+        keep_count = int(onp.count_nonzero(~eliminate_mask))
+        position_from_col = onp.full(dim, keep_count)
+        position_from_col[~eliminate_mask] = onp.arange(keep_count)
+
+        entries = onp.arange(rows.shape[0])
+        kept_entries = entries[~eliminate_mask[cols]]
+        kept_a, kept_b = _same_row_pairs(rows, kept_entries, kept_entries)
+
+        eliminated_pairs = []
+        eliminated_slot_positions = []
+        for start, count, block_dim in eliminated_blocks:
+            end = start + count * block_dim
+            block_entries = entries[(cols >= start) & (cols < end)]
+            elim, kept = _same_row_pairs(rows, block_entries, kept_entries)
+            variable, local_index = onp.divmod(cols[elim] - start, block_dim)
+
+            # Assign slots to the kept columns connected to each variable.
+            keys, key_from_pair = onp.unique(
+                variable * dim + cols[kept], return_inverse=True
+            )
+            key_variable, key_col = onp.divmod(keys, dim)
+            key_slot = onp.arange(keys.shape[0]) - onp.searchsorted(
+                key_variable, key_variable
+            )
+            max_slots = int(key_slot.max()) + 1 if keys.shape[0] > 0 else 1
+            slot_positions = onp.full((count, max_slots), keep_count)
+            slot_positions[key_variable, key_slot] = position_from_col[key_col]
+
+            eliminated_pairs.append(
+                onp.stack(
+                    [elim, kept, variable, local_index, key_slot[key_from_pair]],
+                    axis=-1,
+                ).astype(onp.int32)
+            )
+            eliminated_slot_positions.append(slot_positions.astype(onp.int32))
+
+        return _SchurBlockStructure(
+            num_entries=rows.shape[0],
+            kept_pairs=onp.stack(
+                [
+                    kept_a,
+                    kept_b,
+                    position_from_col[cols[kept_a]],
+                    position_from_col[cols[kept_b]],
+                ],
+                axis=-1,
+            ).astype(onp.int32),
+            eliminated_pairs=tuple(eliminated_pairs),
+            eliminated_slot_positions=tuple(eliminated_slot_positions),
+        )
+
+
+def _get_eliminate_mask(
+    eliminated_blocks: Tuple[Tuple[int, int, int], ...], dim: int
+) -> onp.ndarray:
+    """Boolean mask over local storage indices, which is `True` for eliminated
+    indices."""
+    eliminate_mask = onp.zeros(dim, dtype=bool)
+    for start, count, block_dim in eliminated_blocks:
+        eliminate_mask[start : start + count * block_dim] = True
+    return eliminate_mask
+
+
+@jdc.pytree_dataclass
+class SchurComplementSolver(LinearSubproblemSolverBase):
+    r"""Linear solver that analytically eliminates a set of variables, and then solves
+    only the reduced system for the remaining ones. Intended for bundle
+    adjustment-style problems, where there are many more landmark variables than
+    camera variables.
+
+    Assumes that the eliminated block of $$A^TA$$ is block diagonal, in other words
+    that no factor connects two eliminated variables; this is checked by
+    `SchurComplementSolver.make()`, but not when blocks are specified directly.
+
+    The reduced system is solved either with a dense Cholesky factorization of the
+    explicit Schur complement, or with conjugate gradient; conjugate gradient can also
+    be run on the implicit (matrix-free) Schur complement, which never materializes the
+    reduced system. When created via `SchurComplementSolver.make()`, the explicit Schur
+    complement is assembled block by block from the Jacobian's sparsity pattern.
+    Otherwise, it is probed one column at a time, which costs a Jacobian product per
+    kept column.
+
+    Like `DenseCholeskySolver`, we solve
+    $$(A^TA + \lambda diag(A^TA) + \epsilon I) x = A^Tb$$. Written in vanilla JAX, so
+    function transforms are supported.
+    """
+
+    eliminated_blocks: Tuple[Tuple[int, int, int], ...] = jdc.static_field()
+    """Local storage blocks to eliminate, as `(start index, variable count, local
+    parameter dim)` tuples. Typically populated via `SchurComplementSolver.make()`."""
+
+    implicit: bool = jdc.static_field(default=False)
+    """Set to `True` to solve the reduced system without forming the Schur complement.
+    Requires `use_conjugate_gradient=True`."""
+
+    use_conjugate_gradient: bool = jdc.static_field(default=False)
+    """Set to `True` to solve the reduced system with conjugate gradient instead of a
+    dense Cholesky factorization."""
+
+    tolerance: float = 1e-5
+    """CG convergence tolerance. Only used if `use_conjugate_gradient=True`."""
+
+    diag_epsilon: float = jdc.static_field(default=1e-5)
+    """Constant added to the diagonal of $$A^TA$$. Keeps eliminated blocks invertible
+    for variables that are only weakly constrained."""
+
+    block_structure: Optional[_SchurBlockStructure] = None
+    """Precomputed sparsity information for assembling explicit Schur complements.
+    Populated by `SchurComplementSolver.make()`, and only valid for Jacobians of the
+    graph passed in."""
+
+    @staticmethod
+    def make(
+        graph: "StackedFactorGraph",
+        eliminated_variable_types: Iterable[Type["VariableBase"]],
+        implicit: bool = False,
+        use_conjugate_gradient: bool = False,
+        tolerance: float = 1e-5,
+    ) -> "SchurComplementSolver":
+        """Create a Schur complement solver that eliminates all variables of a set of
+        types. Variables of the same type are stored contiguously, so each type maps to
+        a single block of the local storage vector.
+
+        Raises an `AssertionError` if any factor in the graph connects two eliminated
+        variables."""
+        eliminated_variable_types = tuple(eliminated_variable_types)
+        for stack in graph.factor_stacks:
+            eliminated_count = sum(
+                type(variable) in eliminated_variable_types
+                for variable in stack.factor.variables
+            )
+            assert eliminated_count <= 1, (
+                f"{type(stack.factor).__name__} connects {eliminated_count} eliminated"
+                " variables, but the eliminated block must be block diagonal"
+            )
+
+        local_storage_layout = graph.local_storage_layout
+        eliminated_blocks = tuple(
+            (
+                local_storage_layout.index_from_variable_type[variable_type],
+                local_storage_layout.count_from_variable_type[variable_type],
+                variable_type.get_local_parameter_dim(),
+            )
+            for variable_type in eliminated_variable_types
+        )
+        return SchurComplementSolver(
+            eliminated_blocks=eliminated_blocks,
+            implicit=implicit,
+            use_conjugate_gradient=use_conjugate_gradient,
+            tolerance=tolerance,
+            block_structure=None
+            if implicit
+            else _SchurBlockStructure.make(
+                rows=onp.asarray(graph.jacobian_coords.rows),
+                cols=onp.asarray(graph.jacobian_coords.cols),
+                eliminated_blocks=eliminated_blocks,
+                dim=local_storage_layout.dim,
+            ),
+        )
+
+    @overrides
+    def solve_subproblem(
+        self,
+        A: Union[SparseCooMatrix, LinearOperator],
+        ATb: hints.Array,
+        lambd: hints.Scalar,
+        iteration: hints.Scalar,  # Unused
+        ATA: Optional[SparseCooMatrix] = None,
+    ) -> jnp.ndarray:
+        assert isinstance(
+            A, SparseCooMatrix
+        ), "Schur complements require an explicit Jacobian"
+        assert len(A.values.shape) == 1, "A.values should be 1D"
+        assert len(ATb.shape) == 1, "ATb should be 1D!"
+        assert (
+            not self.implicit or self.use_conjugate_gradient
+        ), "Implicit Schur complements can only be solved with conjugate gradient"
+
+        # Split local storage indices into eliminated and kept sets. This is all static.
+        (dim,) = ATb.shape
+        eliminate_mask = _get_eliminate_mask(self.eliminated_blocks, dim)
+        keep_indices = onp.nonzero(~eliminate_mask)[0]
+
+        # Split Jacobian columns.
+        eliminate_flags = jnp.asarray(eliminate_mask)[A.coords.cols]
+        A_eliminate = SparseCooMatrix(
+            values=jnp.where(eliminate_flags, A.values, 0.0),
+            coords=A.coords,
+            shape=A.shape,
+        )
+        A_keep = SparseCooMatrix(
+            values=jnp.where(eliminate_flags, 0.0, A.values),
+            coords=A.coords,
+            shape=A.shape,
+        )
+
+        # Get diagonals of ATA, for regularization + Jacobi preconditioning
+        ATA_diagonals = jnp.zeros(dim).at[A.coords.cols].add(A.values**2)
+        damping = lambd * ATA_diagonals + self.diag_epsilon
+
+        # Factorize the eliminated diagonal blocks. Because the blocks are decoupled,
+        # each column of every block can be probed with a single product.
+        block_factors = []
+        for start, count, block_dim in self.eliminated_blocks:
+            block_columns = []
+            for i in range(block_dim):
+                probe_onp = onp.zeros(dim)
+                probe_onp[start + i : start + count * block_dim : block_dim] = 1.0
+                probe = jnp.asarray(probe_onp)
+                block_columns.append(
+                    (A_eliminate.T @ (A_eliminate @ probe) + damping * probe)[
+                        start : start + count * block_dim
+                    ].reshape((count, block_dim))
+                )
+            block_factors.append(
+                jax.vmap(lambda block: jax.scipy.linalg.cho_factor(block)[0])(
+                    jnp.stack(block_columns, axis=-1)
+                )
+            )
+
+        def apply_block_inverses(x: hints.Array) -> jnp.ndarray:
+            """Multiply a vector by the inverse of the eliminated block. Output is zero
+            outside of the eliminated indices."""
+            out = jnp.zeros(dim)
+            for (start, count, block_dim), block_factor in zip(
+                self.eliminated_blocks, block_factors
+            ):
+                end = start + count * block_dim
+                out = out.at[start:end].set(
+                    jax.vmap(lambda c, b: jax.scipy.linalg.cho_solve((c, False), b))(
+                        block_factor, x[start:end].reshape((count, block_dim))
+                    ).flatten()
+                )
+            return out
+
+        def schur_complement_function(x: hints.Array) -> jnp.ndarray:
+            """Apply the Schur complement to a vector that is zero outside of the kept
+            indices."""
+            A_keep_x = A_keep @ x
+            return (
+                A_keep.T @ A_keep_x
+                + damping * x
+                - A_keep.T
+                @ (A_eliminate @ apply_block_inverses(A_eliminate.T @ A_keep_x))
+            )
+
+        # Form reduced system.
+        reduced_ATb = jnp.where(eliminate_mask, 0.0, ATb) - A_keep.T @ (
+            A_eliminate @ apply_block_inverses(ATb)
+        )
+
+        # Solve reduced system.
+        x_keep: jnp.ndarray
+        if self.implicit:
+            x_keep, _unused_iterations, _unused_residual_norm = _conjugate_gradient(
+                A_function=schur_complement_function,
+                b=reduced_ATb,
+                x0=jnp.zeros(dim),
+                M_function=lambda x: jnp.where(
+                    eliminate_mask, 0.0, x / (ATA_diagonals + damping)
+                ),
+                tol=self.tolerance,
+                maxiter=len(keep_indices),
+            )
+        else:
+            schur_complement: jnp.ndarray
+            if self.block_structure is None:
+                schur_complement = jax.vmap(
+                    lambda i: schur_complement_function(jnp.zeros(dim).at[i].set(1.0))[
+                        keep_indices
+                    ]
+                )(keep_indices)
+            else:
+                schur_complement = self._assemble_schur_complement(
+                    A.values, damping[keep_indices], block_factors
+                )
+            if self.use_conjugate_gradient:
+                (
+                    solution,
+                    _unused_iterations,
+                    _unused_residual_norm,
+                ) = _conjugate_gradient(
+                    A_function=lambda x: schur_complement @ x,
+                    b=reduced_ATb[keep_indices],
+                    x0=jnp.zeros(len(keep_indices)),
+                    M_function=lambda x: x / jnp.diag(schur_complement),
+                    tol=self.tolerance,
+                    maxiter=len(keep_indices),
+                )
+            else:
+                solution = jax.scipy.linalg.cho_solve(
+                    jax.scipy.linalg.cho_factor(schur_complement),
+                    reduced_ATb[keep_indices],
+                )
+            x_keep = jnp.zeros(dim).at[keep_indices].set(solution)
+
+        # Back-substitute for eliminated variables.
+        x_eliminate = apply_block_inverses(ATb - A_eliminate.T @ (A_keep @ x_keep))
+        return x_keep + x_eliminate
+
+    def _assemble_schur_complement(
+        self,
+        values: hints.Array,
+        kept_damping: hints.Array,
+        block_factors: List[jnp.ndarray],
+    ) -> jnp.ndarray:
+        """Assemble the explicit Schur complement from Jacobian values. Work scales with
+        the number of Jacobian entry pairs that share a row, rather than with the
+        number of kept columns times the number of Jacobian entries."""
+        structure = self.block_structure
+        assert structure is not None
+        assert values.shape == (
+            structure.num_entries,
+        ), "Jacobian does not match the graph passed to `SchurComplementSolver.make()`"
+
+        # Kept block of the damped normal matrix.
+        (keep_dim,) = kept_damping.shape
+        kept_pairs = structure.kept_pairs
+        schur_complement = (
+            jnp.zeros((keep_dim, keep_dim))
+            .at[kept_pairs[:, 2], kept_pairs[:, 3]]
+            .add(values[kept_pairs[:, 0]] * values[kept_pairs[:, 1]])
+        ) + jnp.diag(kept_damping)
+
+        # Subtract `W_j^T B_j^-1 W_j` for each eliminated variable `j`, where `W_j` is
+        # the coupling block between `j` and its connected kept columns.
+        for (_start, count, block_dim), block_factor, pairs, slot_positions in zip(
+            self.eliminated_blocks,
+            block_factors,
+            structure.eliminated_pairs,
+            structure.eliminated_slot_positions,
+        ):
+            coupling_blocks = (
+                jnp.zeros((count, block_dim, slot_positions.shape[1]))
+                .at[pairs[:, 2], pairs[:, 3], pairs[:, 4]]
+                .add(values[pairs[:, 0]] * values[pairs[:, 1]])
+            )
+            reductions = jax.vmap(
+                lambda c, w: w.T @ jax.scipy.linalg.cho_solve((c, False), w)
+            )(block_factor, coupling_blocks)
+            schur_complement = schur_complement.at[
+                slot_positions[:, :, None], slot_positions[:, None, :]
+            ].add(-reductions, mode="drop")
+
+        return schur_complement
+
+
+@jdc.pytree_dataclass
+class AutoLinearSolver(LinearSubproblemSolverBase):
+    r"""Linear solver that selects a backend based on problem size and structure.
+
+    Selection happens at trace time, and uses only static information:
+    - Matrix-free problems (`LinearOperator` inputs) use `iterative_solver`.
+    - Problems with a small local parameter dimension use `dense_solver`.
+    - Batched problems (`batched=True`) use `iterative_solver`, which stays on-device.
+    - Problems where the normal equations are expected to be dense, which is estimated
+      from the number of Jacobian non-zeros per residual row, use `iterative_solver`.
+    - Everything else uses `sparse_direct_solver`.
+
+    Because the selected backend can change with problem size, the default backends
+    share `CholmodSolver`'s damping convention, $$(A^TA + \lambda I) x = A^Tb$$ (plus
+    small diagonal regularization for the direct solvers). This means that a damping
+    parameter has the same meaning regardless of which backend is selected. Custom
+    backends should be configured to match.
+    """
+
+    dense_solver: LinearSubproblemSolverBase = jdc.field(
+        default_factory=lambda: DenseCholeskySolver(scale_invariant_damping=False)
+    )
+    sparse_direct_solver: LinearSubproblemSolverBase = jdc.field(
+        default_factory=lambda: CholmodSolver()
+    )
+    iterative_solver: LinearSubproblemSolverBase = jdc.field(
+        default_factory=lambda: ConjugateGradientSolver(scale_invariant_damping=False)
+    )
+
+    dense_max_dim: int = jdc.static_field(default=2000)
+    """Largest local parameter dimension that we use the dense solver for."""
+
+    sparse_direct_max_normal_nnz: int = jdc.static_field(default=50_000_000)
+    """Upper bound on the estimated number of non-zeros in $$A^TA$$ for using the sparse
+    direct solver; denser problems are solved iteratively."""
+
+    batched: bool = jdc.static_field(default=False)
+    """Set to `True` when subproblems are solved under `vmap`, for example via
+    `NonlinearSolverBase.solve_batch()`. Batch axes aren't visible to the selection
+    logic, which runs on the unbatched problem inside of the nonlinear solver's loop."""
+
+    verbose: bool = jdc.static_field(default=False)
+    """Set to `True` to print solver selections. Printing happens at trace time."""
+
+    def select_solver(
+        self, A: Union[SparseCooMatrix, LinearOperator]
+    ) -> LinearSubproblemSolverBase:
+        """Select a linear solver for a given subproblem. Only shapes and static fields
+        are used."""
+        residual_dim, local_dim = A.shape
+        nnz = A.values.shape[-1] if isinstance(A, SparseCooMatrix) else None
+
+        # Each residual row with k non-zeros contributes up to k^2 entries to A^TA.
+        normal_nnz_estimate = (
+            residual_dim * (nnz / residual_dim) ** 2
+            if nnz is not None and residual_dim > 0
+            else 0
+        )
+
+        solver: LinearSubproblemSolverBase
+        if nnz is None:
+            # Matrix-free operators can only be solved iteratively.
+            solver = self.iterative_solver
+        elif local_dim <= self.dense_max_dim:
+            solver = self.dense_solver
+        elif self.batched or normal_nnz_estimate > self.sparse_direct_max_normal_nnz:
+            solver = self.iterative_solver
+        else:
+            solver = self.sparse_direct_solver
+
+        if self.verbose:
+            print(
+                f"[{type(self).__name__}]",
+                f"Selected {type(solver).__name__} (local dim={local_dim},"
+                f" nnz={nnz}, batched={self.batched})",
+            )
+        return solver
+
+    @overrides
+    def solve_subproblem(
+        self,
+        A: Union[SparseCooMatrix, LinearOperator],
+        ATb: hints.Array,
+        lambd: hints.Scalar,
+        iteration: hints.Scalar,
+        ATA: Optional[SparseCooMatrix] = None,
+    ) -> jnp.ndarray:
+        return self.select_solver(A).solve_subproblem(
+            A=A, ATb=ATb, lambd=lambd, iteration=iteration, ATA=ATA
+        )
+
+    @overrides
+    def initialize_state(self, dim: int) -> LinearSolverState:
+        # State is only used by iterative solvers.
+        return self.iterative_solver.initialize_state(dim)
+
+    @overrides
+    def solve_subproblem_stateful(
+        self,
+        A: Union[SparseCooMatrix, LinearOperator],
+        ATb: hints.Array,
+        lambd: hints.Scalar,
+        iteration: hints.Scalar,
+        state: LinearSolverState,
+        ATA: Optional[SparseCooMatrix] = None,
+    ) -> Tuple[jnp.ndarray, LinearSolverState]:
+        return self.select_solver(A).solve_subproblem_stateful(
+            A=A, ATb=ATb, lambd=lambd, iteration=iteration, state=state, ATA=ATA
+        )
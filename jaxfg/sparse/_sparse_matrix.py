@@ -1,4 +1,5 @@
-from typing import Tuple
+import dataclasses
+from typing import Callable, Optional, Tuple
 
 import jax_dataclasses as jdc
 import scipy
@@ -48,12 +49,11 @@ class SparseCooMatrix:
         )
 
     def as_dense(self) -> jnp.ndarray:
-        """Convert to a dense JAX array."""
-        # TODO: untested
+        """Convert to a dense JAX array. Duplicate entries are summed."""
         return (
             jnp.zeros(self.shape)
             .at[self.coords.rows, self.coords.cols]
-            .set(self.values)
+            .add(self.values)
         )
 
     @staticmethod
@@ -85,3 +85,38 @@ class SparseCooMatrix:
             ),
             shape=self.shape[::-1],
         )
+
+
+@dataclasses.dataclass(frozen=True)
+class LinearOperator:
+    """Matrix-free linear operator, defined by matrix-vector product functions.
+
+    Used in place of a `SparseCooMatrix` when we don't want to materialize a Jacobian.
+    Note that this is a vanilla dataclass -- not a PyTree -- and should only be used
+    within a single traced function."""
+
+    matvec: Callable[[hints.Array], jnp.ndarray]
+    """Computes `Ax`, where `x` is a 1D vector."""
+    rmatvec: Callable[[hints.Array], jnp.ndarray]
+    """Computes `A^Tx`, where `x` is a 1D vector."""
+    shape: Tuple[int, int]
+    """Shape of operator."""
+    ATA_diagonal: Optional[jnp.ndarray] = None
+    """Diagonal of `A^TA`, or equivalently squared column norms. Used for damping and
+    preconditioning in conjugate gradient solvers."""
+
+    def __matmul__(self, other: hints.Array) -> jnp.ndarray:
+        """Compute `Ax`, where `x` is a 1D vector."""
+        assert other.shape == (
+            self.shape[1],
+        ), "Inner product only supported for 1D vectors!"
+        return self.matvec(other)
+
+    @property
+    def T(self) -> "LinearOperator":
+        """Return transpose of our operator."""
+        return LinearOperator(
+            matvec=self.rmatvec,
+            rmatvec=self.matvec,
+            shape=self.shape[::-1],
+        )
@@ -0,0 +1,23 @@
+import numpy as onp
+import scipy
+import scipy.sparse
+import scipy.sparse.linalg
+
+
+def factorize_triangular(
+    R: scipy.sparse.spmatrix,
+) -> scipy.sparse.linalg.SuperLU:
+    """Prepare a sparse triangular matrix for repeated solves, via `.solve(b)` or
+    `.solve(b, trans="T")`. SuperLU without reordering or pivoting leaves triangular
+    matrices as-is, and is much faster than `scipy.sparse.linalg.spsolve_triangular()`.
+
+    Raises a `ValueError` if `R` has zeros on its diagonal, which typically means that
+    it was computed from a rank-deficient matrix."""
+    R = scipy.sparse.csc_matrix(R)
+    zero_diagonals = onp.flatnonzero(R.diagonal() == 0.0)
+    if zero_diagonals.shape[0] > 0:
+        raise ValueError(
+            f"Triangular factor is singular: {zero_diagonals.shape[0]} zero diagonal"
+            f" entries, the first at index {zero_diagonals[0]}"
+        )
+    return scipy.sparse.linalg.splu(R, permc_spec="NATURAL", diag_pivot_thresh=0.0)
@@ -0,0 +1,107 @@
+"""Benchmark for batched CHOLMOD solves, which are factorized in a host thread pool.
+
+Linearizes a pose graph loaded from a `.g2o` file, perturbs the Jacobian values to
+build a batch of same-structure linear subproblems, and reports throughput for a range
+of thread counts. Speedup and per-thread efficiency are reported relative to the first
+thread count.
+
+scikit-sparse does not release the GIL during CHOLMOD calls, so scaling is expected to
+be well below linear.
+
+For a summary of options:
+
+    python benchmark_batched_cholmod.py --help
+
+"""
+import dataclasses
+import os
+import pathlib
+import time
+from typing import List, Optional, Tuple
+
+import _g2o_utils
+import dcargs
+import jax
+import numpy as onp
+
+import jaxfg
+
+
+@dataclasses.dataclass
+class CliArgs:
+    g2o_path: pathlib.Path = pathlib.Path(__file__).parent / "data/input_M3500_g2o.g2o"
+    """Path to g2o file."""
+
+    batch_size: int = 64
+    """Number of linear subproblems to solve per batch."""
+
+    trials: int = 3
+    """Number of timed trials for each thread count. We report the best one."""
+
+    thread_counts: Optional[List[int]] = None
+    """Thread counts to benchmark. Defaults to powers of two up to the core count."""
+
+
+def main():
+    cli_args = dcargs.parse(CliArgs)
+
+    # Linearize graph
+    g2o: _g2o_utils.G2OData = _g2o_utils.parse_g2o(cli_args.g2o_path)
+    graph = jaxfg.core.StackedFactorGraph.make(g2o.factors)
+    assignments = jaxfg.core.VariableAssignments.make_from_dict(g2o.initial_poses)
+    residual_vector = graph.compute_whitened_residual_vector(assignments)
+    A = graph.compute_whitened_residual_jacobian(assignments, residual_vector)
+    ATb = A.T @ -residual_vector
+
+    # Build a batch of problems that share a sparsity pattern
+    A_values_batch = A.values[None, :] * (
+        1.0 + 0.01 * onp.random.randn(cli_args.batch_size, A.values.shape[0])
+    )
+    ATb_batch = onp.broadcast_to(ATb, (cli_args.batch_size,) + ATb.shape)
+
+    cpu_count = os.cpu_count() or 1
+    thread_counts = cli_args.thread_counts
+    if thread_counts is None:
+        thread_counts = [
+            2**i for i in range(cpu_count.bit_length()) if 2**i <= cpu_count
+        ]
+
+    print(f"Local dim: {A.shape[1]}, nnz: {A.values.shape[0]}, cores: {cpu_count}")
+    baseline: Optional[Tuple[int, float]] = None
+    for num_threads in thread_counts:
+        solver = jaxfg.sparse.CholmodSolver(num_threads=num_threads)
+
+        @jax.jit
+        @jax.vmap
+        def solve(A_values, ATb):
+            return solver.solve_subproblem(
+                A=dataclasses.replace(A, values=A_values),
+                ATb=ATb,
+                lambd=0.0,
+                iteration=0,
+            )
+
+        # Compile + analyze
+        solve(A_values_batch, ATb_batch).block_until_ready()
+
+        best_time = float("inf")
+        for _ in range(cli_args.trials):
+            start_time = time.perf_counter()
+            solve(A_values_batch, ATb_batch).block_until_ready()
+            best_time = min(best_time, time.perf_counter() - start_time)
+
+        if baseline is None:
+            baseline = (num_threads, best_time)
+        speedup = baseline[1] / best_time
+        efficiency = speedup * baseline[0] / num_threads
+        print(
+            f"threads={num_threads:<4}"
+            f" throughput={cli_args.batch_size / best_time:10.2f} solves/sec"
+            f" batch time={best_time:.4f} sec"
+            f" speedup={speedup:5.2f}x"
+            f" efficiency={efficiency * 100.0:5.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark for solving multi-session pose graphs, where sessions aren't connected.
+
+Loads several sessions from a `.g2o` file, and compares wall-clock time and final cost
+of `DecomposedFactorGraph`, which batches sessions with the same structure and solves
+them in parallel, against solving all sessions as one graph with `graph.solve()`.
+
+For a summary of options:
+
+    python benchmark_decomposed_solve.py --help
+
+"""
+import dataclasses
+import pathlib
+import time
+from typing import List, Tuple
+
+import _g2o_utils
+import dcargs
+
+import jaxfg
+
+
+@dataclasses.dataclass
+class CliArgs:
+    g2o_path: pathlib.Path = pathlib.Path(__file__).parent / "data/input_M3500_g2o.g2o"
+    """Path to g2o file."""
+
+    session_pose_counts: Tuple[int, ...] = (500, 500, 500, 500, 300)
+    """Number of poses to load from the g2o file for each session."""
+
+
+def main():
+    cli_args = dcargs.parse(CliArgs)
+
+    # Each parse creates new variables, so sessions are disconnected.
+    factors: List[jaxfg.core.FactorBase] = []
+    initial_poses = {}
+    for pose_count in cli_args.session_pose_counts:
+        g2o: _g2o_utils.G2OData = _g2o_utils.parse_g2o(
+            cli_args.g2o_path, pose_count_limit=pose_count
+        )
+        factors.extend(g2o.factors)
+        initial_poses.update(g2o.initial_poses)
+    initial_assignments = jaxfg.core.VariableAssignments.make_from_dict(initial_poses)
+    solver = jaxfg.solvers.GaussNewtonSolver(verbose=False)
+
+    # We solve twice to exclude compile time.
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    graph.solve(initial_assignments, solver=solver).storage.block_until_ready()
+    start_time = time.perf_counter()
+    solution = graph.solve(initial_assignments, solver=solver)
+    solution.storage.block_until_ready()
+    print(
+        f"Joint:      time={time.perf_counter() - start_time:.4f} sec,"
+        f" cost={float(graph.compute_cost(solution)[0])}"
+    )
+
+    decomposed_graph = jaxfg.experimental.DecomposedFactorGraph.make(factors)
+    decomposed_graph.solve(initial_assignments, solver=solver)
+    start_time = time.perf_counter()
+    solution = decomposed_graph.solve(initial_assignments, solver=solver)
+    solution.storage.block_until_ready()
+    print(
+        f"Decomposed: time={time.perf_counter() - start_time:.4f} sec,"
+        f" cost={float(graph.compute_cost(solution)[0])},"
+        f" components={len(decomposed_graph.get_components())}"
+    )
+
+
+if __name__ == "__main__":
+    main()
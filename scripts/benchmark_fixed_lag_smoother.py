@@ -0,0 +1,76 @@
+"""Benchmark for fixed-lag smoothing of pose graphs.
+
+Loads a pose graph from a `.g2o` file and replays it one pose at a time, as in online
+SLAM. Reports per-update latencies of `FixedLagSmoother`, which should stay bounded as
+the graph grows. Loop closures to poses that have already left the window are dropped.
+
+For a summary of options:
+
+    python benchmark_fixed_lag_smoother.py --help
+
+"""
+import dataclasses
+import pathlib
+import time
+from typing import Dict, List
+
+import _g2o_utils
+import dcargs
+import numpy as onp
+
+import jaxfg
+
+
+@dataclasses.dataclass
+class CliArgs:
+    g2o_path: pathlib.Path = pathlib.Path(__file__).parent / "data/input_M3500_g2o.g2o"
+    """Path to g2o file."""
+
+    pose_count_limit: int = 1000
+    """Number of poses to load from the g2o file."""
+
+    window_size: int = 20
+    """Number of poses to keep in the smoother's window."""
+
+    report_interval: int = 100
+    """Poses between latency reports."""
+
+
+def main():
+    cli_args = dcargs.parse(CliArgs)
+
+    g2o: _g2o_utils.G2OData = _g2o_utils.parse_g2o(
+        cli_args.g2o_path, pose_count_limit=cli_args.pose_count_limit
+    )
+    pose_variables = list(g2o.initial_poses.keys())
+    order_from_variable = {variable: i for i, variable in enumerate(pose_variables)}
+
+    # Each factor is added with the newest pose it's connected to.
+    factors_from_pose: Dict[int, List[jaxfg.core.FactorBase]] = {}
+    for factor in g2o.factors:
+        orders = [order_from_variable[variable] for variable in factor.variables]
+        if max(orders) - min(orders) >= cli_args.window_size:
+            continue
+        factors_from_pose.setdefault(max(orders), []).append(factor)
+
+    smoother = jaxfg.experimental.FixedLagSmoother(window_size=cli_args.window_size)
+    update_times: List[float] = []
+    for i, variable in enumerate(pose_variables):
+        start_time = time.perf_counter()
+        smoother.update(
+            factors_from_pose.get(i, []), {variable: g2o.initial_poses[variable]}
+        )
+        update_times.append(time.perf_counter() - start_time)
+
+        if (i + 1) % cli_args.report_interval == 0:
+            recent = onp.array(update_times[-cli_args.report_interval :])
+            print(
+                f"Poses: {i + 1:5d},"
+                f" update median={onp.median(recent):.4f} sec"
+                f" max={recent.max():.4f} sec,"
+                f" window factors={len(smoother.get_factors())}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark for incremental smoothing of pose graphs.
+
+Loads a pose graph from a `.g2o` file and replays it one pose at a time, as in online
+SLAM. Compares per-keyframe update times of `IncrementalSmoother` against re-solving
+the full graph with `graph.solve()` at each keyframe.
+
+For a summary of options:
+
+    python benchmark_incremental_smoother.py --help
+
+"""
+import dataclasses
+import pathlib
+import time
+from typing import Dict, List
+
+import _g2o_utils
+import dcargs
+import numpy as onp
+
+import jaxfg
+
+
+@dataclasses.dataclass
+class CliArgs:
+    g2o_path: pathlib.Path = pathlib.Path(__file__).parent / "data/input_M3500_g2o.g2o"
+    """Path to g2o file."""
+
+    pose_count_limit: int = 1000
+    """Number of poses to load from the g2o file."""
+
+    relinearize_threshold: float = 0.1
+    """Relinearization threshold for the incremental smoother."""
+
+    batch_solve_interval: int = 100
+    """Keyframes between full-graph solves, which are slow. Set to 0 to skip them."""
+
+
+def main():
+    cli_args = dcargs.parse(CliArgs)
+
+    g2o: _g2o_utils.G2OData = _g2o_utils.parse_g2o(
+        cli_args.g2o_path, pose_count_limit=cli_args.pose_count_limit
+    )
+    pose_variables = list(g2o.initial_poses.keys())
+    order_from_variable = {variable: i for i, variable in enumerate(pose_variables)}
+
+    # Each factor is added with the newest pose it's connected to.
+    factors_from_pose: Dict[int, List[jaxfg.core.FactorBase]] = {}
+    for factor in g2o.factors:
+        factors_from_pose.setdefault(
+            max(order_from_variable[variable] for variable in factor.variables), []
+        ).append(factor)
+
+    smoother = jaxfg.experimental.IncrementalSmoother(
+        relinearize_threshold=cli_args.relinearize_threshold
+    )
+    update_times: List[float] = []
+    batch_times: List[float] = []
+    for i, variable in enumerate(pose_variables):
+        start_time = time.perf_counter()
+        smoother.update(
+            factors_from_pose.get(i, []), {variable: g2o.initial_poses[variable]}
+        )
+        update_times.append(time.perf_counter() - start_time)
+
+        if (
+            cli_args.batch_solve_interval > 0
+            and (i + 1) % cli_args.batch_solve_interval == 0
+        ):
+            graph = jaxfg.core.StackedFactorGraph.make(smoother.get_factors())
+            start_time = time.perf_counter()
+            graph.solve(
+                jaxfg.core.VariableAssignments.make_from_dict(
+                    {v: g2o.initial_poses[v] for v in pose_variables[: i + 1]}
+                ),
+                solver=jaxfg.solvers.GaussNewtonSolver(verbose=False),
+            ).storage.block_until_ready()
+            batch_times.append(time.perf_counter() - start_time)
+
+            recent = onp.array(update_times[-cli_args.batch_solve_interval :])
+            print(
+                f"Poses: {i + 1:5d},"
+                f" incremental update median={onp.median(recent):.4f} sec"
+                f" max={recent.max():.4f} sec,"
+                f" full solve={batch_times[-1]:.4f} sec"
+            )
+
+    graph = jaxfg.core.StackedFactorGraph.make(smoother.get_factors())
+    print(
+        f"Final cost: {float(graph.compute_cost(smoother.get_assignments())[0])},"
+        f" total incremental time: {sum(update_times):.4f} sec"
+    )
+
+
+if __name__ == "__main__":
+    main()
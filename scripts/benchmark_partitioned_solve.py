@@ -0,0 +1,84 @@
+"""Benchmark for partitioned solves of pose graphs.
+
+Loads a pose graph from a `.g2o` file, and compares wall-clock time and final cost of
+`PartitionedSolver`, which solves parts of the graph in parallel worker processes,
+against solving the full graph with `graph.solve()`. `PartitionedSolver` is a prototype:
+expect it to be slower, and to terminate at a higher cost.
+
+For a summary of options:
+
+    python benchmark_partitioned_solve.py --help
+
+"""
+import dataclasses
+import pathlib
+import time
+
+import _g2o_utils
+import dcargs
+
+import jaxfg
+
+
+@dataclasses.dataclass
+class CliArgs:
+    g2o_path: pathlib.Path = pathlib.Path(__file__).parent / "data/input_M3500_g2o.g2o"
+    """Path to g2o file."""
+
+    pose_count_limit: int = 1000
+    """Number of poses to load from the g2o file."""
+
+    num_parts: int = 4
+    """Number of parts to split the graph into."""
+
+    penalty: float = 1.0
+    """ADMM penalty parameter."""
+
+    max_iterations: int = 50
+    """Maximum number of ADMM iterations."""
+
+    use_processes: bool = True
+    """Solve each part in its own worker process."""
+
+
+def main():
+    cli_args = dcargs.parse(CliArgs)
+
+    g2o: _g2o_utils.G2OData = _g2o_utils.parse_g2o(
+        cli_args.g2o_path, pose_count_limit=cli_args.pose_count_limit
+    )
+    graph = jaxfg.core.StackedFactorGraph.make(g2o.factors)
+    initial_assignments = jaxfg.core.VariableAssignments.make_from_dict(
+        g2o.initial_poses
+    )
+    solver = jaxfg.solvers.LevenbergMarquardtSolver(verbose=False)
+
+    # Full graph. We solve twice to exclude compile time.
+    graph.solve(initial_assignments, solver=solver).storage.block_until_ready()
+    start_time = time.perf_counter()
+    solution = graph.solve(initial_assignments, solver=solver)
+    solution.storage.block_until_ready()
+    print(
+        f"Full graph:  time={time.perf_counter() - start_time:.4f} sec,"
+        f" cost={float(graph.compute_cost(solution)[0])}"
+    )
+
+    # Partitioned. Note that this includes compile time in each worker.
+    partition = jaxfg.experimental.partition_variables(
+        g2o.factors, num_parts=cli_args.num_parts
+    )
+    start_time = time.perf_counter()
+    solution = jaxfg.experimental.PartitionedSolver(
+        solver=solver,
+        penalty=cli_args.penalty,
+        max_iterations=cli_args.max_iterations,
+        use_processes=cli_args.use_processes,
+    ).solve(g2o.factors, initial_assignments, partition=partition)
+    print(
+        f"Partitioned: time={time.perf_counter() - start_time:.4f} sec,"
+        f" cost={float(graph.compute_cost(solution)[0])}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark for batched nonlinear solves of same-structure factor graphs.
+
+Loads a pose graph from a `.g2o` file, perturbs its initial poses to build a batch of
+problems, and compares the throughput of `solver.solve_batch()`, with and without
+compaction, against solving each problem with `graph.solve()`.
+
+For a summary of options:
+
+    python benchmark_solve_batch.py --help
+
+"""
+import dataclasses
+import enum
+import pathlib
+import time
+
+import _g2o_utils
+import dcargs
+import jax
+import numpy as onp
+from jax import numpy as jnp
+
+import jaxfg
+
+
+class LinearSolverType(enum.Enum):
+    CONJUGATE_GRADIENT = enum.auto()
+    DENSE_CHOLESKY = enum.auto()
+
+
+@dataclasses.dataclass
+class CliArgs:
+    g2o_path: pathlib.Path = pathlib.Path(__file__).parent / "data/input_M3500_g2o.g2o"
+    """Path to g2o file."""
+
+    pose_count_limit: int = 100
+    """Number of poses to load from the g2o file."""
+
+    batch_size: int = 64
+    """Number of problems to solve per batch."""
+
+    linear_solver_type: LinearSolverType = LinearSolverType.DENSE_CHOLESKY
+    """Linear solver to use for subproblems."""
+
+    compaction_interval: int = 5
+    """Iterations between batch compactions, for the compacted batch solve."""
+
+    trials: int = 3
+    """Number of timed trials. We report the best one."""
+
+
+def main():
+    cli_args = dcargs.parse(CliArgs)
+
+    # Build a batch of problems with perturbed initial poses
+    g2o: _g2o_utils.G2OData = _g2o_utils.parse_g2o(
+        cli_args.g2o_path, pose_count_limit=cli_args.pose_count_limit
+    )
+    graph = jaxfg.core.StackedFactorGraph.make(g2o.factors)
+    assignments_list = [
+        jaxfg.core.VariableAssignments.make_from_dict(
+            {
+                variable: pose
+                @ type(pose).exp(
+                    0.05 * onp.random.randn(variable.get_local_parameter_dim())
+                )
+                for variable, pose in g2o.initial_poses.items()
+            }
+        )
+        for _ in range(cli_args.batch_size)
+    ]
+    graph_batch = jax.tree_map(
+        lambda leaf: jnp.broadcast_to(leaf, (cli_args.batch_size,) + leaf.shape),
+        graph,
+    )
+    assignments_batch = jax.tree_map(
+        lambda *leaves: jnp.stack(leaves), *assignments_list
+    )
+
+    linear_solver: jaxfg.sparse.LinearSubproblemSolverBase = {
+        LinearSolverType.CONJUGATE_GRADIENT: jaxfg.sparse.ConjugateGradientSolver(),
+        LinearSolverType.DENSE_CHOLESKY: jaxfg.sparse.DenseCholeskySolver(),
+    }[cli_args.linear_solver_type]
+    solver = jaxfg.solvers.LevenbergMarquardtSolver(
+        linear_solver=linear_solver, verbose=False
+    )
+
+    def solve_loop() -> None:
+        for assignments in assignments_list:
+            graph.solve(assignments, solver=solver).storage.block_until_ready()
+
+    def solve_batch() -> jaxfg.solvers.NonlinearSolverState:
+        state_batch = solver.solve_batch(
+            graph_batch, assignments_batch, compaction_interval=None
+        )
+        state_batch.assignments.storage.block_until_ready()
+        return state_batch
+
+    def solve_batch_compacted() -> jaxfg.solvers.NonlinearSolverState:
+        state_batch = solver.solve_batch(
+            graph_batch,
+            assignments_batch,
+            compaction_interval=cli_args.compaction_interval,
+        )
+        state_batch.assignments.storage.block_until_ready()
+        return state_batch
+
+    print(
+        f"Local dim: {graph.local_storage_layout.dim}, batch size:"
+        f" {cli_args.batch_size}"
+    )
+    for name, solve in (
+        ("loop", solve_loop),
+        ("batch", solve_batch),
+        ("compacted", solve_batch_compacted),
+    ):
+        # Compile
+        out = solve()
+
+        best_time = float("inf")
+        for _ in range(cli_args.trials):
+            start_time = time.perf_counter()
+            solve()
+            best_time = min(best_time, time.perf_counter() - start_time)
+
+        print(
+            f"{name:<12}"
+            f" throughput={cli_args.batch_size / best_time:10.2f} solves/sec"
+            f" batch time={best_time:.4f} sec"
+        )
+
+    assert out is not None
+    print(
+        f"Iterations per problem: min={int(out.iterations.min())},"
+        f" max={int(out.iterations.max())}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark for multi-start solves of pose graphs.
+
+Loads a pose graph from a `.g2o` file, and builds a batch of initializations by
+perturbing its initial poses. Compares `solver.solve_multistart()`, which optimizes all
+starts together, with and without compaction, against calling `graph.solve()` for each
+start.
+
+For a summary of options:
+
+    python benchmark_solve_multistart.py --help
+
+"""
+import dataclasses
+import enum
+import pathlib
+import time
+
+import _g2o_utils
+import dcargs
+import jax
+import jaxlie
+import numpy as onp
+from jax import numpy as jnp
+
+import jaxfg
+
+
+class LinearSolverType(enum.Enum):
+    CONJUGATE_GRADIENT = enum.auto()
+    DENSE_CHOLESKY = enum.auto()
+
+
+@dataclasses.dataclass
+class CliArgs:
+    g2o_path: pathlib.Path = pathlib.Path(__file__).parent / "data/input_M3500_g2o.g2o"
+    """Path to g2o file."""
+
+    pose_count_limit: int = 100
+    """Number of poses to load from the g2o file."""
+
+    num_starts: int = 16
+    """Number of initializations."""
+
+    perturbation_scale: float = 0.5
+    """Standard deviation of perturbations applied to initial poses, in the tangent
+    space."""
+
+    linear_solver_type: LinearSolverType = LinearSolverType.DENSE_CHOLESKY
+    """Linear solver to use for subproblems."""
+
+
+def main():
+    cli_args = dcargs.parse(CliArgs)
+
+    g2o: _g2o_utils.G2OData = _g2o_utils.parse_g2o(
+        cli_args.g2o_path, pose_count_limit=cli_args.pose_count_limit
+    )
+    graph = jaxfg.core.StackedFactorGraph.make(g2o.factors)
+    assignments_list = [
+        jaxfg.core.VariableAssignments.make_from_dict(
+            {
+                variable: pose
+                @ jaxlie.SE2.exp(onp.random.randn(3) * cli_args.perturbation_scale)
+                for variable, pose in g2o.initial_poses.items()
+            }
+        )
+        for _ in range(cli_args.num_starts)
+    ]
+    assignments_batch = jax.tree_map(
+        lambda *leaves: jnp.stack(leaves), *assignments_list
+    )
+    linear_solver: jaxfg.sparse.LinearSubproblemSolverBase = {
+        LinearSolverType.CONJUGATE_GRADIENT: jaxfg.sparse.ConjugateGradientSolver(),
+        LinearSolverType.DENSE_CHOLESKY: jaxfg.sparse.DenseCholeskySolver(),
+    }[cli_args.linear_solver_type]
+    solver = jaxfg.solvers.LevenbergMarquardtSolver(
+        linear_solver=linear_solver, verbose=False
+    )
+
+    # Sequential. We solve once first to exclude compile time.
+    graph.solve(assignments_list[0], solver=solver).storage.block_until_ready()
+    start_time = time.perf_counter()
+    costs = []
+    for assignments in assignments_list:
+        solution = graph.solve(assignments, solver=solver)
+        costs.append(float(graph.compute_cost(solution)[0]))
+    print(
+        f"{'Sequential:':<12} time={time.perf_counter() - start_time:.4f} sec,"
+        f" best cost={min(costs)}"
+    )
+
+    # Multi-start.
+    for name, compaction_interval in (("Masked", None), ("Compacted", 5)):
+        solver.solve_multistart(
+            graph, assignments_batch, compaction_interval=compaction_interval
+        )[0].storage.block_until_ready()
+        start_time = time.perf_counter()
+        solution, costs = solver.solve_multistart(
+            graph, assignments_batch, compaction_interval=compaction_interval
+        )
+        solution.storage.block_until_ready()
+        print(
+            f"{name + ':':<12} time={time.perf_counter() - start_time:.4f} sec,"
+            f" best cost={float(graph.compute_cost(solution)[0])},"
+            f" costs min/median/max={costs.min()}/{onp.median(costs)}/{costs.max()}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,9 @@ setup(
             # "hypothesis",
             # "hypothesis[numpy]",
         ],
+        "qr": [
+            "sparseqr",
+        ],
         "type-checking": [
             "mypy",
             "types-termcolor",
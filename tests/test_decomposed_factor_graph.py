@@ -0,0 +1,101 @@
+from typing import Dict, List, Tuple
+
+import jaxlie
+import numpy as onp
+
+import jaxfg
+
+
+def _make_session(
+    num_poses: int,
+) -> Tuple[List[jaxfg.core.FactorBase], Dict[jaxfg.geometry.SE2Variable, jaxlie.SE2]]:
+    """Make a pose graph that isn't connected to any others."""
+    pose_variables = [jaxfg.geometry.SE2Variable() for _ in range(num_poses)]
+    poses = [jaxlie.SE2.from_xy_theta(*onp.random.randn(3)) for _ in pose_variables]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 1.0, 0.5]
+    )
+
+    factors: List[jaxfg.core.FactorBase] = [
+        jaxfg.geometry.PriorFactor.make(
+            variable=pose_variables[0], mu=poses[0], noise_model=noise_model
+        )
+    ]
+    for i in range(num_poses - 1):
+        for j in range(i + 1, min(i + 3, num_poses)):
+            factors.append(
+                jaxfg.geometry.BetweenFactor.make(
+                    variable_T_world_a=pose_variables[i],
+                    variable_T_world_b=pose_variables[j],
+                    T_a_b=(poses[i].inverse() @ poses[j])
+                    @ jaxlie.SE2.exp(onp.random.randn(3) * 0.05),
+                    noise_model=noise_model,
+                )
+            )
+    return factors, {
+        variable: pose @ jaxlie.SE2.exp(onp.random.randn(3) * 0.2)
+        for variable, pose in zip(pose_variables, poses)
+    }
+
+
+def test_find_connected_components():
+    sessions = [_make_session(num_poses) for num_poses in (3, 4, 3)]
+
+    # Interleave factors from each session.
+    factors: List[jaxfg.core.FactorBase] = []
+    for i in range(max(len(session_factors) for session_factors, _ in sessions)):
+        for session_factors, _unused_values in sessions:
+            if i < len(session_factors):
+                factors.append(session_factors[i])
+    components = jaxfg.experimental.find_connected_components(factors)
+    assert components == [factors for factors, _unused_values in sessions]
+
+
+def test_decomposed_factor_graph():
+    sessions = [_make_session(num_poses) for num_poses in (5, 7, 5, 5)]
+    factors = [factor for factors, _unused_values in sessions for factor in factors]
+
+    # Variables that aren't connected to any factors should be passed through.
+    unconnected_variable = jaxfg.geometry.SE2Variable()
+    initial_assignments = jaxfg.core.VariableAssignments.make_from_dict(
+        {
+            unconnected_variable: jaxlie.SE2.from_xy_theta(1.0, 2.0, 3.0),
+            **{
+                variable: value
+                for _unused_factors, values in sessions
+                for variable, value in values.items()
+            },
+        }
+    )
+
+    decomposed_graph = jaxfg.experimental.DecomposedFactorGraph.make(factors)
+    assert len(decomposed_graph.get_components()) == 4
+    assert len(decomposed_graph._batches) == 2
+
+    solver = jaxfg.solvers.GaussNewtonSolver(verbose=False)
+    solution = decomposed_graph.solve(initial_assignments, solver=solver)
+    assert solution.storage_layout == initial_assignments.storage_layout
+    onp.testing.assert_array_equal(
+        solution.get_value(unconnected_variable).parameters(),
+        initial_assignments.get_value(unconnected_variable).parameters(),
+    )
+
+    # Compare against solving everything as a single graph.
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    solution_joint = graph.solve(
+        jaxfg.core.VariableAssignments.make_from_dict(
+            {
+                variable: value
+                for _unused_factors, values in sessions
+                for variable, value in values.items()
+            }
+        ),
+        solver=solver,
+    )
+    for variable in graph.get_variables():
+        onp.testing.assert_allclose(
+            solution.get_value(variable).parameters(),
+            solution_joint.get_value(variable).parameters(),
+            rtol=1e-3,
+            atol=1e-3,
+        )
@@ -0,0 +1,169 @@
+from typing import List, Tuple
+
+import jax_dataclasses as jdc
+import jaxlie
+import numpy as onp
+from jax import numpy as jnp
+from overrides import overrides
+
+import jaxfg
+
+Vector2 = jaxfg.core.RealVectorVariable[2]
+
+
+@jdc.pytree_dataclass
+class _PriorFactor(jaxfg.core.FactorBase[Tuple[jnp.ndarray]]):
+    mu: jnp.ndarray
+
+    @overrides
+    def compute_residual_vector(
+        self, variable_values: Tuple[jnp.ndarray]
+    ) -> jnp.ndarray:
+        (x,) = variable_values
+        return x - self.mu
+
+
+@jdc.pytree_dataclass
+class _DifferenceFactor(jaxfg.core.FactorBase[Tuple[jnp.ndarray, jnp.ndarray]]):
+    delta: jnp.ndarray
+
+    @overrides
+    def compute_residual_vector(
+        self, variable_values: Tuple[jnp.ndarray, jnp.ndarray]
+    ) -> jnp.ndarray:
+        a, b = variable_values
+        return b - a - self.delta
+
+
+def test_fixed_lag_smoother_linear():
+    """For linear problems, marginalization is exact: estimates in the window should
+    match a batch solve of the full graph."""
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 2.0]
+    )
+    smoother = jaxfg.experimental.FixedLagSmoother(window_size=3)
+
+    variables: List[jaxfg.core.VariableBase] = []
+    factors: List[jaxfg.core.FactorBase] = []
+    for i in range(8):
+        variable = Vector2()
+        new_factors: List[jaxfg.core.FactorBase] = [
+            _PriorFactor(
+                variables=(variable,),
+                mu=jnp.array(onp.random.randn(2)),
+                noise_model=noise_model,
+            )
+        ]
+        if i > 0:
+            new_factors.append(
+                _DifferenceFactor(
+                    variables=(variables[-1], variable),
+                    delta=jnp.array(onp.random.randn(2)),
+                    noise_model=noise_model,
+                )
+            )
+        if i > 1:
+            new_factors.append(
+                _DifferenceFactor(
+                    variables=(variables[-2], variable),
+                    delta=jnp.array(onp.random.randn(2)),
+                    noise_model=noise_model,
+                )
+            )
+        variables.append(variable)
+        factors.extend(new_factors)
+        smoother.update(new_factors, {variable: onp.zeros(2)})
+
+    window_assignments = smoother.get_assignments()
+    assert list(window_assignments.get_variables()) == variables[-3:]
+
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    solution = graph.solve(
+        jaxfg.core.VariableAssignments.make_from_defaults(variables),
+        solver=jaxfg.solvers.GaussNewtonSolver(verbose=False),
+    )
+    for variable in variables[-3:]:
+        onp.testing.assert_allclose(
+            window_assignments.get_value(variable),
+            solution.get_value(variable),
+            rtol=1e-4,
+            atol=1e-4,
+        )
+
+
+def test_fixed_lag_smoother_pose_graph():
+    pose_variables = [jaxfg.geometry.SE2Variable() for _ in range(15)]
+    poses = [
+        jaxlie.SE2.from_xy_theta(float(i), onp.sin(i * 0.3), i * 0.2)
+        for i in range(len(pose_variables))
+    ]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[0.1, 0.1, 0.05]
+    )
+    smoother = jaxfg.experimental.FixedLagSmoother(window_size=4)
+
+    factors: List[jaxfg.core.FactorBase] = []
+    for i, variable in enumerate(pose_variables):
+        new_factors: List[jaxfg.core.FactorBase] = (
+            [
+                jaxfg.geometry.PriorFactor.make(
+                    variable=variable, mu=poses[0], noise_model=noise_model
+                )
+            ]
+            if i == 0
+            else [
+                jaxfg.geometry.BetweenFactor.make(
+                    variable_T_world_a=pose_variables[j],
+                    variable_T_world_b=variable,
+                    T_a_b=(poses[j].inverse() @ poses[i])
+                    @ jaxlie.SE2.exp(onp.random.randn(3) * 0.01),
+                    noise_model=noise_model,
+                )
+                for j in range(max(i - 2, 0), i)
+            ]
+        )
+        factors.extend(new_factors)
+        smoother.update(
+            new_factors,
+            {variable: poses[i] @ jaxlie.SE2.exp(onp.random.randn(3) * 0.1)},
+        )
+
+        # Window and factor count should stay bounded.
+        assert len(smoother.get_assignments().get_variables()) <= 4
+        assert len(smoother.get_factors()) <= 6
+
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    solution = graph.solve(
+        jaxfg.core.VariableAssignments.make_from_dict(dict(zip(pose_variables, poses))),
+        solver=jaxfg.solvers.GaussNewtonSolver(verbose=False),
+    )
+    window_assignments = smoother.get_assignments()
+    for variable in window_assignments.get_variables():
+        onp.testing.assert_allclose(
+            window_assignments.get_value(variable).parameters(),
+            solution.get_value(variable).parameters(),
+            rtol=1e-2,
+            atol=1e-2,
+        )
+
+
+def test_fixed_lag_smoother_unconstrained():
+    """Without a prior, the window has a gauge freedom; damping should keep the normal
+    equations solvable."""
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 1.0]
+    )
+    smoother = jaxfg.experimental.FixedLagSmoother(window_size=3)
+
+    a = Vector2()
+    b = Vector2()
+    delta = jnp.array([1.0, -2.0])
+    smoother.update(
+        [_DifferenceFactor(variables=(a, b), delta=delta, noise_model=noise_model)],
+        {a: onp.zeros(2), b: onp.zeros(2)},
+    )
+
+    assignments = smoother.get_assignments()
+    onp.testing.assert_allclose(
+        assignments.get_value(b) - assignments.get_value(a), delta, atol=1e-4
+    )
@@ -0,0 +1,140 @@
+from typing import List, Tuple
+
+import jax
+import jax_dataclasses as jdc
+import jaxlie
+import numpy as onp
+import pytest
+
+import jaxfg
+
+
+def _make_pose_graph() -> Tuple[
+    List[jaxfg.geometry.SE2Variable],
+    List[jaxfg.core.FactorBase],
+    jaxfg.core.VariableAssignments,
+]:
+    pose_variables = [jaxfg.geometry.SE2Variable() for _ in range(6)]
+    poses = [
+        jaxlie.SE2.from_xy_theta(float(i), onp.sin(i * 0.5), i * 0.3)
+        for i in range(len(pose_variables))
+    ]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[0.1, 0.1, 0.05]
+    )
+    factors: List[jaxfg.core.FactorBase] = [
+        jaxfg.geometry.BetweenFactor.make(
+            variable_T_world_a=pose_variables[i],
+            variable_T_world_b=pose_variables[j],
+            T_a_b=(poses[i].inverse() @ poses[j])
+            @ jaxlie.SE2.exp(onp.random.randn(3) * 0.05),
+            noise_model=noise_model,
+        )
+        for i, j in [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (0, 3), (2, 5)]
+    ]
+    initial_assignments = jaxfg.core.VariableAssignments.make_from_dict(
+        {
+            variable: pose @ jaxlie.SE2.exp(onp.random.randn(3) * 0.2)
+            for variable, pose in zip(pose_variables, poses)
+        }
+    )
+    return pose_variables, factors, initial_assignments
+
+
+@pytest.mark.parametrize(
+    "solver,compute_hessian_pattern",
+    [
+        (jaxfg.solvers.GaussNewtonSolver(verbose=False), False),
+        (jaxfg.solvers.GaussNewtonSolver(verbose=False), True),
+        (
+            jaxfg.solvers.GaussNewtonSolver(
+                linear_solver=jaxfg.sparse.ConjugateGradientSolver(tolerance=1e-8),
+                matrix_free=True,
+                verbose=False,
+            ),
+            False,
+        ),
+        (jaxfg.solvers.LevenbergMarquardtSolver(verbose=False), False),
+        (jaxfg.solvers.DoglegSolver(verbose=False), False),
+    ],
+)
+def test_fixed_variables(
+    solver: jaxfg.solvers.NonlinearSolverBase, compute_hessian_pattern: bool
+):
+    pose_variables, factors, initial_assignments = _make_pose_graph()
+    fixed_variables = [pose_variables[0], pose_variables[3]]
+
+    graph = jaxfg.core.StackedFactorGraph.make(
+        factors, compute_hessian_pattern=compute_hessian_pattern
+    ).with_fixed_variables(fixed_variables)
+    solution = graph.solve(initial_assignments, solver=solver)
+
+    # Fixed variables should be exactly unchanged.
+    for variable in fixed_variables:
+        onp.testing.assert_array_equal(
+            solution.get_value(variable).parameters(),
+            initial_assignments.get_value(variable).parameters(),
+        )
+
+    # Free variables should match a solve where fixed variables are pinned by stiff
+    # priors.
+    stiff_graph = jaxfg.core.StackedFactorGraph.make(
+        factors
+        + [
+            jaxfg.geometry.PriorFactor.make(
+                variable=variable,
+                mu=initial_assignments.get_value(variable),
+                noise_model=jaxfg.noises.DiagonalGaussian(
+                    sqrt_precision_diagonal=onp.full(3, 1e3)
+                ),
+            )
+            for variable in fixed_variables
+        ]
+    )
+    stiff_solution = stiff_graph.solve(
+        initial_assignments,
+        solver=jaxfg.solvers.GaussNewtonSolver(verbose=False),
+    )
+    onp.testing.assert_allclose(
+        graph.compute_cost(solution)[0],
+        graph.compute_cost(stiff_solution)[0],
+        rtol=1e-3,
+    )
+    onp.testing.assert_allclose(
+        solution.storage, stiff_solution.storage, rtol=1e-2, atol=1e-2
+    )
+
+
+def test_fixed_variables_no_recompile():
+    pose_variables, factors, initial_assignments = _make_pose_graph()
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+
+    trace_count = 0
+
+    @jax.jit
+    def solve(
+        graph: jaxfg.core.StackedFactorGraph,
+        initial_assignments: jaxfg.core.VariableAssignments,
+    ) -> jaxfg.core.VariableAssignments:
+        nonlocal trace_count
+        trace_count += 1
+        return graph.solve(
+            initial_assignments,
+            solver=jaxfg.solvers.GaussNewtonSolver(verbose=False),
+        )
+
+    for fixed_variables in (pose_variables[:1], pose_variables[2:4], []):
+        solution = solve(
+            graph.with_fixed_variables(fixed_variables), initial_assignments
+        )
+        for variable in pose_variables:
+            assert onp.array_equal(
+                solution.get_value(variable).parameters(),
+                initial_assignments.get_value(variable).parameters(),
+            ) == (variable in fixed_variables)
+    assert trace_count == 1
+
+    # Masks can also be set directly, for example from within a traced function.
+    fixed_mask = onp.zeros(graph.local_storage_layout.dim, dtype=bool)
+    solve(jdc.replace(graph, fixed_mask=fixed_mask), initial_assignments)
+    assert trace_count == 1
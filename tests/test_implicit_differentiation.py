@@ -0,0 +1,238 @@
+from typing import List, Tuple
+
+import jax
+import jax_dataclasses as jdc
+import jaxlie
+import numpy as onp
+import pytest
+from jax import numpy as jnp
+from overrides import overrides
+
+import jaxfg
+
+Vector2 = jaxfg.core.RealVectorVariable[2]
+
+
+@jdc.pytree_dataclass
+class _PriorFactor(jaxfg.core.FactorBase[Tuple[jnp.ndarray]]):
+    mu: jnp.ndarray
+
+    @overrides
+    def compute_residual_vector(
+        self, variable_values: Tuple[jnp.ndarray]
+    ) -> jnp.ndarray:
+        (x,) = variable_values
+        return x - self.mu
+
+
+@jdc.pytree_dataclass
+class _DifferenceFactor(jaxfg.core.FactorBase[Tuple[jnp.ndarray, jnp.ndarray]]):
+    delta: jnp.ndarray
+
+    @overrides
+    def compute_residual_vector(
+        self, variable_values: Tuple[jnp.ndarray, jnp.ndarray]
+    ) -> jnp.ndarray:
+        a, b = variable_values
+        return b - a - self.delta
+
+
+def _make_linear_graph() -> Tuple[
+    jaxfg.core.StackedFactorGraph, jaxfg.core.VariableAssignments
+]:
+    """Overdetermined linear problem. Residuals at the solution are nonzero, but
+    Gauss-Newton linearizations are exact."""
+    variables = [Vector2() for _ in range(4)]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 2.0]
+    )
+    factors: List[jaxfg.core.FactorBase] = [
+        _PriorFactor(
+            variables=(variable,),
+            mu=jnp.array(onp.random.randn(2)),
+            noise_model=noise_model,
+        )
+        for variable in variables
+    ]
+    for a, b in zip(variables[:-1], variables[1:]):
+        factors.append(
+            _DifferenceFactor(
+                variables=(a, b),
+                delta=jnp.array(onp.random.randn(2)),
+                noise_model=noise_model,
+            )
+        )
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    assignments = jaxfg.core.VariableAssignments.make_from_defaults(variables)
+    return graph, assignments
+
+
+def _float_leaves(tree: jaxfg.hints.Pytree) -> List[jnp.ndarray]:
+    return [
+        leaf
+        for leaf in jax.tree_util.tree_leaves(tree)
+        if jnp.issubdtype(leaf.dtype, jnp.floating)
+    ]
+
+
+@pytest.mark.parametrize(
+    "solver",
+    [
+        jaxfg.solvers.GaussNewtonSolver(
+            linear_solver=jaxfg.sparse.DenseCholeskySolver(),
+            implicit_differentiation=True,
+            verbose=False,
+        ),
+        jaxfg.solvers.LevenbergMarquardtSolver(
+            linear_solver=jaxfg.sparse.ConjugateGradientSolver(tolerance=1e-8),
+            implicit_differentiation=True,
+            verbose=False,
+        ),
+    ],
+)
+def test_implicit_differentiation(solver: jaxfg.solvers.NonlinearSolverBase):
+    graph, initial_assignments = _make_linear_graph()
+    weights = jnp.array(onp.random.randn(initial_assignments.storage.shape[0]))
+
+    def loss(
+        graph: jaxfg.core.StackedFactorGraph,
+        initial_assignments: jaxfg.core.VariableAssignments,
+        solver: jaxfg.solvers.NonlinearSolverBase,
+    ) -> jnp.ndarray:
+        return jnp.sum(weights * solver.solve(graph, initial_assignments).storage)
+
+    # Reference: differentiate through a single unrolled Gauss-Newton step, which
+    # solves linear problems exactly.
+    graph_grad_unrolled = jax.grad(loss, allow_int=True)(
+        graph,
+        initial_assignments,
+        jaxfg.solvers.FixedIterationGaussNewtonSolver(
+            linear_solver=jaxfg.sparse.DenseCholeskySolver(),
+            iterations=1,
+            verbose=False,
+        ),
+    )
+    graph_grad, initial_assignments_grad = jax.jit(
+        jax.grad(loss, argnums=(0, 1), allow_int=True)
+    )(graph, initial_assignments, solver)
+
+    for leaf, leaf_unrolled in zip(
+        _float_leaves(graph_grad), _float_leaves(graph_grad_unrolled)
+    ):
+        onp.testing.assert_allclose(leaf, leaf_unrolled, rtol=1e-4, atol=1e-4)
+    assert onp.any(onp.abs(graph_grad.factor_stacks[0].factor.mu) > 1e-3)
+    onp.testing.assert_allclose(initial_assignments_grad.storage, 0.0)
+
+
+def test_implicit_differentiation_pose_graph():
+    pose_variables = [jaxfg.geometry.SE2Variable() for _ in range(3)]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 1.0, 0.5]
+    )
+    initial_assignments = jaxfg.core.VariableAssignments.make_from_defaults(
+        pose_variables
+    )
+    solver = jaxfg.solvers.LevenbergMarquardtSolver(
+        implicit_differentiation=True, verbose=False
+    )
+
+    def final_position(theta: jnp.ndarray) -> jnp.ndarray:
+        """Position of the last pose in a chain, as a function of relative rotation."""
+        factors: List[jaxfg.core.FactorBase] = [
+            jaxfg.geometry.PriorFactor.make(
+                variable=pose_variables[0],
+                mu=jaxlie.SE2.identity(),
+                noise_model=noise_model,
+            )
+        ]
+        for a, b in zip(pose_variables[:-1], pose_variables[1:]):
+            factors.append(
+                jaxfg.geometry.BetweenFactor.make(
+                    variable_T_world_a=a,
+                    variable_T_world_b=b,
+                    T_a_b=jaxlie.SE2.from_rotation_and_translation(
+                        rotation=jaxlie.SO2.from_radians(theta),
+                        translation=jnp.array([1.0, 0.0]),
+                    ),
+                    noise_model=noise_model,
+                )
+            )
+        graph = jaxfg.core.StackedFactorGraph.make(factors, use_onp=False)
+        solution = solver.solve(graph, initial_assignments)
+        return solution.get_value(pose_variables[-1]).translation()
+
+    # Compare against the analytical solution: (1 + cos(theta), sin(theta)).
+    theta = 0.3
+    jacobian = jax.jacrev(final_position)(theta)
+    onp.testing.assert_allclose(
+        jacobian, onp.array([-onp.sin(theta), onp.cos(theta)]), rtol=1e-3, atol=1e-3
+    )
+
+
+@pytest.mark.parametrize(
+    "linear_solver",
+    [
+        jaxfg.sparse.CholmodSolver(),
+        jaxfg.sparse.DenseCholeskySolver(),
+        jaxfg.sparse.ConjugateGradientSolver(),
+        jaxfg.sparse.InexactStepConjugateGradientSolver(),
+    ],
+)
+def test_implicit_differentiation_gauge_freedom(
+    linear_solver: jaxfg.sparse.LinearSubproblemSolverBase,
+):
+    # No prior, so the solution is only defined up to a rigid transformation.
+    pose_variables = [jaxfg.geometry.SE2Variable() for _ in range(3)]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 1.0, 0.5]
+    )
+    initial_assignments = jaxfg.core.VariableAssignments.make_from_dict(
+        {
+            variable: jaxlie.SE2.exp(onp.random.randn(3) * 0.2)
+            for variable in pose_variables
+        }
+    )
+    solver = jaxfg.solvers.GaussNewtonSolver(
+        linear_solver=linear_solver, implicit_differentiation=True, verbose=False
+    )
+
+    def make_graph(theta: jaxfg.hints.Scalar) -> jaxfg.core.StackedFactorGraph:
+        factors: List[jaxfg.core.FactorBase] = [
+            jaxfg.geometry.BetweenFactor.make(
+                variable_T_world_a=a,
+                variable_T_world_b=b,
+                T_a_b=jaxlie.SE2.from_rotation_and_translation(
+                    rotation=jaxlie.SO2.from_radians(theta),
+                    translation=jnp.array([1.0, 0.0]),
+                ),
+                noise_model=noise_model,
+            )
+            for a, b in zip(pose_variables[:-1], pose_variables[1:])
+        ]
+        return jaxfg.core.StackedFactorGraph.make(factors, use_onp=False)
+
+    def relative_position(theta: jaxfg.hints.Scalar) -> jnp.ndarray:
+        """Position of the last pose in a chain relative to the first one."""
+        solution = solver.solve(make_graph(theta), initial_assignments)
+        return (
+            solution.get_value(pose_variables[0]).inverse()
+            @ solution.get_value(pose_variables[-1])
+        ).translation()
+
+    theta = 0.3
+    jacobian = jax.jacrev(relative_position)(theta)
+    onp.testing.assert_allclose(
+        jacobian, onp.array([-onp.sin(theta), onp.cos(theta)]), rtol=1e-2, atol=1e-2
+    )
+
+    # Gradients of gauge-dependent outputs are only defined up to the damping of the
+    # adjoint solve, but should still be finite.
+    weights = jnp.array(onp.random.randn(initial_assignments.storage.shape[0]))
+    graph_grad = jax.grad(
+        lambda graph: jnp.sum(
+            weights * solver.solve(graph, initial_assignments).storage
+        ),
+        allow_int=True,
+    )(make_graph(theta))
+    for leaf in _float_leaves(graph_grad):
+        assert onp.all(onp.isfinite(leaf))
@@ -0,0 +1,103 @@
+from typing import Dict, List, Tuple
+
+import jaxlie
+import numpy as onp
+
+import jaxfg
+
+
+def _make_updates(
+    num_poses: int, loop_closure_interval: int
+) -> List[
+    Tuple[List[jaxfg.core.FactorBase], Dict[jaxfg.core.VariableBase, jaxlie.SE2]]
+]:
+    """Build a pose graph one pose at a time. Returns factors and initial values to add
+    at each time step."""
+    pose_variables = [jaxfg.geometry.SE2Variable() for _ in range(num_poses)]
+    poses = [
+        jaxlie.SE2.from_xy_theta(float(i), onp.sin(i * 0.3), i * 0.2)
+        for i in range(num_poses)
+    ]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 1.0, 0.5]
+    )
+
+    def between(i: int, j: int) -> jaxfg.core.FactorBase:
+        return jaxfg.geometry.BetweenFactor.make(
+            variable_T_world_a=pose_variables[i],
+            variable_T_world_b=pose_variables[j],
+            T_a_b=(poses[i].inverse() @ poses[j])
+            @ jaxlie.SE2.exp(onp.random.randn(3) * 0.05),
+            noise_model=noise_model,
+        )
+
+    updates: List[
+        Tuple[List[jaxfg.core.FactorBase], Dict[jaxfg.core.VariableBase, jaxlie.SE2]]
+    ] = []
+    for i in range(num_poses):
+        factors: List[jaxfg.core.FactorBase] = (
+            [
+                jaxfg.geometry.PriorFactor.make(
+                    variable=pose_variables[0], mu=poses[0], noise_model=noise_model
+                )
+            ]
+            if i == 0
+            else [between(i - 1, i)]
+        )
+        if i >= loop_closure_interval and i % loop_closure_interval == 0:
+            factors.append(between(i - loop_closure_interval, i))
+        updates.append(
+            (
+                factors,
+                {
+                    pose_variables[i]: poses[i]
+                    @ jaxlie.SE2.exp(onp.random.randn(3) * 0.2)
+                },
+            )
+        )
+    return updates
+
+
+def test_incremental_smoother():
+    updates = _make_updates(num_poses=20, loop_closure_interval=5)
+    smoother = jaxfg.experimental.IncrementalSmoother(relinearize_threshold=1e-3)
+    for factors, values in updates:
+        smoother.update(factors, values)
+
+    # Settle remaining relinearizations.
+    for _ in range(3):
+        smoother.update()
+
+    # Compare against a batch solve of the full graph.
+    graph = jaxfg.core.StackedFactorGraph.make(smoother.get_factors())
+    initial_assignments = jaxfg.core.VariableAssignments.make_from_dict(
+        {
+            variable: value
+            for _unused_factors, values in updates
+            for variable, value in values.items()
+        }
+    )
+    solution = graph.solve(
+        initial_assignments,
+        solver=jaxfg.solvers.GaussNewtonSolver(verbose=False),
+    )
+    estimate = smoother.get_assignments()
+    onp.testing.assert_allclose(
+        graph.compute_cost(estimate)[0],
+        graph.compute_cost(solution)[0],
+        rtol=1e-3,
+    )
+    onp.testing.assert_allclose(
+        estimate.storage, solution.storage, rtol=1e-3, atol=1e-3
+    )
+
+
+def test_incremental_smoother_constant_work():
+    """Odometry updates without relinearization should only touch the newest poses."""
+    smoother = jaxfg.experimental.IncrementalSmoother(relinearize_threshold=1e3)
+    infos = [
+        smoother.update(factors, values)
+        for factors, values in _make_updates(num_poses=12, loop_closure_interval=100)
+    ]
+    assert [info.refactored_dim for info in infos] == [3] + [6] * 11
+    assert all(info.linearized_factor_count == 1 for info in infos)
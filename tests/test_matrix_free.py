@@ -0,0 +1,130 @@
+from typing import List, Tuple
+
+import jax
+import jax_dataclasses as jdc
+import numpy as onp
+import pytest
+from jax import numpy as jnp
+from overrides import overrides
+
+import jaxfg
+
+Vector2 = jaxfg.core.RealVectorVariable[2]
+
+
+@jdc.pytree_dataclass
+class _RosenbrockFactor(jaxfg.core.FactorBase[Tuple[jnp.ndarray, jnp.ndarray]]):
+    """Nonlinear factor between two vectors. Uses autodiff Jacobians."""
+
+    @overrides
+    def compute_residual_vector(
+        self, variable_values: Tuple[jnp.ndarray, jnp.ndarray]
+    ) -> jnp.ndarray:
+        a, b = variable_values
+        return jnp.array([10.0 * (b[0] - a[0] ** 2), 1.0 - a[1] * b[1]])
+
+
+@jdc.pytree_dataclass
+class _PriorFactor(jaxfg.core.FactorBase[Tuple[jnp.ndarray]]):
+    mu: jnp.ndarray
+
+    @overrides
+    def compute_residual_vector(
+        self, variable_values: Tuple[jnp.ndarray]
+    ) -> jnp.ndarray:
+        (x,) = variable_values
+        return x - self.mu
+
+
+def _make_graph() -> Tuple[
+    jaxfg.core.StackedFactorGraph, jaxfg.core.VariableAssignments
+]:
+    variables = [Vector2() for _ in range(4)]
+    factors: List[jaxfg.core.FactorBase] = [
+        _PriorFactor(
+            variables=(variables[0],),
+            mu=jnp.array([0.5, 1.0]),
+            noise_model=jaxfg.noises.DiagonalGaussian.make_from_covariance(
+                diagonal=[0.1, 0.2]
+            ),
+        )
+    ]
+    for a, b in zip(variables[:-1], variables[1:]):
+        factors.append(
+            _RosenbrockFactor(
+                variables=(a, b),
+                noise_model=jaxfg.noises.DiagonalGaussian.make_from_covariance(
+                    diagonal=[1.0, 2.0]
+                ),
+            )
+        )
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+
+    assignments = jaxfg.core.VariableAssignments.make_from_dict(
+        {
+            variable: onp.random.uniform(low=0.5, high=1.5, size=(2,))
+            for variable in variables
+        }
+    )
+    return graph, assignments
+
+
+def test_jacobian_operator_matches_explicit_jacobian():
+    graph, assignments = _make_graph()
+    _unused_cost, residual_vector = graph.compute_cost(assignments)
+
+    A = graph.compute_whitened_residual_jacobian(assignments, residual_vector)
+    A_dense = A.as_dense()
+
+    @jax.jit
+    def apply(x: jnp.ndarray, y: jnp.ndarray):
+        A_operator = graph.compute_whitened_residual_jacobian_operator(
+            assignments, residual_vector
+        )
+        return A_operator @ x, A_operator.T @ y, A_operator.ATA_diagonal
+
+    x = onp.random.randn(A_dense.shape[1])
+    y = onp.random.randn(A_dense.shape[0])
+    Ax, ATy, ATA_diagonal = apply(x, y)
+
+    onp.testing.assert_allclose(Ax, A_dense @ x, rtol=1e-5, atol=1e-5)
+    onp.testing.assert_allclose(ATy, A_dense.T @ y, rtol=1e-5, atol=1e-5)
+    onp.testing.assert_allclose(
+        ATA_diagonal, onp.sum(A_dense**2, axis=0), rtol=1e-5, atol=1e-5
+    )
+
+
+@pytest.mark.parametrize(
+    "solver",
+    [
+        jaxfg.solvers.GaussNewtonSolver(
+            linear_solver=jaxfg.sparse.ConjugateGradientSolver(tolerance=1e-8),
+            verbose=False,
+        ),
+        jaxfg.solvers.LevenbergMarquardtSolver(
+            linear_solver=jaxfg.sparse.ConjugateGradientSolver(tolerance=1e-8),
+            verbose=False,
+        ),
+        jaxfg.solvers.DoglegSolver(
+            linear_solver=jaxfg.sparse.AutoLinearSolver(verbose=False),
+            verbose=False,
+        ),
+    ],
+)
+def test_matrix_free_solve(solver: jaxfg.solvers.NonlinearSolverBase):
+    graph, assignments = _make_graph()
+
+    solution_explicit = graph.solve(assignments, solver=solver)
+    solution_matrix_free = graph.solve(
+        assignments, solver=jdc.replace(solver, matrix_free=True)
+    )
+
+    onp.testing.assert_allclose(
+        solution_matrix_free.storage,
+        solution_explicit.storage,
+        rtol=1e-4,
+        atol=1e-4,
+    )
+    assert (
+        graph.compute_cost(solution_matrix_free)[0] < graph.compute_cost(assignments)[0]
+    )
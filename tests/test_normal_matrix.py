@@ -0,0 +1,88 @@
+from typing import List, Tuple
+
+import jaxlie
+import numpy as onp
+import pytest
+
+import jaxfg
+
+
+def _make_factors() -> Tuple[
+    List[jaxfg.core.FactorBase], jaxfg.core.VariableAssignments
+]:
+    pose_variables = [jaxfg.geometry.SE2Variable() for _ in range(6)]
+    poses = [jaxlie.SE2.from_xy_theta(*onp.random.randn(3)) for _ in pose_variables]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 2.0, 0.5]
+    )
+
+    factors: List[jaxfg.core.FactorBase] = [
+        jaxfg.geometry.PriorFactor.make(
+            variable=pose_variables[0],
+            mu=poses[0],
+            noise_model=noise_model,
+        )
+    ]
+    for i in range(len(pose_variables)):
+        for j in (i + 1, i + 3):
+            if j >= len(pose_variables):
+                continue
+            factors.append(
+                jaxfg.geometry.BetweenFactor.make(
+                    variable_T_world_a=pose_variables[i],
+                    variable_T_world_b=pose_variables[j],
+                    T_a_b=poses[i].inverse() @ poses[j],
+                    noise_model=noise_model,
+                )
+            )
+
+    # Perturb initial assignments.
+    assignments = jaxfg.core.VariableAssignments.make_from_dict(
+        {
+            variable: pose @ jaxlie.SE2.exp(onp.random.randn(3) * 0.1)
+            for variable, pose in zip(pose_variables, poses)
+        }
+    )
+    return factors, assignments
+
+
+def test_normal_matrix():
+    factors, assignments = _make_factors()
+    graph = jaxfg.core.StackedFactorGraph.make(factors, compute_hessian_pattern=True)
+    _unused_cost, residual_vector = graph.compute_cost(assignments)
+
+    A = graph.compute_whitened_residual_jacobian(assignments, residual_vector)
+    ATA = graph.compute_normal_matrix(A)
+
+    # Coordinates should be unique
+    assert len(set(zip(ATA.coords.rows, ATA.coords.cols))) == ATA.values.shape[0]
+
+    A_dense = A.as_dense()
+    onp.testing.assert_allclose(
+        ATA.as_dense(), A_dense.T @ A_dense, rtol=1e-5, atol=1e-5
+    )
+
+
+@pytest.mark.parametrize(
+    "linear_solver",
+    [
+        jaxfg.sparse.ConjugateGradientSolver(tolerance=1e-8),
+        jaxfg.sparse.DenseCholeskySolver(),
+    ],
+)
+def test_normal_matrix_solve(linear_solver: jaxfg.sparse.LinearSubproblemSolverBase):
+    factors, assignments = _make_factors()
+    solver = jaxfg.solvers.LevenbergMarquardtSolver(
+        linear_solver=linear_solver, verbose=False
+    )
+
+    solution = jaxfg.core.StackedFactorGraph.make(factors).solve(
+        assignments, solver=solver
+    )
+    solution_with_pattern = jaxfg.core.StackedFactorGraph.make(
+        factors, compute_hessian_pattern=True
+    ).solve(assignments, solver=solver)
+
+    onp.testing.assert_allclose(
+        solution_with_pattern.storage, solution.storage, rtol=1e-4, atol=1e-4
+    )
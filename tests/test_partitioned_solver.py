@@ -0,0 +1,107 @@
+from typing import List, Tuple
+
+import jaxlie
+import numpy as onp
+import pytest
+
+import jaxfg
+
+
+def _make_factors() -> Tuple[
+    List[jaxfg.core.FactorBase], jaxfg.core.VariableAssignments
+]:
+    pose_variables = [jaxfg.geometry.SE2Variable() for _ in range(8)]
+    poses = [jaxlie.SE2.from_xy_theta(*onp.random.randn(3)) for _ in pose_variables]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 1.0, 0.5]
+    )
+
+    factors: List[jaxfg.core.FactorBase] = [
+        jaxfg.geometry.PriorFactor.make(
+            variable=pose_variables[0],
+            mu=poses[0],
+            noise_model=noise_model,
+        )
+    ]
+    for i in range(len(pose_variables)):
+        for j in (i + 1, i + 2):
+            if j >= len(pose_variables):
+                continue
+            factors.append(
+                jaxfg.geometry.BetweenFactor.make(
+                    variable_T_world_a=pose_variables[i],
+                    variable_T_world_b=pose_variables[j],
+                    T_a_b=(poses[i].inverse() @ poses[j])
+                    @ jaxlie.SE2.exp(onp.random.randn(3) * 0.05),
+                    noise_model=noise_model,
+                )
+            )
+
+    assignments = jaxfg.core.VariableAssignments.make_from_dict(
+        {
+            variable: pose @ jaxlie.SE2.exp(onp.random.randn(3) * 0.2)
+            for variable, pose in zip(pose_variables, poses)
+        }
+    )
+    return factors, assignments
+
+
+def test_manifold_inverse_retract():
+    T = jaxlie.SE2.from_xy_theta(*onp.random.randn(3))
+    delta = onp.random.randn(3) * 0.5
+    onp.testing.assert_allclose(
+        jaxfg.geometry.SE2Variable.manifold_inverse_retract(
+            T, jaxfg.geometry.SE2Variable.manifold_retract(T, delta)
+        ),
+        delta,
+        rtol=1e-4,
+        atol=1e-4,
+    )
+
+    x = onp.random.randn(3)
+    onp.testing.assert_allclose(
+        jaxfg.core.RealVectorVariable[3].manifold_inverse_retract(x, x + delta),
+        delta,
+        rtol=1e-4,
+        atol=1e-4,
+    )
+
+
+def test_partition_variables():
+    factors, assignments = _make_factors()
+    partition = jaxfg.experimental.partition_variables(factors, num_parts=3)
+
+    assert set(partition.keys()) == set(assignments.get_variables())
+    sizes = onp.bincount(list(partition.values()))
+    assert len(sizes) == 3
+    assert sizes.max() - sizes.min() <= 1
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_partitioned_solve(use_processes: bool):
+    factors, assignments = _make_factors()
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    solver = jaxfg.solvers.LevenbergMarquardtSolver(verbose=False)
+
+    solution = jaxfg.experimental.PartitionedSolver(
+        solver=solver,
+        max_iterations=200,
+        tolerance=1e-6,
+        use_processes=use_processes,
+        verbose=False,
+    ).solve(
+        factors,
+        assignments,
+        partition=jaxfg.experimental.partition_variables(factors, num_parts=2),
+    )
+
+    # States converge slowly with ADMM, but costs should agree closely.
+    solution_full = graph.solve(assignments, solver=solver)
+    onp.testing.assert_allclose(
+        graph.compute_cost(solution)[0],
+        graph.compute_cost(solution_full)[0],
+        rtol=1e-3,
+    )
+    onp.testing.assert_allclose(
+        solution.storage, solution_full.storage, rtol=1e-2, atol=1e-2
+    )
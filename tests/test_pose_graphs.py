@@ -1,8 +1,10 @@
 """Simple pose graph tests. Could use cleanup/refactoring."""
 
-from typing import List
+from typing import List, Tuple
 
 import jaxlie
+import numpy as onp
+import pytest
 from jax import numpy as jnp
 
 import jaxfg
@@ -199,3 +201,187 @@ def test_pose_graph_dogleg():
             jaxfg.geometry.SE2Variable
         ).parameters()[1]
     )
+
+
+def test_pose_graph_lbfgs():
+    pose_variables = [jaxfg.geometry.SE2Variable() for _ in range(10)]
+    poses = [jaxlie.SE2.from_xy_theta(*onp.random.randn(3)) for _ in pose_variables]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 1.0, 0.5]
+    )
+    factors: List[jaxfg.core.FactorBase] = [
+        jaxfg.geometry.PriorFactor.make(
+            variable=pose_variables[0],
+            mu=poses[0],
+            noise_model=noise_model,
+        )
+    ]
+    for i in range(len(pose_variables) - 1):
+        factors.append(
+            jaxfg.geometry.BetweenFactor.make(
+                variable_T_world_a=pose_variables[i],
+                variable_T_world_b=pose_variables[i + 1],
+                T_a_b=poses[i].inverse() @ poses[i + 1],
+                noise_model=noise_model,
+            )
+        )
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    initial_assignments = jaxfg.core.VariableAssignments.make_from_dict(
+        {
+            variable: pose @ jaxlie.SE2.exp(onp.random.randn(3) * 0.2)
+            for variable, pose in zip(pose_variables, poses)
+        }
+    )
+
+    solution_assignments = graph.solve(
+        initial_assignments,
+        solver=jaxfg.solvers.LbfgsSolver(max_iterations=200, verbose=False),
+    )
+    assert graph.compute_cost(solution_assignments)[0] < 1e-4
+    for variable, pose in zip(pose_variables, poses):
+        onp.testing.assert_allclose(
+            solution_assignments.get_value(variable).as_matrix(),
+            pose.as_matrix(),
+            atol=1e-2,
+        )
+
+
+@pytest.mark.parametrize(
+    "solver",
+    [
+        jaxfg.solvers.GaussNewtonSolver(trace_length=100, verbose=False),
+        jaxfg.solvers.LevenbergMarquardtSolver(trace_length=100, verbose=False),
+        jaxfg.solvers.DoglegSolver(trace_length=100, verbose=False),
+        jaxfg.solvers.LbfgsSolver(trace_length=100, verbose=False),
+    ],
+)
+def test_pose_graph_trace(solver: jaxfg.solvers.NonlinearSolverBase):
+    graph, initial_assignments = _make_chain_graph()
+
+    solution_assignments, trace = solver.solve_with_trace(graph, initial_assignments)
+    assert trace.cost.shape == (100,)
+
+    # Recorded costs should be non-increasing, and end at the solution's cost.
+    num_iterations = int(onp.count_nonzero(trace.step_norm))
+    assert num_iterations > 0
+    costs = onp.asarray(trace.cost[:num_iterations])
+    assert onp.all(onp.diff(costs) <= 1e-6)
+    onp.testing.assert_allclose(
+        costs[-1], graph.compute_cost(solution_assignments)[0], rtol=1e-5, atol=1e-8
+    )
+    assert onp.any(trace.accepted[:num_iterations])
+
+
+def test_dogleg_trace_linear_solver_iterations():
+    graph, initial_assignments = _make_chain_graph()
+    solver = jaxfg.solvers.DoglegSolver(
+        linear_solver=jaxfg.sparse.ConjugateGradientSolver(),
+        trace_length=100,
+        verbose=False,
+    )
+
+    # The first step is built from the Gauss-Newton step solved at initialization.
+    _unused_solution, trace = solver.solve_with_trace(graph, initial_assignments)
+    initial_state = solver.init(graph, initial_assignments)
+    assert int(initial_state.linear_solver_state.iterations) > 0
+    assert int(trace.linear_solver_iterations[0]) == int(
+        initial_state.linear_solver_state.iterations
+    )
+
+
+@pytest.mark.parametrize(
+    "solver",
+    [
+        jaxfg.solvers.GaussNewtonSolver(verbose=False),
+        jaxfg.solvers.LevenbergMarquardtSolver(verbose=False),
+        jaxfg.solvers.DoglegSolver(verbose=False),
+    ],
+)
+def test_pose_graph_time_budget(solver: jaxfg.solvers.NonlinearSolverBase):
+    graph, initial_assignments = _make_chain_graph()
+
+    # With no time, we should get the initial assignments back.
+    assignments = solver.solve_with_time_budget(
+        graph, initial_assignments, time_budget=0.0
+    )
+    onp.testing.assert_allclose(assignments.storage, initial_assignments.storage)
+
+    # With plenty of time, we should match a standard solve.
+    for steps_per_check in (1, 4):
+        assignments = solver.solve_with_time_budget(
+            graph,
+            initial_assignments,
+            time_budget=1000.0,
+            steps_per_check=steps_per_check,
+        )
+        onp.testing.assert_allclose(
+            graph.compute_cost(assignments)[0],
+            graph.compute_cost(solver.solve(graph, initial_assignments))[0],
+            rtol=1e-5,
+            atol=1e-8,
+        )
+
+
+def _make_chain_graph() -> Tuple[
+    jaxfg.core.StackedFactorGraph, jaxfg.core.VariableAssignments
+]:
+    pose_variables = [jaxfg.geometry.SE2Variable() for _ in range(3)]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=jnp.ones(3)
+    )
+    factors: List[jaxfg.core.FactorBase] = [
+        jaxfg.geometry.PriorFactor.make(
+            variable=pose_variables[0],
+            mu=jaxlie.SE2.from_xy_theta(0.0, 0.0, 0.0),
+            noise_model=noise_model,
+        ),
+        jaxfg.geometry.BetweenFactor.make(
+            variable_T_world_a=pose_variables[0],
+            variable_T_world_b=pose_variables[1],
+            T_a_b=jaxlie.SE2.from_xy_theta(1.0, 0.0, 1.0),
+            noise_model=noise_model,
+        ),
+        jaxfg.geometry.BetweenFactor.make(
+            variable_T_world_a=pose_variables[1],
+            variable_T_world_b=pose_variables[2],
+            T_a_b=jaxlie.SE2.from_xy_theta(1.0, 0.0, 1.0),
+            noise_model=noise_model,
+        ),
+    ]
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    initial_assignments = jaxfg.core.VariableAssignments.make_from_defaults(
+        pose_variables
+    )
+    return graph, initial_assignments
+
+
+@pytest.mark.parametrize(
+    "solver",
+    [
+        jaxfg.solvers.GaussNewtonSolver(verbose=False),
+        jaxfg.solvers.LevenbergMarquardtSolver(verbose=False),
+        jaxfg.solvers.DoglegSolver(verbose=False),
+    ],
+)
+def test_pose_graph_step_n(solver: jaxfg.solvers.NonlinearSolverBase):
+    graph, initial_assignments = _make_chain_graph()
+
+    state = solver.init(graph, initial_assignments)
+    assert int(state.iterations) == 0
+
+    state = solver.step_n(graph, state, 1)
+    assert int(state.iterations) == 1
+
+    while not bool(state.done):
+        iterations_prev = int(state.iterations)
+        state = solver.step_n(graph, state, n=2)
+        assert 0 < int(state.iterations) - iterations_prev <= 2
+
+    onp.testing.assert_allclose(
+        state.assignments.update_storage_layout(
+            initial_assignments.storage_layout
+        ).storage,
+        solver.solve(graph, initial_assignments).storage,
+        rtol=1e-5,
+        atol=1e-5,
+    )
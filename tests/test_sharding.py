@@ -0,0 +1,121 @@
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+import jax
+import jaxlie
+import numpy as onp
+import pytest
+
+import jaxfg
+
+
+def _make_factors() -> Tuple[
+    List[jaxfg.core.FactorBase], jaxfg.core.VariableAssignments
+]:
+    pose_variables = [jaxfg.geometry.SE2Variable() for _ in range(7)]
+    poses = [jaxlie.SE2.from_xy_theta(*onp.random.randn(3)) for _ in pose_variables]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 1.0, 0.5]
+    )
+
+    factors: List[jaxfg.core.FactorBase] = [
+        jaxfg.geometry.PriorFactor.make(
+            variable=pose_variables[0],
+            mu=poses[0],
+            noise_model=noise_model,
+        )
+    ]
+    for i in range(len(pose_variables)):
+        for j in (i + 1, i + 2):
+            if j >= len(pose_variables):
+                continue
+            factors.append(
+                jaxfg.geometry.BetweenFactor.make(
+                    variable_T_world_a=pose_variables[i],
+                    variable_T_world_b=pose_variables[j],
+                    T_a_b=(poses[i].inverse() @ poses[j])
+                    @ jaxlie.SE2.exp(onp.random.randn(3) * 0.05),
+                    noise_model=noise_model,
+                )
+            )
+
+    assignments = jaxfg.core.VariableAssignments.make_from_dict(
+        {
+            variable: pose @ jaxlie.SE2.exp(onp.random.randn(3) * 0.2)
+            for variable, pose in zip(pose_variables, poses)
+        }
+    )
+    return factors, assignments
+
+
+@pytest.mark.skipif(
+    jax.device_count() >= 2, reason="Sharding tests run in this process."
+)
+def test_sharding_with_host_devices():
+    """Run this module's tests in a subprocess that exposes multiple CPU devices. The
+    device count needs to be set before JAX initializes its backends, so we avoid
+    forcing it for the rest of the test suite."""
+    env = dict(os.environ)
+    env["XLA_FLAGS"] = (
+        env.get("XLA_FLAGS", "") + " --xla_force_host_platform_device_count=4"
+    )
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", __file__],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+    )
+    assert result.returncode == 0, result.stdout
+    assert "passed" in result.stdout, result.stdout
+
+
+@pytest.mark.skipif(jax.device_count() < 2, reason="Requires multiple devices.")
+def test_shard_linearization():
+    factors, assignments = _make_factors()
+    graph = jaxfg.core.StackedFactorGraph.make(factors, compute_hessian_pattern=True)
+    graph_sharded = graph.shard()
+
+    # 11 between factors across 4 devices: 8 should be split, and 3 replicated.
+    assert [
+        stacked_factor.num_factors for stacked_factor in graph_sharded.factor_stacks
+    ] == [1, 8, 3]
+    assert len(graph_sharded.factor_stacks[1].factor.T_a_b.parameters().devices()) == 4
+
+    @jax.jit
+    def linearize(
+        graph: jaxfg.core.StackedFactorGraph,
+    ) -> Tuple[jax.Array, jax.Array, jax.Array]:
+        _unused_cost, residual_vector = graph.compute_cost(assignments)
+        A = graph.compute_whitened_residual_jacobian(assignments, residual_vector)
+        return residual_vector, A.as_dense(), graph.compute_normal_matrix(A).as_dense()
+
+    for expected, actual in zip(linearize(graph), linearize(graph_sharded)):
+        onp.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-5)
+
+
+@pytest.mark.skipif(jax.device_count() < 2, reason="Requires multiple devices.")
+@pytest.mark.parametrize(
+    "solver",
+    [
+        jaxfg.solvers.GaussNewtonSolver(
+            linear_solver=jaxfg.sparse.ConjugateGradientSolver(tolerance=1e-7),
+            verbose=False,
+        ),
+        jaxfg.solvers.LevenbergMarquardtSolver(
+            linear_solver=jaxfg.sparse.DenseCholeskySolver(), verbose=False
+        ),
+    ],
+)
+def test_shard_solve(solver: jaxfg.solvers.NonlinearSolverBase):
+    factors, assignments = _make_factors()
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+
+    onp.testing.assert_allclose(
+        solver.solve(graph.shard(), assignments).storage,
+        solver.solve(graph, assignments).storage,
+        rtol=1e-4,
+        atol=1e-4,
+    )
@@ -0,0 +1,201 @@
+from typing import List, Optional, Tuple, Union
+
+import jax
+import jax_dataclasses as jdc
+import jaxlie
+import numpy as onp
+import pytest
+from jax import numpy as jnp
+from overrides import overrides
+
+import jaxfg
+
+
+def _make_problem(
+    pose_variables: List[jaxfg.geometry.SE2Variable],
+) -> Tuple[jaxfg.core.StackedFactorGraph, jaxfg.core.VariableAssignments]:
+    """Make a pose graph problem with random measurements. Structure is determined only
+    by `pose_variables`."""
+    poses = [jaxlie.SE2.from_xy_theta(*onp.random.randn(3)) for _ in pose_variables]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 1.0, 0.5]
+    )
+
+    factors: List[jaxfg.core.FactorBase] = [
+        jaxfg.geometry.PriorFactor.make(
+            variable=pose_variables[0],
+            mu=poses[0],
+            noise_model=noise_model,
+        )
+    ]
+    for i in range(len(pose_variables) - 1):
+        for j in (i + 1, i + 2):
+            if j >= len(pose_variables):
+                continue
+            factors.append(
+                jaxfg.geometry.BetweenFactor.make(
+                    variable_T_world_a=pose_variables[i],
+                    variable_T_world_b=pose_variables[j],
+                    T_a_b=(poses[i].inverse() @ poses[j])
+                    @ jaxlie.SE2.exp(onp.random.randn(3) * 0.05),
+                    noise_model=noise_model,
+                )
+            )
+
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    assignments = jaxfg.core.VariableAssignments.make_from_dict(
+        {
+            variable: pose @ jaxlie.SE2.exp(onp.random.randn(3) * 0.2)
+            for variable, pose in zip(pose_variables, poses)
+        }
+    )
+    return graph, assignments
+
+
+@pytest.mark.parametrize(
+    "solver",
+    [
+        jaxfg.solvers.GaussNewtonSolver(
+            linear_solver=jaxfg.sparse.ConjugateGradientSolver(tolerance=1e-7),
+            verbose=False,
+        ),
+        jaxfg.solvers.LevenbergMarquardtSolver(
+            linear_solver=jaxfg.sparse.DenseCholeskySolver(), verbose=False
+        ),
+        jaxfg.solvers.DoglegSolver(
+            linear_solver=jaxfg.sparse.AutoLinearSolver(verbose=False),
+            verbose=False,
+        ),
+    ],
+)
+@pytest.mark.parametrize("compaction_interval", [None, 3])
+def test_solve_batch(
+    solver: Union[
+        jaxfg.solvers.GaussNewtonSolver,
+        jaxfg.solvers.LevenbergMarquardtSolver,
+        jaxfg.solvers.DoglegSolver,
+    ],
+    compaction_interval: Optional[int],
+):
+    pose_variables = [jaxfg.geometry.SE2Variable() for _ in range(5)]
+    problems = [_make_problem(pose_variables) for _ in range(4)]
+    graph_batch, assignments_batch = jax.tree_map(
+        lambda *leaves: jnp.stack(leaves), *problems
+    )
+
+    state_batch = solver.solve_batch(
+        graph_batch, assignments_batch, compaction_interval=compaction_interval
+    )
+    iterations = onp.asarray(state_batch.iterations)
+    assert iterations.shape == (len(problems),)
+
+    # Compare against problems solved one at a time. Batched and unbatched floating
+    # point operations can differ slightly, which can shift termination.
+    for i, (graph, assignments) in enumerate(problems):
+        solution = solver.solve(graph, assignments)
+        onp.testing.assert_allclose(
+            state_batch.assignments.storage[i],
+            solution.storage,
+            rtol=1e-3,
+            atol=1e-3,
+        )
+        assert 0 < iterations[i] <= solver.max_iterations
+
+
+@jdc.pytree_dataclass
+class _IntegerTargetFactor(jaxfg.core.FactorBase[Tuple[jnp.ndarray]]):
+    """Factor that pulls a variable toward an integer-valued target."""
+
+    target: jnp.ndarray
+
+    @overrides
+    def compute_residual_vector(
+        self, variable_values: Tuple[jnp.ndarray]
+    ) -> jnp.ndarray:
+        (x,) = variable_values
+        return x - self.target
+
+
+def test_solve_batch_integer_factor_data():
+    variable = jaxfg.core.RealVectorVariable[2]()
+    targets = [onp.array([1, 2]), onp.array([-3, 4]), onp.array([5, -6])]
+    graphs = [
+        jaxfg.core.StackedFactorGraph.make(
+            [
+                _IntegerTargetFactor(
+                    variables=(variable,),
+                    noise_model=jaxfg.noises.DiagonalGaussian(
+                        sqrt_precision_diagonal=onp.ones(2)
+                    ),
+                    target=target,
+                )
+            ]
+        )
+        for target in targets
+    ]
+    graph_batch = jax.tree_map(lambda *leaves: jnp.stack(leaves), *graphs)
+    assignments = jaxfg.core.VariableAssignments.make_from_defaults((variable,))
+    assignments_batch = jax.tree_map(
+        lambda *leaves: jnp.stack(leaves), *([assignments] * len(targets))
+    )
+
+    solver = jaxfg.solvers.GaussNewtonSolver(verbose=False)
+    state_batch = solver.solve_batch(graph_batch, assignments_batch)
+    onp.testing.assert_allclose(
+        state_batch.assignments.storage, onp.stack(targets), atol=1e-5
+    )
+
+
+@jdc.pytree_dataclass
+class _DoubleWellFactor(jaxfg.core.FactorBase[Tuple[jnp.ndarray]]):
+    """Factor with a global minimum at `x = 1`, and a local one near `x = -1`."""
+
+    @overrides
+    def compute_residual_vector(
+        self, variable_values: Tuple[jnp.ndarray]
+    ) -> jnp.ndarray:
+        (x,) = variable_values
+        return jnp.array([x[0] ** 2 - 1.0, 0.3 * (x[0] - 1.0)])
+
+
+@pytest.mark.parametrize("compaction_interval", [None, 3])
+def test_solve_multistart(compaction_interval: Optional[int]):
+    variable = jaxfg.core.RealVectorVariable[1]()
+    graph = jaxfg.core.StackedFactorGraph.make(
+        [
+            _DoubleWellFactor(
+                variables=(variable,),
+                noise_model=jaxfg.noises.DiagonalGaussian(
+                    sqrt_precision_diagonal=onp.ones(2)
+                ),
+            )
+        ]
+    )
+    starts = [-2.0, -0.5, 0.5, 3.0]
+    assignments_list = [
+        jaxfg.core.VariableAssignments.make_from_dict({variable: onp.array([x])})
+        for x in starts
+    ]
+    assignments_batch = jax.tree_map(
+        lambda *leaves: jnp.stack(leaves), *assignments_list
+    )
+
+    solver = jaxfg.solvers.LevenbergMarquardtSolver(verbose=False)
+    solution, costs = solver.solve_multistart(
+        graph, assignments_batch, compaction_interval=compaction_interval
+    )
+    assert costs.shape == (len(starts),)
+
+    # Compare against starts solved one at a time.
+    for i, assignments in enumerate(assignments_list):
+        onp.testing.assert_allclose(
+            costs[i],
+            graph.compute_cost(solver.solve(graph, assignments))[0],
+            rtol=1e-3,
+            atol=1e-5,
+        )
+
+    # Starts on the left should get stuck in the local minimum.
+    assert costs[0] > 0.1
+    onp.testing.assert_allclose(costs.min(), 0.0, atol=1e-5)
+    onp.testing.assert_allclose(solution.get_value(variable), [1.0], atol=1e-3)
@@ -1,7 +1,13 @@
+from typing import List, Optional, Tuple
+
 import jax
+import jax_dataclasses as jdc
+import jaxlie
 import numpy as onp
 import pytest
 import scipy
+from jax import numpy as jnp
+from overrides import overrides
 
 import jaxfg
 
@@ -10,8 +16,11 @@ import jaxfg
     "solver",
     [
         jaxfg.sparse.CholmodSolver(),
+        jaxfg.sparse.CholmodSolver(num_threads=4),
         jaxfg.sparse.ConjugateGradientSolver(tolerance=1e-8),
+        jaxfg.sparse.DenseCholeskySolver(),
         jaxfg.sparse.InexactStepConjugateGradientSolver(inexact_step_eta=1e-8),
+        jaxfg.sparse.AutoLinearSolver(verbose=False),
     ],
 )
 def test_solver_no_jit(solver: jaxfg.sparse.LinearSubproblemSolverBase):
@@ -40,8 +49,11 @@ def test_solver_no_jit(solver: jaxfg.sparse.LinearSubproblemSolverBase):
     "solver",
     [
         jaxfg.sparse.CholmodSolver(),
+        jaxfg.sparse.CholmodSolver(num_threads=4),
         jaxfg.sparse.ConjugateGradientSolver(tolerance=1e-8),
+        jaxfg.sparse.DenseCholeskySolver(),
         jaxfg.sparse.InexactStepConjugateGradientSolver(inexact_step_eta=1e-8),
+        jaxfg.sparse.AutoLinearSolver(verbose=False),
     ],
 )
 def test_solver_jit(solver: jaxfg.sparse.LinearSubproblemSolverBase):
@@ -69,3 +81,504 @@ def test_solver_jit(solver: jaxfg.sparse.LinearSubproblemSolverBase):
 
     # Validate
     onp.testing.assert_allclose(x_ours, x_onp, atol=1e-5, rtol=1e-5)
+
+
+@pytest.mark.parametrize(
+    "implicit,use_conjugate_gradient",
+    [(False, False), (False, True), (True, True)],
+)
+def test_schur_complement_solver(implicit: bool, use_conjugate_gradient: bool):
+    # Build sparse matrix with bundle adjustment-style structure: 2 "camera" columns,
+    # followed by 4 "landmarks" with 2 columns each. Each row is connected to the
+    # camera and a single landmark.
+    A_shape = (24, 10)
+    A_onp = onp.zeros(A_shape)
+    for row in range(A_shape[0]):
+        landmark = row % 4
+        A_onp[row, :2] = onp.random.randn(2)
+        A_onp[row, 2 + landmark * 2 : 4 + landmark * 2] = onp.random.randn(2)
+    A = jaxfg.sparse.SparseCooMatrix.from_scipy_coo_matrix(
+        scipy.sparse.coo_matrix(A_onp)
+    )
+    ATb = onp.random.randn(A_shape[1])
+    lambd = 0.1
+
+    solver = jaxfg.sparse.SchurComplementSolver(
+        eliminated_blocks=((2, 4, 2),),
+        implicit=implicit,
+        use_conjugate_gradient=use_conjugate_gradient,
+        tolerance=1e-8,
+    )
+    x_ours = jax.jit(
+        lambda A, ATb: solver.solve_subproblem(A=A, ATb=ATb, lambd=lambd, iteration=0)
+    )(A, ATb)
+
+    ATA = A_onp.T @ A_onp
+    x_onp = onp.linalg.solve(
+        ATA
+        + lambd * onp.diag(onp.diag(ATA))
+        + solver.diag_epsilon * onp.eye(A_shape[1]),
+        ATb,
+    )
+    onp.testing.assert_allclose(x_ours, x_onp, atol=1e-4, rtol=1e-4)
+
+
+@jdc.pytree_dataclass
+class _HeadingFactor(jaxfg.core.FactorBase[Tuple[jaxlie.SE2, jaxlie.SO2]]):
+    """Factor that aligns a heading with the rotation of a pose."""
+
+    @overrides
+    def compute_residual_vector(
+        self, variable_values: Tuple[jaxlie.SE2, jaxlie.SO2]
+    ) -> jnp.ndarray:
+        pose, heading = variable_values
+        return (pose.rotation().inverse() @ heading).log()
+
+
+@pytest.mark.parametrize("use_conjugate_gradient", [False, True])
+def test_schur_complement_solver_block_assembly(use_conjugate_gradient: bool):
+    # Headings are each connected to two poses, and are eliminated.
+    poses = [jaxfg.geometry.SE2Variable() for _ in range(3)]
+    headings = [jaxfg.geometry.SO2Variable() for _ in range(4)]
+    factors: List[jaxfg.core.FactorBase] = [
+        jaxfg.geometry.PriorFactor.make(
+            variable=poses[0],
+            mu=jaxlie.SE2.identity(),
+            noise_model=jaxfg.noises.DiagonalGaussian(
+                sqrt_precision_diagonal=onp.ones(3)
+            ),
+        )
+    ]
+    for i, heading in enumerate(headings):
+        for pose in (poses[i % 3], poses[(i + 1) % 3]):
+            factors.append(
+                _HeadingFactor(
+                    variables=(pose, heading),
+                    noise_model=jaxfg.noises.DiagonalGaussian(
+                        sqrt_precision_diagonal=onp.ones(1)
+                    ),
+                )
+            )
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+    assignments = jaxfg.core.VariableAssignments.make_from_dict(
+        {
+            **{pose: jaxlie.SE2.exp(onp.random.randn(3)) for pose in poses},
+            **{heading: jaxlie.SO2.exp(onp.random.randn(1)) for heading in headings},
+        }
+    ).update_storage_layout(graph.storage_layout)
+    A = graph.compute_whitened_residual_jacobian(
+        assignments, graph.compute_whitened_residual_vector(assignments)
+    )
+    ATb = onp.random.randn(graph.local_storage_layout.dim)
+    lambd = 0.1
+
+    solver = jaxfg.sparse.SchurComplementSolver.make(
+        graph,
+        eliminated_variable_types=(jaxfg.geometry.SO2Variable,),
+        use_conjugate_gradient=use_conjugate_gradient,
+        tolerance=1e-8,
+    )
+    assert solver.block_structure is not None
+    x_ours = jax.jit(
+        lambda A, ATb: solver.solve_subproblem(A=A, ATb=ATb, lambd=lambd, iteration=0)
+    )(A, ATb)
+
+    A_onp = onp.asarray(A.as_dense())
+    ATA = A_onp.T @ A_onp
+    x_onp = onp.linalg.solve(
+        ATA
+        + lambd * onp.diag(onp.diag(ATA))
+        + solver.diag_epsilon * onp.eye(ATA.shape[0]),
+        ATb,
+    )
+    onp.testing.assert_allclose(x_ours, x_onp, atol=1e-4, rtol=1e-4)
+
+
+def test_schur_complement_solver_make():
+    poses = [jaxfg.geometry.SE2Variable() for _ in range(3)]
+    headings = [jaxfg.geometry.SO2Variable() for _ in range(4)]
+    noise_model = jaxfg.noises.DiagonalGaussian.make_from_covariance(
+        diagonal=[1.0, 1.0, 1.0]
+    )
+    factors = [
+        jaxfg.geometry.BetweenFactor.make(
+            variable_T_world_a=a,
+            variable_T_world_b=b,
+            T_a_b=jaxlie.SE2.identity(),
+            noise_model=noise_model,
+        )
+        for a, b in zip(poses[:-1], poses[1:])
+    ] + [
+        jaxfg.geometry.PriorFactor.make(
+            variable=heading,
+            mu=jaxlie.SO2.identity(),
+            noise_model=jaxfg.noises.Gaussian.make_from_covariance(onp.eye(1)),
+        )
+        for heading in headings
+    ]
+    graph = jaxfg.core.StackedFactorGraph.make(factors)
+
+    solver = jaxfg.sparse.SchurComplementSolver.make(
+        graph, eliminated_variable_types=(jaxfg.geometry.SO2Variable,)
+    )
+    assert solver.eliminated_blocks == (
+        (
+            graph.local_storage_layout.index_from_variable_type[
+                jaxfg.geometry.SO2Variable
+            ],
+            4,
+            1,
+        ),
+    )
+
+    # Eliminated block is not block diagonal: between factors connect pairs of poses.
+    with pytest.raises(AssertionError):
+        jaxfg.sparse.SchurComplementSolver.make(
+            graph, eliminated_variable_types=(jaxfg.geometry.SE2Variable,)
+        )
+
+
+def test_dense_cholesky_solver_vmap():
+    # Batch of matrices with a shared sparsity pattern
+    batch_size = 4
+    A_shape = (20, 5)
+    mask = onp.random.randint(low=0, high=2, size=A_shape)
+    mask[:5, :] = 1  # Avoid rank deficiency
+    A_onp = onp.random.randn(batch_size, *A_shape) * mask
+    A_coo = scipy.sparse.coo_matrix(mask)
+    A_values = A_onp[:, A_coo.row, A_coo.col]
+    ATb = onp.random.randn(batch_size, A_shape[1])
+
+    solver = jaxfg.sparse.DenseCholeskySolver()
+
+    @jax.jit
+    @jax.vmap
+    def solve(A_values, ATb):
+        return solver.solve_subproblem(
+            A=jaxfg.sparse.SparseCooMatrix(
+                values=A_values,
+                coords=jaxfg.sparse.SparseCooCoordinates(
+                    rows=A_coo.row, cols=A_coo.col
+                ),
+                shape=A_shape,
+            ),
+            ATb=ATb,
+            lambd=0.0,
+            iteration=0,  # Unused
+        )
+
+    x_ours = solve(A_values, ATb)
+    for i in range(batch_size):
+        x_onp = onp.linalg.solve(A_onp[i].T @ A_onp[i], ATb[i])
+        onp.testing.assert_allclose(x_ours[i], x_onp, atol=1e-4, rtol=1e-4)
+
+
+def test_dense_cholesky_solver_rank_deficient():
+    # Last column is empty, so A^TA is singular
+    A_onp = onp.random.randn(10, 4)
+    A_onp[:, -1] = 0.0
+    A = jaxfg.sparse.SparseCooMatrix.from_scipy_coo_matrix(
+        scipy.sparse.coo_matrix(A_onp)
+    )
+    ATb = A_onp.T @ onp.random.randn(10)
+
+    x = jaxfg.sparse.DenseCholeskySolver().solve_subproblem(
+        A=A, ATb=ATb, lambd=0.0, iteration=0
+    )
+    assert onp.all(onp.isfinite(x))
+    onp.testing.assert_allclose(
+        x[:-1], onp.linalg.solve(A_onp[:, :-1].T @ A_onp[:, :-1], ATb[:-1]), atol=1e-3
+    )
+
+
+def test_auto_linear_solver_selection():
+    A_shape = (20, 5)
+    A_onp = onp.random.randn(*A_shape)
+    A = jaxfg.sparse.SparseCooMatrix.from_scipy_coo_matrix(
+        scipy.sparse.coo_matrix(A_onp)
+    )
+
+    def select(solver: jaxfg.sparse.AutoLinearSolver):
+        return type(solver.select_solver(A))
+
+    assert (
+        select(jaxfg.sparse.AutoLinearSolver(verbose=False))
+        is jaxfg.sparse.DenseCholeskySolver
+    )
+    assert (
+        select(jaxfg.sparse.AutoLinearSolver(dense_max_dim=0, verbose=False))
+        is jaxfg.sparse.CholmodSolver
+    )
+    assert (
+        select(
+            jaxfg.sparse.AutoLinearSolver(dense_max_dim=0, batched=True, verbose=False)
+        )
+        is jaxfg.sparse.ConjugateGradientSolver
+    )
+
+
+def test_auto_linear_solver_damping():
+    """Every default backend should apply the same damping."""
+    A_shape = (20, 5)
+    A_onp = onp.random.randn(*A_shape) * onp.random.randint(low=0, high=2, size=A_shape)
+    A_onp[:5, :] += onp.eye(5)  # Avoid rank deficiency
+    A = jaxfg.sparse.SparseCooMatrix.from_scipy_coo_matrix(
+        scipy.sparse.coo_matrix(A_onp)
+    )
+    ATb = onp.random.randn(A_shape[1])
+    lambd = 10.0
+
+    x_expected = onp.linalg.solve(A_onp.T @ A_onp + lambd * onp.eye(A_shape[1]), ATb)
+    solver = jaxfg.sparse.AutoLinearSolver(verbose=False)
+    for backend in (
+        solver.dense_solver,
+        solver.sparse_direct_solver,
+        jdc.replace(solver.iterative_solver, tolerance=1e-8),
+    ):
+        onp.testing.assert_allclose(
+            backend.solve_subproblem(A=A, ATb=ATb, lambd=lambd, iteration=0),
+            x_expected,
+            atol=1e-4,
+            rtol=1e-4,
+        )
+
+
+@pytest.mark.parametrize("num_threads", [1, 4])
+def test_cholmod_solver_vmap_and_grad(num_threads: int):
+    # Batch of matrices with a shared sparsity pattern
+    batch_size = 3
+    A_shape = (20, 5)
+    mask = onp.random.randint(low=0, high=2, size=A_shape)
+    mask[:5, :] = 1  # Avoid rank deficiency
+    A_coo = scipy.sparse.coo_matrix(mask)
+    A_values = onp.random.randn(batch_size, A_coo.nnz)
+    ATb = onp.random.randn(batch_size, A_shape[1])
+    lambd = 0.1
+
+    def make_A(values) -> jaxfg.sparse.SparseCooMatrix:
+        return jaxfg.sparse.SparseCooMatrix(
+            values=values,
+            coords=jaxfg.sparse.SparseCooCoordinates(rows=A_coo.row, cols=A_coo.col),
+            shape=A_shape,
+        )
+
+    def loss_ours(values, ATb):
+        x = jaxfg.sparse.CholmodSolver(num_threads=num_threads).solve_subproblem(
+            A=make_A(values), ATb=ATb, lambd=lambd, iteration=0
+        )
+        return jnp.sum(x**2)
+
+    def loss_dense(values, ATb):
+        A_dense = make_A(values).as_dense()
+        x = jnp.linalg.solve(
+            A_dense.T @ A_dense + (lambd + 1e-5) * jnp.eye(A_shape[1]), ATb
+        )
+        return jnp.sum(x**2)
+
+    for f in (jax.vmap, lambda f: jax.jit(jax.vmap(f))):
+        for loss_ours_i, loss_dense_i in zip(
+            f(jax.value_and_grad(loss_ours, argnums=(0, 1)))(A_values, ATb),
+            f(jax.value_and_grad(loss_dense, argnums=(0, 1)))(A_values, ATb),
+        ):
+            jax.tree_map(
+                lambda a, b: onp.testing.assert_allclose(a, b, atol=1e-4, rtol=1e-4),
+                loss_ours_i,
+                loss_dense_i,
+            )
+
+
+@pytest.mark.parametrize(
+    "in_axes",
+    [
+        (0, None, None),  # Batched A, shared ATb
+        (None, 0, None),  # Batched ATb, shared A
+        (None, None, 0),  # Batched lambd only
+        (0, None, 0),
+    ],
+)
+def test_cholmod_solver_vmap_partially_batched(
+    in_axes: Tuple[Optional[int], Optional[int], Optional[int]]
+):
+    batch_size = 3
+    A_shape = (20, 5)
+    mask = onp.random.randint(low=0, high=2, size=A_shape)
+    mask[:5, :] = 1  # Avoid rank deficiency
+    A_coo = scipy.sparse.coo_matrix(mask)
+    args = (
+        onp.random.randn(*((batch_size,) if in_axes[0] == 0 else ()), A_coo.nnz),
+        onp.random.randn(*((batch_size,) if in_axes[1] == 0 else ()), A_shape[1]),
+        onp.random.uniform(size=(batch_size,)) if in_axes[2] == 0 else 0.1,
+    )
+
+    def make_A(values) -> jaxfg.sparse.SparseCooMatrix:
+        return jaxfg.sparse.SparseCooMatrix(
+            values=values,
+            coords=jaxfg.sparse.SparseCooCoordinates(rows=A_coo.row, cols=A_coo.col),
+            shape=A_shape,
+        )
+
+    def loss_ours(values, ATb, lambd):
+        x = jaxfg.sparse.CholmodSolver().solve_subproblem(
+            A=make_A(values), ATb=ATb, lambd=lambd, iteration=0
+        )
+        return jnp.sum(x**2)
+
+    def loss_dense(values, ATb, lambd):
+        A_dense = make_A(values).as_dense()
+        x = jnp.linalg.solve(
+            A_dense.T @ A_dense + (lambd + 1e-5) * jnp.eye(A_shape[1]), ATb
+        )
+        return jnp.sum(x**2)
+
+    for loss_ours_i, loss_dense_i in zip(
+        jax.vmap(jax.value_and_grad(loss_ours, argnums=(0, 1, 2)), in_axes=in_axes)(
+            *args
+        ),
+        jax.vmap(jax.value_and_grad(loss_dense, argnums=(0, 1, 2)), in_axes=in_axes)(
+            *args
+        ),
+    ):
+        jax.tree_map(
+            lambda a, b: onp.testing.assert_allclose(a, b, atol=1e-4, rtol=1e-4),
+            loss_ours_i,
+            loss_dense_i,
+        )
+
+
+@pytest.mark.parametrize("lambd", [0.0, 0.1])
+def test_sparse_qr_solver(lambd: float):
+    pytest.importorskip("sparseqr")
+
+    # Build sparse matrix
+    A_shape = (20, 5)
+    A_onp = onp.random.randn(*A_shape) * onp.random.randint(low=0, high=2, size=A_shape)
+    A_onp[:5, :] += onp.eye(5)  # Avoid rank deficiency
+    A = jaxfg.sparse.SparseCooMatrix.from_scipy_coo_matrix(
+        scipy.sparse.coo_matrix(A_onp)
+    )
+    ATb = onp.random.randn(A_shape[1])
+
+    x_ours = jax.jit(
+        lambda A, ATb: jaxfg.sparse.SparseQrSolver().solve_subproblem(
+            A=A, ATb=ATb, lambd=lambd, iteration=0
+        )
+    )(A, ATb)
+    x_onp = onp.linalg.solve(A_onp.T @ A_onp + lambd * onp.eye(A_shape[1]), ATb)
+    onp.testing.assert_allclose(x_ours, x_onp, atol=1e-5, rtol=1e-5)
+
+
+def test_sparse_qr_solver_rank_deficient():
+    pytest.importorskip("sparseqr")
+
+    # Last column is empty, so the Jacobian is rank deficient.
+    A_shape = (20, 5)
+    A_onp = onp.random.randn(*A_shape)
+    A_onp[:, -1] = 0.0
+    A = jaxfg.sparse.SparseCooMatrix.from_scipy_coo_matrix(
+        scipy.sparse.coo_matrix(A_onp)
+    )
+    ATb = onp.random.randn(A_shape[1])
+
+    def solve(lambd: float) -> jnp.ndarray:
+        return jaxfg.sparse.SparseQrSolver().solve_subproblem(
+            A=A, ATb=ATb, lambd=lambd, iteration=0
+        )
+
+    with pytest.raises(Exception, match="rank deficient|singular"):
+        onp.asarray(solve(0.0))
+
+    # Damping makes the problem well-posed.
+    onp.testing.assert_allclose(
+        solve(0.1),
+        onp.linalg.solve(A_onp.T @ A_onp + 0.1 * onp.eye(A_shape[1]), ATb),
+        atol=1e-5,
+        rtol=1e-5,
+    )
+
+
+def test_factorize_triangular():
+    R_onp = onp.triu(onp.random.randn(6, 6)) + 3.0 * onp.eye(6)
+    R_onp[0, 3] = 0.0
+    b = onp.random.randn(6)
+
+    R_lu = jaxfg.sparse.factorize_triangular(scipy.sparse.csc_matrix(R_onp))
+    onp.testing.assert_allclose(R_lu.solve(b), onp.linalg.solve(R_onp, b))
+    onp.testing.assert_allclose(R_lu.solve(b, trans="T"), onp.linalg.solve(R_onp.T, b))
+
+    # Zero diagonals should be caught before SuperLU sees them.
+    R_onp[2, 2] = 0.0
+    with pytest.raises(ValueError, match="zero diagonal"):
+        jaxfg.sparse.factorize_triangular(scipy.sparse.csc_matrix(R_onp))
+
+
+@pytest.mark.parametrize(
+    "solver",
+    [
+        jaxfg.sparse.ConjugateGradientSolver(tolerance=1e-8, warm_start=True),
+        jaxfg.sparse.AutoLinearSolver(
+            dense_max_dim=0,
+            batched=True,
+            iterative_solver=jaxfg.sparse.ConjugateGradientSolver(
+                tolerance=1e-8, warm_start=True
+            ),
+            verbose=False,
+        ),
+    ],
+)
+def test_solver_stateful(solver: jaxfg.sparse.LinearSubproblemSolverBase):
+    # Build sparse matrix
+    A_shape = (20, 5)
+    A_onp = onp.random.randn(*A_shape) * onp.random.randint(low=0, high=2, size=A_shape)
+    A_onp[: A_shape[1], :] += onp.eye(A_shape[1])
+
+    @jax.jit
+    def solve(A: jaxfg.sparse.SparseCooMatrix, ATb: onp.ndarray, state):
+        return solver.solve_subproblem_stateful(
+            A=A, ATb=ATb, lambd=0.0, iteration=0, state=state
+        )
+
+    # Solve a sequence of perturbed systems, carrying state between each
+    state = solver.initialize_state(A_shape[1])
+    ATb = onp.random.randn(A_shape[1])
+    for i in range(5):
+        A = jaxfg.sparse.SparseCooMatrix.from_scipy_coo_matrix(
+            scipy.sparse.coo_matrix(A_onp)
+        )
+        x_ours, state = solve(A, ATb, state)
+        x_onp = onp.linalg.solve(A_onp.T @ A_onp, ATb)
+        onp.testing.assert_allclose(x_ours, x_onp, atol=1e-5, rtol=1e-5)
+        onp.testing.assert_allclose(state.previous_solution, x_ours)
+
+        A_onp = A_onp + 0.01 * onp.random.randn(*A_shape) * (A_onp != 0.0)
+        ATb = ATb + 0.01 * onp.random.randn(A_shape[1])
+
+
+def test_conjugate_gradient_diagnostics():
+    # Build sparse matrix
+    A_shape = (40, 10)
+    A_onp = onp.random.randn(*A_shape)
+    A = jaxfg.sparse.SparseCooMatrix.from_scipy_coo_matrix(
+        scipy.sparse.coo_matrix(A_onp)
+    )
+    ATb = onp.random.randn(A_shape[1])
+
+    # Iteration budget should grow with the outer iteration count
+    solver = jaxfg.sparse.ConjugateGradientSolver(
+        tolerance=1e-5, max_cg_iterations=1, max_cg_iterations_growth=2
+    )
+    state = solver.initialize_state(A_shape[1])
+    for iteration, expected_iterations in ((0, 1), (2, 5), (100, None)):
+        x, state = jax.jit(solver.solve_subproblem_stateful)(
+            A=A, ATb=ATb, lambd=0.0, iteration=iteration, state=state
+        )
+        residual_norm = onp.linalg.norm(A_onp.T @ (A_onp @ x) - ATb)
+        onp.testing.assert_allclose(
+            state.residual_norm, residual_norm, rtol=1e-3, atol=1e-5
+        )
+        if expected_iterations is None:
+            # Budget is capped at the local dimension, and CG should converge
+            assert 0 < state.iterations <= A_shape[1]
+            assert state.converged
+        else:
+            assert state.iterations == expected_iterations
+            assert not state.converged